@@ -0,0 +1,441 @@
+"""
+pos.api
+-------
+Servicio HTTP/JSON (solo biblioteca estándar, asyncio) sobre los DAOs, para
+clientes ligeros e integraciones que compartan la base de una tienda.
+
+    python run_api.py --db pos.db --port 8080
+
+    GET  /products?q=texto&limit=20     búsqueda (código, nombre, SKU)
+    GET  /products/code/{código}        coincidencia exacta de barras o SKU
+    GET  /products/{id}
+    GET  /stock?ids=1,2,3[&warehouse=]  existencias por lote
+    GET  /stock/{id}[?warehouse=]
+    POST /sales                         {"items": [{"product_id", "qty", "price"?}],
+                                         "client_id"?, "paid"?, "discount"?}
+    GET  /cash[?limit=]                 turno actual: total y últimos movimientos
+    POST /cash/movements                {"concept", "amount"}
+    POST /cash/close                    {"next_opening"?} → resumen del corte Z
+    GET  /cash/reports/{turno}          resumen guardado de un corte
+    GET  /health
+
+Las lecturas corren en un pool de hilos, cada uno con su conexión y sus
+DAOs (en WAL los lectores no esperan al escritor).  Las escrituras pasan
+por una cola a una única tarea escritora que las ejecuta de a una en su
+propio hilo: nunca compiten por el bloqueo de SQLite y el cobro valida el
+stock sin carreras.  Errores: 400 petición inválida, 404 no existe, 409
+regla de negocio (stock insuficiente, turno abierto…), 500 el resto.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, NamedTuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .db import ConnectionFactory, get_factory
+from .events import ChangeBus
+from .models import build_daos
+from .models.cart import Cart
+from .models.product import BarcodeIndex, ProductCache
+from .sync import SyncWorker
+
+MAX_BODY = 1 << 20
+_PRODUCT_FIELDS = ("id", "barcode", "name", "unit", "price", "stock")
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: dict[str, str]
+    body: bytes
+
+    def json(self) -> dict[str, Any]:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "JSON inválido") from None
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Se esperaba un objeto JSON")
+        return data
+
+    def number(self, name: str, default: Any = None, cast=int) -> Any:
+        value = self.query.get(name)
+        if value in (None, ""):
+            return default
+        try:
+            return cast(value)
+        except ValueError:
+            raise HTTPError(400, f"Parámetro {name} inválido") from None
+
+
+def _product(row: tuple | None) -> dict[str, Any]:
+    if row is None:
+        raise LookupError("Producto no encontrado")
+    return dict(zip(_PRODUCT_FIELDS, row))
+
+
+def _field(data: dict, name: str, cast=float, default: Any = ..., *,
+           low: float | None = None, high: float | None = None,
+           positive: bool = False) -> Any:
+    """Campo del cuerpo JSON convertido con `cast` (400 si falta o no sirve).
+
+    Para números: `low`/`high` son límites inclusivos y `positive` exige > 0;
+    NaN e infinitos se rechazan siempre.
+    """
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Se esperaba un objeto JSON")
+    value = data.get(name, default)
+    if value is ...:
+        raise HTTPError(400, f"Falta el campo {name}")
+    try:
+        value = None if value is None else cast(value)
+    except (TypeError, ValueError, OverflowError):
+        raise HTTPError(400, f"Campo {name} inválido") from None
+    if isinstance(value, (int, float)) and (
+            not math.isfinite(value) or (positive and value <= 0)
+            or (low is not None and value < low)
+            or (high is not None and value > high)):
+        raise HTTPError(400, f"Campo {name} fuera de rango")
+    return value
+
+
+# ───────────────────────── acceso a la base ─────────────────────────
+class DBWorkers:
+    """Lectores concurrentes y un único escritor sobre la misma base.
+
+    `read(fn)` / `write(fn)` ejecutan `fn(daos)` fuera del bucle de asyncio
+    y devuelven su resultado.  Caché de productos, índice de códigos y bus
+    de cambios se comparten entre todos los hilos.
+    """
+
+    def __init__(self, factory: ConnectionFactory, readers: int = 4,
+                 events: ChangeBus | None = None, queue_size: int = 256) -> None:
+        self.factory = factory
+        self.events = events or ChangeBus()
+        self.queue_size = queue_size
+        codes, cache = BarcodeIndex(), ProductCache()
+        self._build = lambda conn: build_daos(conn, codes, cache, self.events)
+        self._local = threading.local()
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix="api-read")
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="api-write")
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def _call(self, fn: Callable[[Any], Any]) -> Any:
+        daos = getattr(self._local, "daos", None)
+        if daos is None:
+            daos = self._local.daos = self._build(self.factory.get())
+        return fn(daos)
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(self.queue_size)
+        self._task = asyncio.get_running_loop().create_task(self._write_loop())
+
+    async def read(self, fn: Callable[[Any], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._call, fn)
+
+    async def write(self, fn: Callable[[Any], Any]) -> Any:
+        """Encola la escritura (espera si la cola está llena) y su resultado."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((fn, future))
+        return await future
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            fn, future = await self._queue.get()
+            try:
+                result = await loop.run_in_executor(self._writer, self._call, fn)
+            except Exception as exc:
+                if not future.cancelled():
+                    future.set_exception(exc)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._readers.shutdown()
+        self._writer.shutdown()
+
+
+# ───────────────────────── aplicación ─────────────────────────
+Handler = Callable[..., Awaitable[Any]]
+
+
+class POSApi:
+    def __init__(self, db: DBWorkers) -> None:
+        self.db = db
+        self.routes: list[tuple[str, re.Pattern, Handler]] = [
+            ("GET", re.compile(r"/health"), self.health),
+            ("GET", re.compile(r"/products"), self.search_products),
+            ("GET", re.compile(r"/products/code/(?P<code>[^/]+)"), self.product_by_code),
+            ("GET", re.compile(r"/products/(?P<pid>\d+)"), self.product),
+            ("GET", re.compile(r"/stock"), self.stock_many),
+            ("GET", re.compile(r"/stock/(?P<pid>\d+)"), self.stock),
+            ("POST", re.compile(r"/sales"), self.checkout),
+            ("GET", re.compile(r"/cash"), self.cash),
+            ("POST", re.compile(r"/cash/movements"), self.cash_add),
+            ("POST", re.compile(r"/cash/close"), self.cash_close),
+            ("GET", re.compile(r"/cash/reports/(?P<sid>\d+)"), self.shift_report),
+        ]
+
+    async def dispatch(self, req: Request) -> tuple[int, Any]:
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = pattern.fullmatch(req.path)
+            if match is None:
+                continue
+            if method != req.method:
+                allowed = True
+                continue
+            params = {k: unquote(v) for k, v in match.groupdict().items()}
+            result = await handler(req, **params)
+            return result if isinstance(result, tuple) else (200, result)
+        if allowed:
+            raise HTTPError(405, "Método no permitido")
+        raise HTTPError(404, "Ruta desconocida")
+
+    # ───────────── productos y existencias ─────────────
+    async def health(self, req: Request) -> dict:
+        return {"status": "ok"}
+
+    async def search_products(self, req: Request) -> list:
+        text, limit = req.query.get("q", ""), req.number("limit", 20)
+        rows = await self.db.read(lambda d: d.product.search(text, limit=limit))
+        return [_product(r) for r in rows]
+
+    async def product_by_code(self, req: Request, code: str) -> dict:
+        return _product(await self.db.read(lambda d: d.product.find_by_code(code)))
+
+    async def product(self, req: Request, pid: str) -> dict:
+        return _product(await self.db.read(lambda d: d.product.get(int(pid))))
+
+    async def stock_many(self, req: Request) -> dict:
+        try:
+            ids = [int(i) for i in req.query.get("ids", "").split(",") if i]
+        except ValueError:
+            raise HTTPError(400, "Parámetro ids inválido") from None
+        if not ids:
+            raise HTTPError(400, "Falta el parámetro ids")
+        wid = req.number("warehouse")
+        stock = await self.db.read(lambda d: d.inventory.stock_many(ids, wid))
+        return {str(pid): qty for pid, qty in stock.items()}
+
+    async def stock(self, req: Request, pid: str) -> dict:
+        wid = req.number("warehouse")
+        qty = await self.db.read(lambda d: d.inventory.stock(int(pid), wid))
+        return {"product_id": int(pid), "warehouse_id": wid, "stock": qty}
+
+    # ───────────── ventas ─────────────
+    async def checkout(self, req: Request) -> tuple[int, dict]:
+        data = req.json()
+        items = data.get("items")
+        if not items or not isinstance(items, list):
+            raise HTTPError(400, "La venta no tiene renglones")
+        # nada negativo: un renglón o un descuento así sería una devolución
+        lines = [(_field(it, "product_id", int),
+                  _field(it, "qty", float, 1, positive=True),
+                  _field(it, "price", float, None, low=0)) for it in items]
+        client_id = _field(data, "client_id", int, None)
+        discount = _field(data, "discount", float, 0, low=0, high=100)
+        paid = _field(data, "paid", float, None, low=0)
+
+        def run(d) -> dict:
+            # dentro del escritor: el stock que se valida es el que se descuenta
+            cart = Cart()
+            for pid, qty, price in lines:
+                prod = _product(d.product.get(pid))
+                cart.add(pid, prod["name"], prod["price"] if price is None else price,
+                         qty, stock=prod["stock"])
+            total = cart.total * (1 - discount / 100)
+            sale_id = d.sale.create_sale(
+                client_id=client_id, cart=cart.lines(), discount_global=discount,
+                paid=total if paid is None else paid,
+            )
+            return {"id": sale_id, "total": round(total, 2), "lines": len(cart)}
+
+        return 201, await self.db.write(run)
+
+    # ───────────── caja ─────────────
+    async def cash(self, req: Request) -> dict:
+        limit = req.number("limit", 50)
+
+        def run(d) -> dict:
+            sid = d.cash.current_shift_id()
+            return {"shift_id": sid, "total": d.cash.total_shift(sid),
+                    "movements": [dict(r) for r in d.cash.page(limit=limit, shift_id=sid)]}
+
+        # abrir el turno si no hay uno es una escritura
+        return await self.db.write(run)
+
+    async def cash_add(self, req: Request) -> tuple[int, dict]:
+        data = req.json()
+        concept, amount = _field(data, "concept", str), _field(data, "amount")
+        if not concept or not concept.strip():
+            raise HTTPError(400, "El concepto no puede estar vacío")
+        await self.db.write(lambda d: d.cash.add(concept, amount))
+        return 201, {"concept": concept, "amount": amount}
+
+    async def cash_close(self, req: Request) -> dict:
+        opening = _field(req.json(), "next_opening", float, 0, low=0)
+
+        def run(d) -> dict:
+            return d.cash.reports.get(d.cash.close_shift(opening))
+
+        return await self.db.write(run)
+
+    async def shift_report(self, req: Request, sid: str) -> dict:
+        summary = await self.db.read(lambda d: d.cash.reports.get(int(sid)))
+        if summary is None:
+            raise LookupError(f"El turno {sid} no tiene corte")
+        return summary
+
+
+# ───────────────────────── HTTP ─────────────────────────
+async def _read_request(reader: asyncio.StreamReader) -> tuple[Request, bool] | None:
+    """Lee una petición; devuelve (petición, keep_alive) o None si se cerró."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Línea de petición inválida") from None
+    headers: dict[str, str] = {}
+    while True:
+        raw = await reader.readline()
+        if raw in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = raw.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "Content-Length inválido") from None
+    if length > MAX_BODY:
+        raise HTTPError(413, "Cuerpo demasiado grande")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    connection = headers.get("connection", "").lower()
+    keep_alive = (connection != "close" if version == "HTTP/1.1"
+                  else connection == "keep-alive")
+    return Request(method.upper(), url.path.rstrip("/") or "/",
+                   dict(parse_qsl(url.query)), body), keep_alive
+
+
+def _response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+class Server:
+    def __init__(self, api: POSApi, host: str = "127.0.0.1", port: int = 8080) -> None:
+        self.api, self.host, self.port = api, host, port
+        self.server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        self.api.db.start()
+        self.server = await asyncio.start_server(self._client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.api.db.close()
+
+    async def _client(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    parsed = await _read_request(reader)
+                    if parsed is None:
+                        break
+                    req, keep_alive = parsed
+                    status, payload = await self.api.dispatch(req)
+                except HTTPError as exc:
+                    status, payload = exc.status, {"error": str(exc)}
+                except LookupError as exc:
+                    status, payload = 404, {"error": exc.args[0] if exc.args else "No existe"}
+                except ValueError as exc:
+                    status, payload = 409, {"error": str(exc)}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as exc:
+                    traceback.print_exc(file=sys.stderr)
+                    status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+# ───────────────────────── arranque ─────────────────────────
+async def serve(db_path: str | None, host: str, port: int, readers: int) -> None:
+    # un hilo por lector, el escritor y el envío a la central
+    factory = get_factory(db_path, pool_size=readers + 2)
+    events = ChangeBus()
+    sync = SyncWorker.from_config(factory)
+    if sync is not None:
+        events.subscribe(lambda _change: sync.wake(),
+                         "sales", "stock_levels", "cash_movements")
+        sync.start()
+    server = Server(POSApi(DBWorkers(factory, readers, events)), host, port)
+    await server.start()
+    print(f"API escuchando en http://{host}:{server.port}", file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        if sync is not None:
+            sync.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="run_api.py")
+    parser.add_argument("--db", help="ruta de la base SQLite (por defecto pos.db)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--readers", type=int, default=4,
+                        help="hilos de lectura concurrentes")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.db, args.host, args.port, args.readers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,62 +1,159 @@
+import time
+_T0 = time.perf_counter()
+
+import importlib
+import sys
 import tkinter as tk
 from tkinter import ttk
-from .db import get_connection
-from .models.product import ProductDAO
-from .ui.product_frame import ProductFrame
-from .models.product import ProductDAO
-from .models.client  import ClientDAO
-from .models.sale    import SaleDAO
-from .ui.product_frame import ProductFrame
-from .ui.client_frame  import ClientFrame
-from .ui.sale_frame    import SaleFrame
-from .models.cash       import CashDAO
-from .models.inventory  import InventoryDAO
-from .models.warehouse  import WarehouseDAO
-from .models.supplier   import SupplierDAO
-from .models.payable    import PayableDAO
-
-
-from .ui.cash_frame      import CashFrame
-from .ui.inventory_frame import InventoryFrame
-from .ui.warehouse_frame import WarehouseFrame
-from .ui.supplier_frame  import SupplierFrame
-from .ui.payable_frame   import PayableFrame
+
+# solo Tk al importar: la base, los DAOs y el resto se importan en
+# POSApp.__init__ (cuentan en las fases «db» y «daos») y pos.sync solo si
+# hay una central configurada
+_T_IMPORTS = time.perf_counter()
+
+
+# Pestañas: (título, módulo, clase, constructor).  El módulo se importa y el
+# frame se construye (y carga sus datos) la primera vez que se muestra.
+_TABS = (
+    ("Productos", ".ui.product_frame", "ProductFrame",
+     lambda app, cls, parent: cls(parent, app.dao_product, feed=app.feed,
+                                  on_add_to_cart=app.add_to_cart)),
+    ("Ventas", ".ui.sale_frame", "SaleFrame",
+     lambda app, cls, parent: cls(parent, app.dao_product, app.dao_client,
+                                  app.dao_sale, executor=app.executor,
+                                  feed=app.feed)),
+    ("Caja", ".ui.cash_frame", "CashFrame",
+     lambda app, cls, parent: cls(parent, app.dao_cash, feed=app.feed,
+                                  executor=app.executor)),
+    ("Clientes", ".ui.client_frame", "ClientFrame",
+     lambda app, cls, parent: cls(parent, app.dao_client, feed=app.feed)),
+    ("Inventario", ".ui.inventory_frame", "InventoryFrame",
+     lambda app, cls, parent: cls(parent, app.dao_product, app.dao_inventory,
+                                  app.dao_warehouse, executor=app.executor,
+                                  feed=app.feed)),
+    ("Almacenes", ".ui.warehouse_frame", "WarehouseFrame",
+     lambda app, cls, parent: cls(parent, app.dao_warehouse)),
+    ("Proveedores", ".ui.supplier_frame", "SupplierFrame",
+     lambda app, cls, parent: cls(parent, app.dao_supplier)),
+    ("Pagos", ".ui.payable_frame", "PayableFrame",
+     lambda app, cls, parent: cls(parent, app.dao_payable, app.dao_supplier,
+                                  feed=app.feed)),
+    ("Diagnóstico", ".ui.diagnostics_frame", "DiagnosticsFrame",
+     lambda app, cls, parent: cls(parent, app.profiler, app.startup)),
+)
+
 
 class POSApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, profile=False):
         super().__init__()
         self.title("Sistema Punto de Venta"); self.geometry("1024x768")
+        # arranque: ms acumulados desde que se importó este módulo;
+        # las entradas «tab …» son lo que tardó en construirse cada pestaña
+        self.startup = {"imports": (_T_IMPORTS - _T0) * 1000}
 
+        # SQL y DAOs medidos solo con --profile (el trazado cuesta en cada
+        # sentencia); se consulta en la pestaña Diagnóstico
+        self.profiler = None
+        if profile:
+            from .instrument import Profiler
+            self.profiler = Profiler()
+        from .db import get_connection, get_factory
+        get_factory(profiler=self.profiler)
         conn = get_connection()
+        self._mark("db")
+        from .events import ChangeBus
+        from .models import build_daos
+        from .models.product import ProductCache, BarcodeIndex
+        from .ui.change_feed import TkChangeFeed
+        from .ui.db_executor import DBExecutor
+        codes, cache = BarcodeIndex(), ProductCache()
+        # los DAOs (de ambos hilos) avisan aquí qué filas cambiaron; el feed
+        # lo lleva al hilo de Tk y las pestañas parchan solo esas filas
+        self.events = ChangeBus()
+        self.feed = TkChangeFeed(self, self.events)
+        daos = build_daos(conn, codes, cache, self.events)
 
         # DAOs existentes
-        self.dao_product = ProductDAO(conn)
-        self.dao_client  = ClientDAO(conn)
-        self.dao_sale    = SaleDAO(conn)
+        self.dao_product = daos.product
+        self.dao_client  = daos.client
+        self.dao_sale    = daos.sale
 
         # Nuevos DAOs
-        self.dao_cash      = CashDAO(conn)
-        self.dao_inventory = InventoryDAO(conn)
-        self.dao_warehouse = WarehouseDAO(conn)
-        self.dao_supplier  = SupplierDAO(conn)
-        self.dao_payable   = PayableDAO(conn)
+        self.dao_cash      = daos.cash
+        self.dao_inventory = daos.inventory
+        self.dao_warehouse = daos.warehouse
+        self.dao_supplier  = daos.supplier
+        self.dao_payable   = daos.payable
+
+        # consultas pesadas y cobros corren fuera del hilo de Tk
+        self.executor = DBExecutor(
+            self, get_factory(), lambda c: build_daos(c, codes, cache, self.events)
+        )
+        # envío a la central en segundo plano (solo si hay una configurada);
+        # cada venta o movimiento adelanta el siguiente envío
+        self.sync = None
+        if daos.outbox.state()["central"]:
+            from .sync import SyncWorker
+            self.sync = SyncWorker.from_config(get_factory())
+        if self.sync is not None:
+            self.events.subscribe(lambda _change: self.sync.wake(),
+                                  "sales", "stock_levels", "cash_movements")
+            self.sync.start()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._mark("daos")
 
         self._build_ui()
+        self.after_idle(self._ready)
+
+    def _mark(self, phase):
+        self.startup[phase] = (time.perf_counter() - _T0) * 1000
 
     def _build_ui(self):
-        nb = ttk.Notebook(self); nb.pack(fill="both",expand=True)
-        nb.add(ProductFrame(nb, self.dao_product), text="Productos")
-        nb.add(SaleFrame(nb, self.dao_product, self.dao_client, self.dao_sale),
-               text="Ventas")
-        nb.add(CashFrame(nb, self.dao_cash), text="Caja")
-        nb.add(ClientFrame(nb, self.dao_client), text="Clientes")
-        nb.add(InventoryFrame(nb,self.dao_product,self.dao_inventory,self.dao_warehouse),text="Inventario")
-        nb.add(WarehouseFrame(nb, self.dao_warehouse), text="Almacenes")
-        nb.add(SupplierFrame(nb, self.dao_supplier), text="Proveedores")
-        nb.add(PayableFrame(nb, self.dao_payable, self.dao_supplier), text="Pagos")
+        self.nb = ttk.Notebook(self); self.nb.pack(fill="both",expand=True)
+        self.frames = {}                      # título → frame ya construido
+        self._holders = {}                    # título → contenedor en el notebook
+        for title, *_ in _TABS:
+            holder = ttk.Frame(self.nb)
+            self.nb.add(holder, text=title)
+            self._holders[title] = holder
+        self.nb.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        self.frame(_TABS[0][0])
+        self._mark("first_tab")
+
+    def frame(self, title):
+        """Frame de la pestaña `title`, construyéndolo si hace falta."""
+        built = self.frames.get(title)
+        if built is not None:
+            return built
+        _, module, name, make = next(t for t in _TABS if t[0] == title)
+        t0 = time.perf_counter()
+        cls = getattr(importlib.import_module(module, __package__), name)
+        built = self.frames[title] = make(self, cls, self._holders[title])
+        built.pack(fill="both", expand=True)
+        self.startup[f"tab {title}"] = (time.perf_counter() - t0) * 1000
+        return built
+
+    def _on_tab_changed(self, _event):
+        self.frame(self.nb.tab(self.nb.select(), "text"))
+
+    def add_to_cart(self, pid):
+        """Productos envía artículos aunque Ventas aún no se haya abierto."""
+        self.frame("Ventas").add_product(pid)
+
+    def _ready(self):
+        self._mark("ready")
+        if "--startup-report" in sys.argv:
+            for phase, ms in self.startup.items():
+                print(f"{phase:<22} {ms:8.1f} ms", file=sys.stderr)
+
+    def _on_close(self):
+        self.executor.shutdown()
+        if self.sync is not None:
+            self.sync.stop()
+        self.destroy()
 
 def main():
-    POSApp().mainloop()
+    POSApp(profile="--profile" in sys.argv).mainloop()
 
 if __name__ == "__main__":
     main()
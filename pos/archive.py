@@ -0,0 +1,290 @@
+"""
+pos.archive
+-----------
+Archivado de históricos por mes en archivos SQLite aparte.
+
+`LedgerArchive.archive_month('2025-03')` mueve a `archive/pos_2025-03.db`
+los movimientos de inventario, las ventas (con sus renglones) y los
+movimientos de caja de turnos ya cerrados de ese mes, y los borra de la
+base viva.  Nada cambia para la operación diaria:
+
+* existencias: por cada producto/almacén se deja en `stock_movements` un
+  movimiento «Saldo archivado» con la suma archivada, así que
+  `stock_levels`, `stock-verify` y `stock-rebuild` siguen cuadrando;
+* existencias a fecha: se guarda una fotografía al cierre del periodo
+  (marcada `archived`), de modo que `stock_as_of` sigue exacto desde el
+  cierre en adelante; para fechas anteriores lanza ValueError y hay que
+  consultar `history()`;
+* caja y reportes: los totales por turno y los agregados de ventas ya
+  están en `cash_shifts` y en las tablas `rollup_*` (`RollupDAO.backfill`
+  solo reconstruye lo posterior a `horizon()`).
+
+Para consultar el historial completo, `history(start, end)` adjunta con
+ATTACH los archivos del rango y crea vistas temporales `history_<tabla>`
+que unen lo vivo con lo archivado (sin los saldos de arrastre).
+"""
+
+from __future__ import annotations
+
+import calendar
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+# tablas de histórico que se mueven a los archivos mensuales
+TABLES = ("stock_movements", "sales", "sale_items", "cash_movements")
+CARRY_CONCEPT = "Saldo archivado"
+
+_PERIOD_RE = re.compile(r"^\d{4}-\d{2}$")
+_FILE_RE = re.compile(r"^pos_(\d{4}-\d{2})\.db$")
+
+
+def period_bounds(period: str) -> tuple[str, str]:
+    """Primer y último instante ('AAAA-MM-DD HH:MM:SS') del mes `period`."""
+    if not _PERIOD_RE.match(period):
+        raise ValueError(f"Periodo inválido {period!r} (formato AAAA-MM)")
+    year, month = map(int, period.split("-"))
+    last = calendar.monthrange(year, month)[1]
+    return f"{period}-01 00:00:00", f"{period}-{last:02d} 23:59:59"
+
+
+def _align_columns(conn: sqlite3.Connection, schema: str, table: str) -> None:
+    """Agrega a `schema.table` las columnas que la base viva ganó después de
+    crear el archivo (migraciones posteriores), para que SELECT * coincida."""
+    have = {r[1] for r in conn.execute(f"PRAGMA {schema}.table_info({table})")}
+    for r in conn.execute(f"PRAGMA main.table_info({table})"):
+        if r[1] not in have:
+            conn.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN {r[1]} {r[2]}")
+
+
+def _create_archive_table(conn: sqlite3.Connection, table: str) -> None:
+    """`arch.table` con las columnas de la tabla viva e `id` como clave.
+
+    La clave hace idempotente el copiado (INSERT OR IGNORE): si un fallo
+    deja confirmado el archivo pero no la base viva, repetir el archivado
+    no duplica filas.  Los archivos creados antes sin clave reciben un
+    índice único equivalente.
+    """
+    cols = conn.execute(f"PRAGMA main.table_info({table})").fetchall()
+    body = ", ".join(f"{c[1]} {c[2]}" + (" PRIMARY KEY" if c[1] == "id" else "")
+                     for c in cols)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS arch.{table}({body})")
+    _align_columns(conn, "arch", table)
+    keyed = any(c[1] == "id" and c[5] for c in
+                conn.execute(f"PRAGMA arch.table_info({table})"))
+    if not keyed:
+        conn.execute(f"DELETE FROM arch.{table} WHERE rowid NOT IN "
+                     f"(SELECT MIN(rowid) FROM arch.{table} GROUP BY id)")
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS arch.ux_{table}_id "
+                     f"ON {table}(id)")
+
+
+def horizon(conn: sqlite3.Connection) -> str | None:
+    """Fin del último periodo archivado ('AAAA-MM-DD HH:MM:SS'), o None.
+
+    Es la fecha de la fotografía que deja `archive_month`; hasta ese
+    instante la base viva no tiene el detalle de ventas ni movimientos.
+    """
+    return conn.execute(
+        "SELECT MAX(taken) FROM stock_snapshots WHERE archived").fetchone()[0]
+
+
+class LedgerArchive:
+    """Archivos mensuales de históricos junto a la base viva."""
+
+    def __init__(self, conn: sqlite3.Connection, directory: str | None = None) -> None:
+        self.conn = conn
+        if directory is None:
+            main = conn.execute("PRAGMA database_list").fetchone()["file"]
+            directory = os.path.join(os.path.dirname(main) or ".", "archive")
+        self.directory = directory
+
+    def path(self, period: str) -> str:
+        return os.path.join(self.directory, f"pos_{period}.db")
+
+    def periods(self) -> list[str]:
+        """Periodos ya archivados, en orden."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(m.group(1) for f in os.listdir(self.directory)
+                      if (m := _FILE_RE.match(f)))
+
+    def pending_periods(self, before: str) -> list[str]:
+        """Meses con datos vivos anteriores a `before` ('AAAA-MM')."""
+        start, _ = period_bounds(before)
+        rows = self.conn.execute(
+            """
+            SELECT DISTINCT substr(date, 1, 7) FROM (
+                SELECT date FROM stock_movements
+                 WHERE date < ? AND concept IS NOT ?
+                UNION ALL SELECT date FROM sales WHERE date < ?
+                UNION ALL
+                SELECT m.date FROM cash_movements m
+                  JOIN cash_shifts s ON s.id = m.shift_id
+                 WHERE s.opened < ? AND s.closed IS NOT NULL
+            ) ORDER BY 1
+            """,
+            (start, CARRY_CONCEPT, start, start),
+        )
+        return [r[0] for r in rows]
+
+    # ─────────────────────── archivado ──────────────────────
+    def archive_month(self, period: str) -> dict[str, int]:
+        """Mueve el mes `period` a su archivo; devuelve filas movidas por tabla."""
+        start, end = period_bounds(period)
+        current = self.conn.execute(
+            "SELECT strftime('%Y-%m', 'now', 'localtime')").fetchone()[0]
+        if period >= current:
+            raise ValueError(f"El periodo {period} aún no está cerrado")
+
+        os.makedirs(self.directory, exist_ok=True)
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute("ATTACH DATABASE ? AS arch", (self.path(period),))
+        try:
+            for table in TABLES:
+                _create_archive_table(self.conn, table)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS arch.idx_sm_date "
+                              "ON stock_movements(date)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS arch.idx_sales_date "
+                              "ON sales(date)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS arch.idx_items_sale "
+                              "ON sale_items(sale_id)")
+            with self.conn:
+                moved = self._move(start, end)
+        finally:
+            self.conn.execute("DETACH DATABASE arch")
+        return moved
+
+    def _move(self, start: str, end: str) -> dict[str, int]:
+        c = self.conn
+        # temporales con los ids a mover (una sola evaluación de cada filtro)
+        c.execute("DROP TABLE IF EXISTS temp.arch_ids")
+        c.execute("CREATE TEMP TABLE arch_ids(tbl TEXT, id INTEGER, "
+                  "PRIMARY KEY(tbl, id)) WITHOUT ROWID")
+        # movimientos del mes y saldos de arrastre previos (se consolidan)
+        c.execute("""
+            INSERT INTO arch_ids SELECT 'stock_movements', id FROM stock_movements
+             WHERE date BETWEEN ? AND ? OR (concept = ? AND date < ?)
+        """, (start, end, CARRY_CONCEPT, start))
+        c.execute("""
+            INSERT INTO arch_ids SELECT 'sales', id FROM sales
+             WHERE date BETWEEN ? AND ?
+        """, (start, end))
+        c.execute("""
+            INSERT INTO arch_ids SELECT 'sale_items', i.id FROM sale_items i
+             WHERE i.sale_id IN (SELECT id FROM arch_ids WHERE tbl = 'sales')
+        """)
+        # caja: solo turnos cerrados abiertos dentro del mes
+        c.execute("""
+            INSERT INTO arch_ids SELECT 'cash_movements', m.id
+              FROM cash_movements m JOIN cash_shifts s ON s.id = m.shift_id
+             WHERE s.opened BETWEEN ? AND ? AND s.closed IS NOT NULL
+        """, (start, end))
+
+        # existencias al cierre del periodo, antes de mover nada
+        closing = c.execute("""
+            SELECT product_id, warehouse_id, SUM(qty) FROM stock_movements
+             WHERE date <= ?
+          GROUP BY product_id, warehouse_id
+            HAVING SUM(qty) <> 0
+        """, (end,)).fetchall()
+        # saldo de arrastre por producto/almacén = lo que sale del libro vivo
+        carry = c.execute("""
+            SELECT product_id, warehouse_id, SUM(qty) FROM stock_movements
+             WHERE id IN (SELECT id FROM arch_ids WHERE tbl = 'stock_movements')
+          GROUP BY product_id, warehouse_id
+            HAVING SUM(qty) <> 0
+        """).fetchall()
+
+        moved = {}
+        for table in TABLES:
+            c.execute(f"""
+                INSERT OR IGNORE INTO arch.{table} SELECT * FROM main.{table}
+                 WHERE id IN (SELECT id FROM arch_ids WHERE tbl = ?)
+            """, (table,))
+            moved[table] = c.execute(f"""
+                DELETE FROM main.{table}
+                 WHERE id IN (SELECT id FROM arch_ids WHERE tbl = ?)
+            """, (table,)).rowcount
+        c.executemany("""
+            INSERT INTO stock_movements(date, product_id, warehouse_id, qty, concept)
+            VALUES (?,?,?,?,?)
+        """, [(end, pid, wid, qty, CARRY_CONCEPT) for pid, wid, qty in carry])
+        # las fotografías anteriores al cierre ya no cuadran con los ids vivos;
+        # la del cierre las reemplaza y cubre también los saldos recién puestos
+        c.execute("""
+            DELETE FROM stock_snapshot_lines WHERE snapshot_id IN
+                (SELECT id FROM stock_snapshots WHERE taken <= ?)
+        """, (end,))
+        c.execute("DELETE FROM stock_snapshots WHERE taken <= ?", (end,))
+        sid = c.execute("""
+            INSERT INTO stock_snapshots(taken, last_movement_id, archived)
+            SELECT ?, COALESCE(MAX(id), 0), 1 FROM stock_movements
+        """, (end,)).lastrowid
+        c.executemany("""
+            INSERT INTO stock_snapshot_lines(snapshot_id, product_id,
+                                             warehouse_id, qty)
+            VALUES (?,?,?,?)
+        """, [(sid, pid, wid, qty) for pid, wid, qty in closing])
+        c.execute("DROP TABLE temp.arch_ids")
+        # comprobación: al cierre del periodo el libro vivo (con los saldos)
+        # debe dar lo mismo que antes de mover; si no, se revierte todo
+        after = c.execute("""
+            SELECT product_id, warehouse_id, SUM(qty) FROM stock_movements
+             WHERE date <= ?
+          GROUP BY product_id, warehouse_id
+            HAVING SUM(qty) <> 0
+        """, (end,)).fetchall()
+        expected = {(p, w): q for p, w, q in closing}
+        if (len(after) != len(expected)
+                or any(abs(expected.get((p, w), 0) - q) > 1e-9 for p, w, q in after)):
+            raise RuntimeError("Las existencias al cierre no cuadran tras archivar; "
+                               "no se movió nada")
+        return moved
+
+    # ─────────────────────── consulta ───────────────────────
+    @contextmanager
+    def history(
+        self, start: str | None = None, end: str | None = None
+    ) -> Iterator[sqlite3.Connection]:
+        """Adjunta los archivos del rango de meses [start, end] ('AAAA-MM')
+        y expone las vistas temporales `history_stock_movements`,
+        `history_sales`, `history_sale_items` y `history_cash_movements`.
+        """
+        periods = [p for p in self.periods()
+                   if (start is None or p >= start) and (end is None or p <= end)]
+        limit = self.conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(periods) > limit:
+            raise ValueError(
+                f"El rango abarca {len(periods)} archivos y SQLite admite "
+                f"{limit} adjuntos; reduzca el rango de meses")
+        if self.conn.in_transaction:
+            self.conn.commit()
+
+        aliases = []
+        try:
+            for i, period in enumerate(periods):
+                alias = f"hist{i}"
+                self.conn.execute(f"ATTACH DATABASE ? AS {alias}", (self.path(period),))
+                aliases.append(alias)
+                for table in TABLES:
+                    _align_columns(self.conn, alias, table)
+            for table in TABLES:
+                parts = [f"SELECT * FROM main.{table}"]
+                parts += [f"SELECT * FROM {a}.{table}" for a in aliases]
+                body = " UNION ALL ".join(parts)
+                if table == "stock_movements":
+                    body = (f"SELECT * FROM ({body}) "
+                            f"WHERE concept IS NOT '{CARRY_CONCEPT}'")
+                self.conn.execute(f"CREATE TEMP VIEW history_{table} AS {body}")
+            yield self.conn
+        finally:
+            if self.conn.in_transaction:
+                self.conn.commit()
+            for table in TABLES:
+                self.conn.execute(f"DROP VIEW IF EXISTS temp.history_{table}")
+            for alias in aliases:
+                self.conn.execute(f"DETACH DATABASE {alias}")
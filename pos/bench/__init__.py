@@ -0,0 +1,19 @@
+"""
+pos.bench
+---------
+Generador reproducible de bases sintéticas y escenarios cronometrados
+sobre los DAOs, para medir el sistema con volúmenes reales y comparar
+resultados entre versiones.
+
+    python -m pos.bench generate --preset large --seed 1 --db bench.db
+    python -m pos.bench run --db bench.db --out resultados.json
+    python -m pos.bench compare antes.json despues.json
+
+`run` trabaja sobre una copia de la base (los escenarios escriben) y
+emite JSON con latencias por escenario.
+"""
+
+from .generate import PRESETS, generate
+from .scenarios import SCENARIOS, compare, run_all
+
+__all__ = ["PRESETS", "SCENARIOS", "compare", "generate", "run_all"]
@@ -0,0 +1,95 @@
+"""
+Línea de comandos del banco de pruebas:
+
+    python -m pos.bench generate --preset small --seed 1 --db bench.db
+    python -m pos.bench run --db bench.db --iterations 500 --out base.json
+    python -m pos.bench compare base.json nuevo.json --threshold 0.1
+
+`compare` termina con código 1 si algún escenario empeora más del umbral.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from .generate import PRESETS, generate
+from .scenarios import SCENARIOS, compare, run_all
+
+
+def _log(msg: str) -> None:
+    print(msg, file=sys.stderr)
+
+
+def _generate(args: argparse.Namespace) -> int:
+    sizes = generate(args.db, args.preset, args.seed, progress=_log)
+    print(json.dumps({"db": args.db, "preset": args.preset, "seed": args.seed, **sizes}))
+    return 0
+
+
+def _run(args: argparse.Namespace) -> int:
+    report = run_all(args.db, args.iterations, args.seed, args.scenario or None,
+                     progress=_log)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    rows = compare(old, new, args.threshold)
+    for r in rows:
+        flag = "  REGRESIÓN" if r["regression"] else ""
+        print(f"{r['scenario']:<28} {r['old_p50_ms']:>10.3f} → "
+              f"{r['new_p50_ms']:>10.3f} ms  {r['change']:+.1%}{flag}")
+    return 1 if any(r["regression"] for r in rows) else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m pos.bench",
+                                     description="Banco de pruebas del POS")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("generate", help="crea una base sintética reproducible")
+    p.add_argument("--db", required=True, help="archivo nuevo a crear")
+    p.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=_generate)
+
+    p = sub.add_parser("run", help="cronometra los escenarios sobre una copia")
+    p.add_argument("--db", required=True)
+    p.add_argument("--iterations", type=int, default=1000)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                   help="repetible; por omisión todos")
+    p.add_argument("--out", help="archivo JSON (por omisión, salida estándar)")
+    p.set_defaults(func=_run)
+
+    p = sub.add_parser("compare", help="compara dos informes de `run`")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.10,
+                   help="aumento relativo de p50 tolerado (0.10 = 10%%)")
+    p.set_defaults(func=_compare)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, FileExistsError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+pos.bench.generate
+------------------
+Crea una base sintética con el esquema actual (migraciones incluidas) a
+partir de una semilla, de modo que dos corridas con la misma semilla y el
+mismo preset producen exactamente los mismos datos.
+
+Las filas se insertan con `executemany` por lotes y después se derivan las
+tablas materializadas (stock_levels, products.stock, totales de turno y
+agregados de ventas) con los mismos métodos que usa la aplicación.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterator
+
+from ..db import ConnectionFactory
+from ..models.codes import BARCODE_PREFIX, SKU_PREFIX, ean13_check_digit
+from ..models.inventory import InventoryDAO
+from ..models.rollup import RollupDAO
+
+PRESETS: dict[str, dict[str, int]] = {
+    "tiny":   dict(products=500, warehouses=2, clients=200, suppliers=20,
+                   payables=500, movements=10_000, sales=2_000, days=30),
+    "small":  dict(products=5_000, warehouses=3, clients=2_000, suppliers=50,
+                   payables=5_000, movements=200_000, sales=50_000, days=90),
+    "medium": dict(products=20_000, warehouses=5, clients=10_000, suppliers=100,
+                   payables=20_000, movements=1_000_000, sales=200_000, days=180),
+    "large":  dict(products=100_000, warehouses=5, clients=50_000, suppliers=200,
+                   payables=100_000, movements=10_000_000, sales=1_000_000, days=365),
+}
+
+BATCH = 50_000
+
+_NOUNS = ("Arroz", "Frijol", "Aceite", "Azúcar", "Café", "Leche", "Galleta",
+          "Jabón", "Detergente", "Atún", "Pasta", "Harina", "Refresco", "Agua",
+          "Cereal", "Queso", "Yogur", "Salsa", "Papel", "Cloro", "Shampoo",
+          "Comida perro", "Correa", "Pila", "Foco", "Cuaderno", "Lapicero")
+_BRANDS = ("Sol", "Andina", "Tropical", "Del Valle", "Premium", "La Granja",
+           "Económico", "Central", "Norte", "Dorado", "Selecto", "Campestre")
+_SIZES = ("250 g", "500 g", "1 kg", "2 kg", "355 ml", "600 ml", "1 L", "2 L",
+          "pack 6", "pack 12", "unidad", "caja 24")
+_FIRST = ("Ana", "Luis", "María", "José", "Carmen", "Jorge", "Lucía", "Pedro",
+          "Sofía", "Diego", "Elena", "Andrés", "Paula", "Mario", "Valeria")
+_LAST = ("Rodríguez", "Vargas", "Jiménez", "Mora", "Rojas", "Castro", "Solís",
+         "Madrigal", "Chaves", "Alvarado", "Araya", "Herrera", "Quesada")
+
+
+def _batches(rows: Iterator[tuple], size: int = BATCH) -> Iterator[list[tuple]]:
+    batch: list[tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _timeline(rng: random.Random, n: int, start: datetime, days: int) -> Iterator[str]:
+    """`n` fechas crecientes repartidas en `days` días (ids en orden cronológico)."""
+    span = days * 86_400
+    step = span / max(n, 1)
+    for i in range(n):
+        t = start + timedelta(seconds=i * step + rng.random() * step)
+        yield t.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def generate(
+    path: str,
+    preset: str = "small",
+    seed: int = 1,
+    progress: Callable[[str], None] | None = None,
+    **overrides: int,
+) -> dict[str, int]:
+    """Crea la base `path` (no debe existir) y devuelve los tamaños usados."""
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} ya existe")
+    sizes = {**PRESETS[preset], **overrides}
+    rng = random.Random(seed)
+    say = progress or (lambda _msg: None)
+    # generación masiva: sin fsync, la base se descarta si algo falla
+    conn = ConnectionFactory(path, synchronous="off").connect()
+    start = datetime(2024, 1, 1)
+    n_prod, n_wh = sizes["products"], sizes["warehouses"]
+    t0 = time.perf_counter()
+
+    def load(table: str, sql: str, rows: Iterator[tuple]) -> None:
+        count = 0
+        for batch in _batches(rows):
+            with conn:
+                conn.executemany(sql, batch)
+            count += len(batch)
+            say(f"{table}: {count:,}")
+
+    # ── catálogos ───────────────────────────────────────────
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO warehouses(id, name, location) VALUES (?,?,?)",
+            [(w, "Principal" if w == 1 else f"Bodega {w}", f"Zona {w}")
+             for w in range(1, n_wh + 1)],
+        )
+
+    def products() -> Iterator[tuple]:
+        for i in range(1, n_prod + 1):
+            payload = f"{BARCODE_PREFIX}{i:010d}"
+            name = (f"{rng.choice(_NOUNS)} {rng.choice(_BRANDS)} "
+                    f"{rng.choice(_SIZES)} #{i}")
+            yield (i, payload + ean13_check_digit(payload), name,
+                   round(rng.uniform(100, 25_000), 2), rng.choice((0, 0, 0, 13)),
+                   f"{SKU_PREFIX}{i:07d}")
+    load("products",
+         "INSERT INTO products(id, barcode, name, price, iva, sku) VALUES (?,?,?,?,?,?)",
+         products())
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO code_sequences(name, next_value) VALUES (?, ?)",
+            [("barcode", n_prod + 1), ("sku", n_prod + 1)],
+        )
+
+    load("clients",
+         "INSERT INTO clients(id, name, phone, email, credit_limit) VALUES (?,?,?,?,?)",
+         ((i, f"{rng.choice(_FIRST)} {rng.choice(_LAST)} {rng.choice(_LAST)}",
+           f"{rng.randrange(20_000_000, 89_999_999)}", f"cliente{i}@correo.test",
+           rng.choice((0, 0, 50_000, 100_000))) for i in range(1, sizes["clients"] + 1)))
+    load("suppliers",
+         "INSERT INTO suppliers(id, legal_id, name, phone) VALUES (?,?,?,?)",
+         ((i, f"3-101-{rng.randrange(100_000, 999_999)}",
+           f"Distribuidora {rng.choice(_BRANDS)} {i}",
+           f"{rng.randrange(20_000_000, 29_999_999)}")
+          for i in range(1, sizes["suppliers"] + 1)))
+
+    # ── históricos ──────────────────────────────────────────
+    def payables() -> Iterator[tuple]:
+        for date in _timeline(rng, sizes["payables"], start, sizes["days"]):
+            amount = round(rng.uniform(10_000, 2_000_000), 2)
+            paid = rng.choice((0.0, amount, round(amount / 2, 2)))
+            yield (rng.randint(1, sizes["suppliers"]), date,
+                   f"Factura {rng.randrange(1_000_000)}", amount, paid)
+    load("payables",
+         "INSERT INTO payables(supplier_id, date, concept, amount, paid) VALUES (?,?,?,?,?)",
+         payables())
+
+    def movements() -> Iterator[tuple]:
+        # primero existencia inicial en todos los almacenes, luego actividad
+        initial = min(n_prod * n_wh, sizes["movements"] // 4)
+        first = start.strftime("%Y-%m-%d %H:%M:%S")
+        for k in range(initial):
+            yield (first, k % n_prod + 1, k // n_prod % n_wh + 1,
+                   float(rng.randint(200, 1_000)), "Alta inicial")
+        for date in _timeline(rng, sizes["movements"] - initial, start, sizes["days"]):
+            r = rng.random()
+            qty, concept = ((float(rng.randint(10, 100)), "Compra") if r < 0.3
+                            else (-float(rng.randint(1, 5)), "Salida"))
+            yield (date, rng.randint(1, n_prod), rng.randint(1, n_wh), qty, concept)
+    load("stock_movements",
+         "INSERT INTO stock_movements(date, product_id, warehouse_id, qty, concept) "
+         "VALUES (?,?,?,?,?)",
+         movements())
+
+    prices = dict(conn.execute("SELECT id, price FROM products"))
+
+    def sales() -> Iterator[tuple[tuple, list[tuple], tuple]]:
+        for sale_id, date in enumerate(
+                _timeline(rng, sizes["sales"], start, sizes["days"]), start=1):
+            items = []
+            for pid in rng.sample(range(1, n_prod + 1), rng.randint(1, 5)):
+                items.append((sale_id, pid, float(rng.randint(1, 3)), prices[pid]))
+            total = sum(q * p for _, _, q, p in items)
+            credit = rng.random() < 0.1
+            client = rng.randint(1, sizes["clients"]) if credit or rng.random() < 0.3 else None
+            paid = 0.0 if credit else total
+            yield ((sale_id, date, client, total, paid,
+                    "credito" if credit else "contado"),
+                   items,
+                   (date, f"Venta #{sale_id}", paid))
+
+    # turnos diarios: el último queda abierto
+    with conn:
+        conn.execute("DELETE FROM cash_shifts")
+        conn.executemany(
+            "INSERT INTO cash_shifts(id, opened, closed, opening_amount) VALUES (?,?,?,0)",
+            [(d + 1, (start + timedelta(days=d)).strftime("%Y-%m-%d 00:00:00"),
+              None if d == sizes["days"] - 1
+              else (start + timedelta(days=d)).strftime("%Y-%m-%d 23:59:59"))
+             for d in range(sizes["days"])],
+        )
+    count = 0
+    for batch in _batches(sales(), BATCH // 5):
+        with conn:
+            conn.executemany(
+                "INSERT INTO sales(id, date, client_id, total, paid, payment_type, "
+                "shift_id) VALUES (?,?,?,?,?,?, "
+                "CAST(julianday(substr(?, 1, 10)) - julianday(?) AS INTEGER) + 1)",
+                [(*s, s[1], start.strftime("%Y-%m-%d")) for s, _, _ in batch])
+            conn.executemany(
+                "INSERT INTO sale_items(sale_id, product_id, quantity, price) "
+                "VALUES (?,?,?,?)", [i for _, items, _ in batch for i in items])
+            conn.executemany(
+                "INSERT INTO cash_movements(date, concept, amount, shift_id) "
+                "VALUES (?,?,?, CAST(julianday(substr(?, 1, 10)) - julianday(?) AS INTEGER) + 1)",
+                [(d, c, a, d, start.strftime("%Y-%m-%d")) for _, _, (d, c, a) in batch
+                 if a])
+        count += len(batch)
+        say(f"sales: {count:,}")
+
+    # ── derivados ───────────────────────────────────────────
+    say("derivados: stock_levels, existencias, turnos, agregados")
+    InventoryDAO(conn).rebuild_levels()
+    with conn:
+        conn.execute("""
+            UPDATE products SET stock = COALESCE(
+                (SELECT SUM(qty) FROM stock_levels WHERE product_id = products.id), 0)
+        """)
+        conn.execute("""
+            UPDATE cash_shifts SET total = (
+                SELECT COALESCE(SUM(amount), 0) FROM cash_movements
+                 WHERE shift_id = cash_shifts.id)
+        """)
+        conn.execute(
+            "UPDATE clients SET balance = (SELECT COALESCE(SUM(total - paid), 0) "
+            "FROM sales WHERE client_id = clients.id)")
+    RollupDAO(conn).backfill(chunk_size=50_000)
+    conn.execute("ANALYZE")
+    conn.close()
+    say(f"listo en {time.perf_counter() - t0:.1f} s")
+    return sizes
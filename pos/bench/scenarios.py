@@ -0,0 +1,201 @@
+"""
+pos.bench.scenarios
+-------------------
+Escenarios de medición sobre los DAOs.  Cada escenario es una función
+`fn(daos, ctx)` que hace una operación representativa; `run_all` la repite
+sobre una copia de la base (las escrituras no tocan el archivo original) y
+resume las latencias en milisegundos.
+
+Las consultas pesadas (listados completos) se repiten menos veces: el
+factor de `SCENARIOS` multiplica las iteraciones pedidas.
+"""
+
+from __future__ import annotations
+
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from ..db import ConnectionFactory
+from ..models import build_daos
+from ..models.codes import BARCODE_PREFIX, ean13_check_digit
+from .generate import _FIRST
+
+
+@dataclass
+class Context:
+    """Datos de la base que los escenarios necesitan para elegir argumentos."""
+    rng: random.Random
+    products: int
+    warehouses: int
+    words: list[str]
+
+    def product_id(self) -> int:
+        return self.rng.randint(1, self.products)
+
+    def warehouse_id(self) -> int:
+        return self.rng.randint(1, self.warehouses)
+
+    def barcode(self) -> str:
+        payload = f"{BARCODE_PREFIX}{self.product_id():010d}"
+        return payload + ean13_check_digit(payload)
+
+
+def _sale(daos, ctx: Context) -> int:
+    cart = []
+    for pid in ctx.rng.sample(range(1, ctx.products + 1), min(3, ctx.products)):
+        cart.append({"product_id": pid, "qty": 1, "price": 1000.0})
+    return daos.sale.create_sale(client_id=None, cart=cart, paid=3000.0)
+
+
+def _transfer(daos, ctx: Context) -> None:
+    if ctx.warehouses < 2:
+        return
+    src, dst = ctx.rng.sample(range(1, ctx.warehouses + 1), 2)
+    pid = ctx.product_id()
+    if daos.inventory.stock(pid, src) >= 1:
+        daos.inventory.transfer(pid, src, dst, 1)
+
+
+# nombre → (función, factor de iteraciones)
+SCENARIOS: dict[str, tuple[Callable[[Any, Context], Any], float]] = {
+    "product.find_by_code": (lambda d, c: d.product.find_by_code(c.barcode()), 1),
+    "product.get": (lambda d, c: d.product.get(c.product_id()), 1),
+    "product.search_limit": (
+        lambda d, c: d.product.search(c.rng.choice(c.words), limit=20), 1),
+    "product.search": (lambda d, c: d.product.search(c.rng.choice(c.words)), 0.05),
+    "product.page": (lambda d, c: d.product.page(c.rng.choice(c.words)), 0.5),
+    "inventory.stock": (lambda d, c: d.inventory.stock(c.product_id()), 1),
+    "inventory.stock_many": (
+        lambda d, c: d.inventory.stock_many(
+            [c.product_id() for _ in range(50)], c.warehouse_id()), 0.5),
+    "inventory.warehouse_stock": (
+        lambda d, c: d.inventory.warehouse_stock(c.warehouse_id()), 0.02),
+    "inventory.move": (
+        lambda d, c: d.inventory.move(c.product_id(), c.warehouse_id(), 5, "Bench"), 0.5),
+    "inventory.transfer": (_transfer, 0.5),
+    "sale.create_sale": (_sale, 0.5),
+    "cash.add": (lambda d, c: d.cash.add("Bench", 100.0), 0.5),
+    "cash.total_shift": (lambda d, c: d.cash.total_shift(), 1),
+    "client.search": (
+        lambda d, c: d.client.search(c.rng.choice(_FIRST)[:c.rng.randint(1, 4)]), 1),
+    "payable.page": (lambda d, c: d.payable.page(pending_only=True), 0.5),
+    "payable.list": (lambda d, c: d.payable.list(), 0.02),
+    "rollup.sales": (lambda d, c: d.rollup.sales("2024-01-01", "2024-12-31"), 0.1),
+}
+
+
+def _summary(name: str, samples: list[int]) -> dict[str, Any]:
+    ms = sorted(s / 1e6 for s in samples)
+    q = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    return {
+        "scenario": name,
+        "iterations": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "p50_ms": round(q[49], 4),
+        "p95_ms": round(q[94], 4),
+        "p99_ms": round(q[98], 4),
+        "min_ms": round(ms[0], 4),
+        "max_ms": round(ms[-1], 4),
+        "ops_per_sec": round(1000 / statistics.fmean(ms), 1),
+    }
+
+
+def _copy(path: str, directory: str) -> str:
+    """Copia consistente con la API de backup (respeta el WAL)."""
+    target = os.path.join(directory, "bench.db")
+    src = sqlite3.connect(path)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    return target
+
+
+def run_all(
+    path: str,
+    iterations: int = 1000,
+    seed: int = 1,
+    names: Iterable[str] | None = None,
+    warmup: int = 10,
+    progress: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    """Corre los escenarios `names` (todos por omisión) y devuelve el informe."""
+    names = list(names or SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Escenarios desconocidos: {', '.join(unknown)}")
+    say = progress or (lambda _msg: None)
+    workdir = tempfile.mkdtemp(prefix="pos-bench-")
+    try:
+        conn = ConnectionFactory(_copy(path, workdir)).connect()
+        daos = build_daos(conn)
+        (products,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM products").fetchone()
+        (warehouses,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM warehouses").fetchone()
+        if not products:
+            raise ValueError("La base no tiene productos; use `generate` primero")
+        words = sorted({w for (name,) in conn.execute(
+            "SELECT name FROM products LIMIT 500") for w in name.split() if len(w) >= 3})
+        ctx = Context(random.Random(seed), products, warehouses, words)
+
+        results = []
+        for name in names:
+            fn, factor = SCENARIOS[name]
+            n = max(1, int(iterations * factor))
+            for _ in range(min(warmup, n)):
+                fn(daos, ctx)
+            samples = []
+            clock = time.perf_counter_ns
+            for _ in range(n):
+                t0 = clock()
+                fn(daos, ctx)
+                samples.append(clock() - t0)
+            results.append(_summary(name, samples))
+            say(f"{name}: p50 {results[-1]['p50_ms']} ms")
+        settings = {k: v for k, v in ConnectionFactory(path).settings(conn).items()
+                    if k not in ("path", "pool_open", "pool_idle", "pool_size")}
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "meta": {
+            "db": os.path.abspath(path),
+            "products": products,
+            "warehouses": warehouses,
+            "iterations": iterations,
+            "seed": seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **settings,
+        },
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict, threshold: float = 0.10) -> list[dict[str, Any]]:
+    """Compara p50 escenario por escenario; `regression` si sube más de `threshold`."""
+    before = {r["scenario"]: r for r in old["results"]}
+    rows = []
+    for r in new["results"]:
+        prev = before.get(r["scenario"])
+        if prev is None:
+            continue
+        ratio = r["p50_ms"] / prev["p50_ms"] if prev["p50_ms"] else float("inf")
+        rows.append({
+            "scenario": r["scenario"],
+            "old_p50_ms": prev["p50_ms"],
+            "new_p50_ms": r["p50_ms"],
+            "change": round(ratio - 1, 4),
+            "regression": ratio - 1 > threshold,
+        })
+    return rows
@@ -0,0 +1,259 @@
+"""
+pos.cli
+-------
+Comandos de mantenimiento que se ejecutan sin abrir la interfaz Tk:
+
+    python -m pos.cli stock-rebuild     # recalcula stock_levels
+    python -m pos.cli stock-verify      # compara stock_levels con el histórico
+    python -m pos.cli db-info           # PRAGMA y pool de conexiones en uso
+    python -m pos.cli rollup-backfill   # reconstruye los agregados de ventas
+    python -m pos.cli import-products catalogo.csv
+    python -m pos.cli export movements --from 2025-01-01 --out mov.csv
+    python -m pos.cli stock-snapshot --every 24   # para cron / tarea programada
+    python -m pos.cli archive --before 2025-01    # mueve meses cerrados a archive/
+    python -m pos.cli sync-config --terminal caja1 --central central.db
+    python -m pos.cli sync --watch 30             # envía el diario a la central
+    python -m pos.cli z-report 42 --summary-only  # reimprime el corte del turno 42
+
+Con `--profile informe.json` cualquier comando guarda al terminar las
+estadísticas de SQL y las consultas lentas (ver `pos.instrument`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from . import export, zreport
+from .archive import LedgerArchive
+from .db import get_connection, get_factory
+from .instrument import Profiler
+from .models.inventory import InventoryDAO
+from .models.outbox import OutboxDAO
+from .models.shift_report import ShiftReportDAO
+from .models.product import ProductDAO
+from .models.rollup import RollupDAO
+from .sync import CentralStore, sync_once
+
+
+def _stock_rebuild(args: argparse.Namespace) -> int:
+    n = InventoryDAO(get_connection(args.db)).rebuild_levels()
+    print(f"stock_levels reconstruida: {n} registros")
+    return 0
+
+
+def _stock_verify(args: argparse.Namespace) -> int:
+    diffs = InventoryDAO(get_connection(args.db)).verify_levels()
+    for pid, wid, level, ledger in diffs:
+        print(f"producto {pid} almacén {wid}: tabla={level:g} histórico={ledger:g}")
+    if diffs:
+        print(f"{len(diffs)} diferencias; ejecute «stock-rebuild» para corregir")
+        return 1
+    print("stock_levels coincide con el histórico")
+    return 0
+
+
+def _stock_snapshot(args: argparse.Namespace) -> int:
+    sid = InventoryDAO(get_connection(args.db)).checkpoint(args.every)
+    if sid is None:
+        print(f"hay una fotografía de menos de {args.every:g} h; nada que hacer")
+    else:
+        print(f"fotografía de existencias #{sid} guardada")
+    return 0
+
+
+def _archive(args: argparse.Namespace) -> int:
+    conn = get_connection(args.db)
+    archive = LedgerArchive(conn, args.dir)
+    periods = archive.pending_periods(args.before)
+    for period in periods:
+        moved = archive.archive_month(period)
+        detail = ", ".join(f"{t}={n}" for t, n in moved.items())
+        print(f"{period} → {archive.path(period)}  ({detail})")
+    if not periods:
+        print(f"no hay datos vivos anteriores a {args.before}")
+    elif args.vacuum:
+        conn.execute("VACUUM")
+        print("base compactada")
+    return 0
+
+
+def _db_info(args: argparse.Namespace) -> int:
+    for name, value in get_factory(args.db).settings().items():
+        print(f"{name:<15} {value}")
+    return 0
+
+
+def _rollup_backfill(args: argparse.Namespace) -> int:
+    def progress(done: int, total: int) -> None:
+        print(f"\r{done}/{total} ventas", end="", flush=True)
+
+    n = RollupDAO(get_connection(args.db)).backfill(args.chunk, progress)
+    print(f"\nagregados reconstruidos con {n} ventas")
+    return 0
+
+
+def _import_products(args: argparse.Namespace) -> int:
+    def progress(rows: int, rate: float) -> None:
+        print(f"\r{rows} productos ({rate:,.0f} filas/s)", end="", flush=True)
+
+    report = ProductDAO(get_connection(args.db)).import_csv(
+        args.file, batch_size=args.batch, warehouse_id=args.warehouse,
+        progress=progress,
+    )
+    print(f"\nimportados: {report['inserted']} en {report['seconds']:.1f} s "
+          f"({report['rows_per_sec']:,.0f} filas/s)")
+    for line, reason in report["rejected"]:
+        print(f"  línea {line}: {reason}")
+    return 1 if report["rejected"] else 0
+
+
+def _export(args: argparse.Namespace) -> int:
+    conn = get_connection(args.db)
+    if args.out == "-":
+        n = export.export(conn, args.kind, sys.stdout, args.format,
+                          args.start, args.end, args.warehouse)
+    else:
+        # buffer amplio: la salida se escribe en bloques, no fila por fila
+        with open(args.out, "w", newline="", encoding="utf-8",
+                  buffering=1 << 16) as out:
+            n = export.export(conn, args.kind, out, args.format,
+                              args.start, args.end, args.warehouse)
+    print(f"{n} filas exportadas", file=sys.stderr)
+    return 0
+
+
+def _sync_config(args: argparse.Namespace) -> int:
+    outbox = OutboxDAO(get_connection(args.db))
+    outbox.configure(terminal_id=args.terminal, central=args.central)
+    state = outbox.state()
+    for name in state.keys():
+        print(f"{name:<12} {state[name] if state[name] is not None else '-'}")
+    print(f"{'pendientes':<12} {outbox.pending_count()}")
+    return 0
+
+
+def _sync(args: argparse.Namespace) -> int:
+    outbox = OutboxDAO(get_connection(args.db))
+    path = args.central or outbox.state()["central"]
+    if not path:
+        raise ValueError("no hay central configurada (use sync-config --central)")
+    central = CentralStore(path)
+    try:
+        while True:
+            t0 = time.perf_counter()
+            n = sync_once(outbox, central.receive, args.batch)
+            print(f"{n} eventos enviados a {path} "
+                  f"en {time.perf_counter() - t0:.2f} s", file=sys.stderr)
+            if not args.watch:
+                return 0
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        central.close()
+
+
+def _z_report(args: argparse.Namespace) -> int:
+    reports = ShiftReportDAO(get_connection(args.db))
+    sid = args.shift or reports.last_shift_id()
+    if sid is None:
+        raise ValueError("no hay turnos cerrados")
+    # el original se imprime al cerrar (Caja / API); aquí todo turno cerrado
+    # sale marcado como reimpresión
+    reprint = zreport.summary_for(reports, sid)["closed"] is not None
+    if args.out == "-":
+        zreport.write_report(reports, sid, sys.stdout,
+                             details=not args.summary_only, reprint=reprint)
+    else:
+        path = zreport.save_report(reports, sid, args.out,
+                                   details=not args.summary_only, reprint=reprint)
+        print(path, file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m pos.cli")
+    parser.add_argument("--db", help="ruta de la base SQLite (por defecto pos.db)")
+    parser.add_argument("--profile", metavar="ARCHIVO",
+                        help="guarda en JSON la medición de SQL del comando")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser(
+        "stock-rebuild", help="recalcula stock_levels desde stock_movements"
+    ).set_defaults(func=_stock_rebuild)
+    sub.add_parser(
+        "stock-verify", help="verifica stock_levels contra stock_movements"
+    ).set_defaults(func=_stock_verify)
+    p = sub.add_parser(
+        "stock-snapshot", help="guarda una fotografía de existencias por almacén"
+    )
+    p.add_argument("--every", type=float, metavar="HORAS",
+                   help="solo si la última fotografía es más antigua que esto")
+    p.set_defaults(func=_stock_snapshot)
+    p = sub.add_parser("archive", help="archiva los meses cerrados en archivos aparte")
+    p.add_argument("--before", required=True, metavar="AAAA-MM",
+                   help="archiva todos los meses anteriores a este")
+    p.add_argument("--dir", help="carpeta de archivos (por defecto archive/ junto a la base)")
+    p.add_argument("--vacuum", action="store_true",
+                   help="compacta la base viva al terminar")
+    p.set_defaults(func=_archive)
+    sub.add_parser(
+        "db-info", help="muestra la configuración efectiva de SQLite"
+    ).set_defaults(func=_db_info)
+    p = sub.add_parser(
+        "rollup-backfill", help="reconstruye los agregados diarios/horarios de ventas"
+    )
+    p.add_argument("--chunk", type=int, default=5000, help="ventas por transacción")
+    p.set_defaults(func=_rollup_backfill)
+    p = sub.add_parser("import-products", help="importa un catálogo de productos CSV")
+    p.add_argument("file", help="CSV con cabecera barcode,name,...,sku,stock")
+    p.add_argument("--batch", type=int, default=1000, help="filas por transacción")
+    p.add_argument("--warehouse", type=int, default=1,
+                   help="almacén para la existencia inicial")
+    p.set_defaults(func=_import_products)
+    p = sub.add_parser("export", help="exporta el histórico de inventario o ventas")
+    p.add_argument("kind", choices=export.KINDS)
+    p.add_argument("--from", dest="start", help="fecha inicial AAAA-MM-DD")
+    p.add_argument("--to", dest="end", help="fecha final AAAA-MM-DD (inclusive)")
+    p.add_argument("--warehouse", type=int, help="solo este almacén (movements)")
+    p.add_argument("--format", choices=export.FORMATS, default="csv")
+    p.add_argument("--out", default="-", help="archivo destino (- = salida estándar)")
+    p.set_defaults(func=_export)
+    p = sub.add_parser("sync-config", help="identidad de la terminal y central de sincronización")
+    p.add_argument("--terminal", help="identificador de esta terminal")
+    p.add_argument("--central", help="base central ('' para dejar de sincronizar)")
+    p.set_defaults(func=_sync_config)
+    p = sub.add_parser("sync", help="envía a la central las ventas y movimientos pendientes")
+    p.add_argument("--central", help="base central (por defecto la configurada)")
+    p.add_argument("--batch", type=int, default=500, help="eventos por lote")
+    p.add_argument("--watch", type=float, metavar="SEGUNDOS",
+                   help="repite el envío cada tantos segundos")
+    p.set_defaults(func=_sync)
+    p = sub.add_parser("z-report", help="imprime el corte Z de un turno cerrado")
+    p.add_argument("shift", type=int, nargs="?", help="turno (por defecto el último cerrado)")
+    p.add_argument("--summary-only", action="store_true", help="sin el detalle de movimientos")
+    p.add_argument("--out", default="-", help="carpeta destino (- = salida estándar)")
+    p.set_defaults(func=_z_report)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    profiler = None
+    if args.profile:
+        profiler = Profiler()
+        get_factory(args.db, profiler=profiler)
+    try:
+        return args.func(args)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        if profiler is not None:
+            profiler.dump(args.profile)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,143 +1,176 @@
+"""
+pos.db
+------
+Apertura de la base SQLite.  `ConnectionFactory` entrega una conexión por
+hilo tomada de un pool pequeño, configurada con WAL y los PRAGMA de
+rendimiento de `DEFAULT_PRAGMAS`, y aplica las migraciones pendientes una
+sola vez.  `get_connection()` sigue siendo el punto de entrada habitual.
+
+Con `profiler=` (ver `pos.instrument`) las conexiones se abren medidas.
+"""
+
+from __future__ import annotations
+
+import os
 import sqlite3
-from pathlib import Path
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from .instrument import Profiler, TimedConnection
+from .migrations import migrate
 
 DB_NAME = "pos.db"
 
-def get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    _create_tables(conn)
-    return conn
-
-def _create_tables(conn: sqlite3.Connection) -> None:
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS products (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            barcode     TEXT UNIQUE,
-            name        TEXT NOT NULL,
-            description TEXT,
-            unit        TEXT DEFAULT 'pz',
-            price       REAL NOT NULL DEFAULT 0,
-            discount    REAL NOT NULL DEFAULT 0,
-            iva         REAL NOT NULL DEFAULT 0,
-            sku         TEXT,
-            stock       INTEGER NOT NULL DEFAULT 0
-        )
-    """)
-
-    # Tabla clientes y placeholders de otras …
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS clients (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            phone TEXT,
-            email TEXT,
-            address TEXT,
-            credit_limit REAL DEFAULT 0,
-            balance REAL DEFAULT 0
-        )
-    """)
-
-    # Placeholder ventas / items (vacías aún)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS sales (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT NOT NULL,
-            client_id INTEGER,
-            total REAL NOT NULL,
-            discount REAL DEFAULT 0,
-            paid REAL DEFAULT 0,
-            payment_type TEXT,
-            FOREIGN KEY(client_id) REFERENCES clients(id)
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS sale_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sale_id INTEGER NOT NULL,
-            product_id INTEGER NOT NULL,
-            quantity REAL NOT NULL,
-            price REAL NOT NULL,
-            discount REAL DEFAULT 0,
-            iva REAL DEFAULT 0,
-            FOREIGN KEY(sale_id) REFERENCES sales(id),
-            FOREIGN KEY(product_id) REFERENCES products(id)
-        )
-    """)
-    
-    # Movimientos de caja
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS cash_movements (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT NOT NULL,
-            concept TEXT NOT NULL,
-            amount REAL NOT NULL      -- positivo = entrada, negativo = salida
-        )
-    """)
-
-    # Almacenes (1 = almacén principal por defecto)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS warehouses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            location TEXT
-        )
-    """)
-    cur.execute("INSERT OR IGNORE INTO warehouses(id, name) VALUES (1,'Principal')")
-
-    # Movimientos de inventario
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS stock_movements (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT NOT NULL,
-            product_id INTEGER NOT NULL,
-            warehouse_id INTEGER NOT NULL,
-            qty REAL NOT NULL,
-            concept TEXT,
-            FOREIGN KEY(product_id) REFERENCES products(id),
-            FOREIGN KEY(warehouse_id) REFERENCES warehouses(id)
-        )
-    """)
-
-    # Proveedores
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS suppliers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            legal_id TEXT,
-            name TEXT NOT NULL,
-            phone TEXT,
-            email TEXT,
-            bank_info TEXT
-        )
-    """)
-
-    # Cuentas por pagar a proveedores
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS payables (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            supplier_id INTEGER NOT NULL,
-            date TEXT NOT NULL,
-            concept TEXT NOT NULL,
-            amount REAL NOT NULL,
-            paid REAL DEFAULT 0,
-            FOREIGN KEY(supplier_id) REFERENCES suppliers(id)
-        )
-    """)
-
-    # al final de _create_tables() en db.py
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS cash_shifts(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            opened  TEXT NOT NULL,
-            closed  TEXT,
-            opening_amount REAL NOT NULL
-        )
-    """)
-    cur.execute("INSERT OR IGNORE INTO cash_shifts(id, opened, opening_amount) "
-                "VALUES (1, datetime('now','localtime'), 0)")
-
-
-    conn.commit()
+# WAL: los lectores no bloquean al escritor; con WAL, synchronous=NORMAL
+# no arriesga la integridad y evita un fsync por cada commit.
+DEFAULT_PRAGMAS: dict[str, object] = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 5000,           # ms esperando un bloqueo antes de fallar
+    "cache_size": -32000,           # negativo = KiB (≈ 32 MB por conexión)
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "memory",
+}
+
+_SYNCHRONOUS = {0: "off", 1: "normal", 2: "full", 3: "extra"}
+_TEMP_STORE = {0: "default", 1: "file", 2: "memory"}
+
+
+class ConnectionFactory:
+    """Pool de conexiones configuradas, una por hilo.
+
+    `get()` devuelve la conexión ya asignada al hilo actual o le asigna una
+    (libre o nueva); si el pool está lleno espera a que otro hilo libere la
+    suya con `release()`.  `connection()` combina ambos para usos puntuales.
+    """
+
+    def __init__(self, path: str | None = None, pool_size: int = 4,
+                 profiler: Profiler | None = None, **pragmas: object) -> None:
+        self.path = path or DB_NAME
+        self.pool_size = pool_size
+        self.profiler = profiler
+        self.pragmas = {**DEFAULT_PRAGMAS, **pragmas}
+        self._local = threading.local()
+        self._idle: list[sqlite3.Connection] = []
+        self._opened = 0
+        self._migrated = False
+        self._cond = threading.Condition()
+
+    # ───────────────────────── pool ─────────────────────────
+    def connect(self) -> sqlite3.Connection:
+        """Abre una conexión nueva (fuera del pool) ya configurada."""
+        # sin check_same_thread: una conexión liberada puede pasar a otro hilo
+        if self.profiler is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+        else:
+            conn = self.profiler.attach(sqlite3.connect(
+                self.path, check_same_thread=False, factory=TimedConnection))
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            if value is not None:
+                conn.execute(f"PRAGMA {name} = {value}")
+        if not self._migrated:
+            migrate(conn)
+            self._migrated = True
+        return conn
+
+    def get(self) -> sqlite3.Connection:
+        """Conexión del hilo actual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        with self._cond:
+            while not self._idle and self._opened >= self.pool_size:
+                self._cond.wait()
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                self._opened += 1
+        if conn is None:
+            try:
+                conn = self.connect()
+            except BaseException:
+                with self._cond:
+                    self._opened -= 1
+                    self._cond.notify()
+                raise
+        self._local.conn = conn
+        return conn
+
+    def release(self) -> None:
+        """Devuelve al pool la conexión del hilo actual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """`with factory.connection() as conn:` para trabajos de un hilo auxiliar."""
+        held = getattr(self._local, "conn", None) is not None
+        conn = self.get()
+        try:
+            yield conn
+        finally:
+            if not held:
+                self.release()
+
+    def close_idle(self) -> None:
+        """Cierra las conexiones libres (las asignadas siguen abiertas)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
+
+    # ─────────────────────── diagnóstico ────────────────────
+    def settings(self, conn: sqlite3.Connection | None = None) -> dict[str, object]:
+        """PRAGMA efectivos en la conexión indicada (o la del hilo actual)."""
+        conn = conn or self.get()
+
+        def pragma(name: str):
+            return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+        with self._cond:
+            opened, idle = self._opened, len(self._idle)
+        return {
+            "path": os.path.abspath(self.path),
+            "sqlite_version": sqlite3.sqlite_version,
+            "journal_mode": pragma("journal_mode"),
+            "synchronous": _SYNCHRONOUS.get(pragma("synchronous")),
+            "busy_timeout": pragma("busy_timeout"),
+            "cache_size": pragma("cache_size"),
+            "mmap_size": pragma("mmap_size"),
+            "temp_store": _TEMP_STORE.get(pragma("temp_store")),
+            "user_version": pragma("user_version"),
+            "pool_size": self.pool_size,
+            "pool_open": opened,
+            "pool_idle": idle,
+            "profiling": self.profiler is not None and self.profiler.enabled,
+        }
+
+
+_factories: dict[str, ConnectionFactory] = {}
+_factories_lock = threading.Lock()
+
+
+def get_factory(path: str | None = None, **options) -> ConnectionFactory:
+    """Factory compartida para `path`; `options` solo aplica al crearla."""
+    key = os.path.abspath(path or DB_NAME)
+    with _factories_lock:
+        factory = _factories.get(key)
+        if factory is None:
+            factory = _factories[key] = ConnectionFactory(path, **options)
+        return factory
+
+
+def get_connection(path: str | None = None) -> sqlite3.Connection:
+    """Conexión del hilo actual a `path` (por defecto `DB_NAME`)."""
+    return get_factory(path).get()
@@ -0,0 +1,67 @@
+"""
+pos.events
+----------
+Avisos de cambios en la base.  Los DAOs publican en un `ChangeBus`, después
+del COMMIT, qué tabla cambió y qué filas (ids); quien muestre esos datos se
+suscribe y actualiza solo esas filas en lugar de recargar todo.
+
+    bus = ChangeBus()
+    daos = build_daos(conn, events=bus)
+    bus.subscribe(lambda ch: print(ch.table, ch.ids), "clients")
+    daos.client.add(name="Ana")          # → clients (7,) insert
+
+`ids` vacío significa «cambió toda la tabla» (importaciones, reconstrucción
+de existencias); el suscriptor debe recargar.  Los suscriptores se llaman en
+el hilo que hizo la escritura: la interfaz Tk los recibe a través de
+`pos.ui.change_feed.TkChangeFeed`.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import traceback
+from typing import Callable, Iterable, NamedTuple
+
+
+class Change(NamedTuple):
+    table: str
+    ids: tuple[int, ...]          # vacío = toda la tabla
+    op: str                       # 'insert' | 'update' | 'delete' | 'reload'
+
+
+class ChangeBus:
+    """Publicación/suscripción de cambios por tabla, segura entre hilos."""
+
+    def __init__(self) -> None:
+        self._subs: list[tuple[frozenset[str] | None, Callable[[Change], None]]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[Change], None],
+                  *tables: str) -> Callable[[], None]:
+        """Llama `callback(change)` por cada cambio en `tables` (o en todas).
+
+        Devuelve la función que cancela la suscripción.
+        """
+        entry = (frozenset(tables) or None, callback)
+        with self._lock:
+            self._subs.append(entry)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if entry in self._subs:
+                    self._subs.remove(entry)
+        return unsubscribe
+
+    def publish(self, table: str, ids: Iterable[int] = (), op: str = "update") -> None:
+        change = Change(table, tuple(ids), op if ids else "reload")
+        with self._lock:
+            subs = list(self._subs)
+        for tables, callback in subs:
+            if tables is None or table in tables:
+                try:
+                    callback(change)
+                except Exception:
+                    # el cambio ya está confirmado: un suscriptor roto no
+                    # debe hacer fallar la operación que lo publicó
+                    traceback.print_exc(file=sys.stderr)
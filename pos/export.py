@@ -0,0 +1,103 @@
+"""
+pos.export
+----------
+Exportación en streaming de los históricos (inventario y ventas) a CSV o
+JSON Lines.  Las filas salen de generadores de los DAOs que leen con
+`fetchmany`, así que la memoria usada no depende del tamaño del periodo.
+Los meses archivados (ver `pos.archive`) se leen de sus archivos.
+
+    python -m pos.cli export movements --from 2025-01-01 --to 2025-03-31 \\
+        --warehouse 2 --format csv --out movimientos.csv
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import sqlite3
+from typing import Iterable, Iterator, TextIO
+
+from .archive import LedgerArchive
+from .models.inventory import InventoryDAO
+from .models.sale import SaleDAO
+
+FORMATS = ("csv", "jsonl")
+KINDS = ("movements", "sales")
+
+
+def write_csv(rows: Iterable[sqlite3.Row], out: TextIO) -> int:
+    """Escribe las filas con cabecera (tomada de la primera fila)."""
+    writer = None
+    n = 0
+    for row in rows:
+        if writer is None:
+            writer = csv.writer(out)
+            writer.writerow(row.keys())
+        writer.writerow(tuple(row))
+        n += 1
+    return n
+
+
+def write_jsonl(rows: Iterable[sqlite3.Row], out: TextIO) -> int:
+    """Un objeto JSON por línea."""
+    n = 0
+    for row in rows:
+        out.write(json.dumps(dict(row), ensure_ascii=False))
+        out.write("\n")
+        n += 1
+    return n
+
+
+def iter_rows(
+    conn: sqlite3.Connection,
+    kind: str,
+    start: str | None = None,
+    end: str | None = None,
+    warehouse_id: int | None = None,
+    chunk_size: int = 1000,
+) -> Iterator[sqlite3.Row]:
+    """Generador de filas del histórico `kind` ('movements' o 'sales').
+
+    Si el rango toca meses archivados, lee a través de
+    `LedgerArchive.history()` (solo adjunta los archivos de ese rango).
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Histórico desconocido: {kind}")
+    if kind == "sales" and warehouse_id is not None:
+        raise ValueError("Las ventas no se registran por almacén")
+    archive = LedgerArchive(conn)
+    first, last = (start or "")[:7] or None, (end or "")[:7] or None
+    if any((first is None or p >= first) and (last is None or p <= last)
+           for p in archive.periods()):
+        with archive.history(first, last):
+            yield from _rows(conn, kind, start, end, warehouse_id, chunk_size, True)
+    else:
+        yield from _rows(conn, kind, start, end, warehouse_id, chunk_size, False)
+
+
+def _rows(conn, kind, start, end, warehouse_id, chunk_size, history):
+    if kind == "movements":
+        return InventoryDAO(conn).iter_movements(
+            start, end, warehouse_id=warehouse_id, chunk_size=chunk_size,
+            history=history)
+    return SaleDAO(conn).iter_items(start, end, chunk_size=chunk_size,
+                                    history=history)
+
+
+def export(
+    conn: sqlite3.Connection,
+    kind: str,
+    out: TextIO,
+    fmt: str = "csv",
+    start: str | None = None,
+    end: str | None = None,
+    warehouse_id: int | None = None,
+    chunk_size: int = 1000,
+) -> int:
+    """Exporta el histórico `kind` a `out`; devuelve las filas escritas."""
+    rows = iter_rows(conn, kind, start, end, warehouse_id, chunk_size)
+    if fmt == "csv":
+        return write_csv(rows, out)
+    if fmt == "jsonl":
+        return write_jsonl(rows, out)
+    raise ValueError(f"Formato desconocido: {fmt}")
@@ -0,0 +1,304 @@
+"""
+pos.instrument
+--------------
+Medición de SQL y de DAOs para diagnosticar terminales lentas.
+
+Con `ConnectionFactory(profiler=Profiler())` cada conexión del pool se abre
+como `TimedConnection`:
+
+* sus cursores cronometran cada `execute`/`executemany` por sentencia
+  (texto normalizado: espacios colapsados y listas `IN (?, ?, …)` unidas);
+* `set_trace_callback` cuenta todo lo que SQLite realmente ejecuta
+  (BEGIN/COMMIT implícitos y sentencias de triggers incluidas) y lo
+  atribuye al método DAO en curso;
+* `build_daos()` envuelve los métodos públicos de cada DAO para medir
+  llamadas y latencia por método.
+
+Las sentencias que superan `slow_ms` se guardan en un registro circular
+junto con sus parámetros y su `EXPLAIN QUERY PLAN`.  `report()` devuelve
+todo como diccionario y `dump(path)` lo escribe en JSON.
+
+El tiempo de una sentencia es el de `execute` (preparar y primer paso);
+la lectura posterior con `fetch*` y los COMMIT de `with conn:` quedan
+dentro del tiempo del método DAO que los hace.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Iterable
+
+# límites superiores de cada cubeta del histograma, en ms (la última es ∞)
+HISTOGRAM_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+_SPACES = re.compile(r"\s+")
+_PLACEHOLDERS = re.compile(r"\?(?:\s*,\s*\?)+")
+# el trazado entrega el SQL con los valores ya sustituidos
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+
+def normalize(sql: str) -> str:
+    """Texto canónico de una sentencia para agrupar estadísticas."""
+    sql = _SPACES.sub(" ", sql).strip()
+    return _PLACEHOLDERS.sub("?, …", sql)
+
+
+class Stat:
+    """Contador, tiempo total/máximo e histograma de una métrica."""
+
+    __slots__ = ("count", "total_ns", "max_ns", "buckets", "statements")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * (len(HISTOGRAM_MS) + 1)
+        self.statements = 0          # sentencias trazadas (solo métodos)
+
+    def add(self, ns: int) -> None:
+        self.count += 1
+        self.total_ns += ns
+        self.max_ns = max(self.max_ns, ns)
+        ms = ns / 1e6
+        for i, limit in enumerate(HISTOGRAM_MS):
+            if ms <= limit:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        labels = [f"<={b:g}ms" for b in HISTOGRAM_MS] + [f">{HISTOGRAM_MS[-1]:g}ms"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "mean_ms": round(self.total_ns / 1e6 / self.count, 4) if self.count else 0.0,
+            "max_ms": round(self.max_ns / 1e6, 3),
+            "histogram": {k: n for k, n in zip(labels, self.buckets) if n},
+        }
+
+
+class Profiler:
+    """Estadísticas compartidas por todas las conexiones y DAOs medidos."""
+
+    def __init__(self, slow_ms: float = 50.0, slow_log_size: int = 200) -> None:
+        self.slow_ms = slow_ms
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._local = threading.local()          # pila de métodos en curso
+        self._slow: deque[dict[str, Any]] = deque(maxlen=slow_log_size)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.strftime("%Y-%m-%d %H:%M:%S")
+            self._statements: dict[str, Stat] = {}
+            self._methods: dict[str, Stat] = {}
+            self._traced: dict[str, int] = {}
+            self._plans: dict[str, list[str]] = {}
+            self._slow.clear()
+
+    # ─────────────────────── conexiones ─────────────────────
+    def attach(self, conn: TimedConnection) -> TimedConnection:
+        conn.profiler = self
+        conn.set_trace_callback(self._trace)
+        return conn
+
+    def _current(self) -> str | None:
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else None
+
+    def _trace(self, sql: str) -> None:
+        if not self.enabled:
+            return
+        key = normalize(_LITERALS.sub("?", sql))
+        method = self._current()
+        with self._lock:
+            self._traced[key] = self._traced.get(key, 0) + 1
+            if method is not None:
+                self._methods.setdefault(method, Stat()).statements += 1
+
+    def record(self, conn: sqlite3.Connection, sql: str, params: Any, ns: int) -> None:
+        """Registra una ejecución de `sql` que tardó `ns` nanosegundos."""
+        if not self.enabled:
+            return
+        key = normalize(sql)
+        with self._lock:
+            self._statements.setdefault(key, Stat()).add(ns)
+        ms = ns / 1e6
+        if ms >= self.slow_ms:
+            entry = {
+                "when": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "ms": round(ms, 3),
+                "sql": key,
+                "params": repr(params)[:200],
+                "method": self._current(),
+                "thread": threading.current_thread().name,
+                "plan": self._plan(conn, key, sql, params),
+            }
+            with self._lock:
+                self._slow.append(entry)
+
+    def _plan(self, conn, key: str, sql: str, params: Any) -> list[str]:
+        """EXPLAIN QUERY PLAN de la sentencia (uno por texto normalizado)."""
+        with self._lock:
+            cached = self._plans.get(key)
+        if cached is not None:
+            return cached
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return []
+        try:
+            # cursor base: la consulta del plan no se mide a sí misma
+            rows = sqlite3.Cursor(conn).execute(
+                "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        except (sqlite3.Error, ValueError):
+            return []
+        depth = {0: -1}
+        plan = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            plan.append("  " * depth[node] + detail)
+        with self._lock:
+            self._plans[key] = plan
+        return plan
+
+    # ───────────────────────── DAOs ─────────────────────────
+    def wrap(self, dao: Any) -> Any:
+        """Sustituye en la instancia los métodos públicos por versiones medidas."""
+        if getattr(dao, "_profiled", False):
+            return dao
+        owner = type(dao).__name__
+        for name, func in inspect.getmembers(type(dao), inspect.isfunction):
+            if name.startswith("_"):
+                continue
+            bound = getattr(dao, name)
+            if inspect.isgeneratorfunction(func):
+                timed = self._timed_generator(f"{owner}.{name}", bound)
+            else:
+                timed = self._timed(f"{owner}.{name}", bound)
+            setattr(dao, name, timed)
+        dao._profiled = True
+        return dao
+
+    def _enter(self, name: str) -> None:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(name)
+
+    def _exit(self, name: str, ns: int) -> None:
+        self._local.stack.pop()
+        with self._lock:
+            self._methods.setdefault(name, Stat()).add(ns)
+
+    def _timed(self, name: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            self._enter(name)
+            t0 = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._exit(name, time.perf_counter_ns() - t0)
+        return wrapper
+
+    def _timed_generator(self, name: str, fn: Callable) -> Callable:
+        # se mide el recorrido completo, no la creación del generador
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                yield from fn(*args, **kwargs)
+                return
+            elapsed = 0
+            it = fn(*args, **kwargs)
+            try:
+                while True:
+                    self._enter(name)
+                    t0 = time.perf_counter_ns()
+                    try:
+                        item = next(it)
+                    except StopIteration:
+                        return
+                    finally:
+                        elapsed += time.perf_counter_ns() - t0
+                        self._local.stack.pop()
+                    yield item
+            finally:
+                with self._lock:
+                    self._methods.setdefault(name, Stat()).add(elapsed)
+        return wrapper
+
+    # ─────────────────────── informe ────────────────────────
+    def report(self) -> dict[str, Any]:
+        with self._lock:
+            methods = [{"method": k, "statements": s.statements, **s.as_dict()}
+                       for k, s in self._methods.items() if s.count]
+            statements = [{"sql": k, **s.as_dict()} for k, s in self._statements.items()]
+            traced = [{"sql": k, "count": n} for k, n in self._traced.items()]
+            slow = list(self._slow)
+        methods.sort(key=lambda r: r["total_ms"], reverse=True)
+        statements.sort(key=lambda r: r["total_ms"], reverse=True)
+        traced.sort(key=lambda r: r["count"], reverse=True)
+        return {
+            "started": self.started,
+            "generated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "slow_ms": self.slow_ms,
+            "methods": methods,
+            "statements": statements,
+            "traced": traced,
+            "slow": slow,
+        }
+
+    def dump(self, path: str, **extra: Any) -> None:
+        """Escribe `report()` (más las secciones de `extra`) en JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**self.report(), **extra}, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor que informa la duración de cada ejecución al `Profiler`."""
+
+    def execute(self, sql: str, parameters: Any = ()) -> TimedCursor:
+        t0 = time.perf_counter_ns()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.profiler.record(
+                self.connection, sql, parameters, time.perf_counter_ns() - t0)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable) -> TimedCursor:
+        # el plan se toma con la primera fila solo si es una lista reutilizable
+        first = seq_of_parameters[0] if isinstance(seq_of_parameters, list) \
+            and seq_of_parameters else ()
+        t0 = time.perf_counter_ns()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.profiler.record(
+                self.connection, sql, first, time.perf_counter_ns() - t0)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Conexión cuyos atajos `execute*` pasan por `TimedCursor`."""
+
+    profiler: Profiler
+
+    def cursor(self, factory: type = TimedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,520 @@
+"""
+pos.migrations
+--------------
+Esquema versionado de la base.  Cada migración se aplica una sola vez, en
+orden, dentro de su propia transacción; el número de la última aplicada
+se guarda en `PRAGMA user_version`.  Abrir una base ya actualizada cuesta
+una sola lectura de ese PRAGMA.
+
+Para cambiar el esquema se agrega una función nueva al final de
+`MIGRATIONS`; nunca se modifica una migración ya publicada.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Callable
+
+
+def _m001_base_schema(cur: sqlite3.Cursor) -> None:
+    """Tablas originales del sistema (antes se creaban en cada conexión)."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            barcode     TEXT UNIQUE,
+            name        TEXT NOT NULL,
+            description TEXT,
+            unit        TEXT DEFAULT 'pz',
+            price       REAL NOT NULL DEFAULT 0,
+            discount    REAL NOT NULL DEFAULT 0,
+            iva         REAL NOT NULL DEFAULT 0,
+            sku         TEXT,
+            stock       INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # Tabla clientes y placeholders de otras …
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS clients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT,
+            email TEXT,
+            address TEXT,
+            credit_limit REAL DEFAULT 0,
+            balance REAL DEFAULT 0
+        )
+    """)
+
+    # Placeholder ventas / items (vacías aún)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            client_id INTEGER,
+            total REAL NOT NULL,
+            discount REAL DEFAULT 0,
+            paid REAL DEFAULT 0,
+            payment_type TEXT,
+            FOREIGN KEY(client_id) REFERENCES clients(id)
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS sale_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sale_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity REAL NOT NULL,
+            price REAL NOT NULL,
+            discount REAL DEFAULT 0,
+            iva REAL DEFAULT 0,
+            FOREIGN KEY(sale_id) REFERENCES sales(id),
+            FOREIGN KEY(product_id) REFERENCES products(id)
+        )
+    """)
+    
+    # Movimientos de caja
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cash_movements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            concept TEXT NOT NULL,
+            amount REAL NOT NULL      -- positivo = entrada, negativo = salida
+        )
+    """)
+
+    # Almacenes (1 = almacén principal por defecto)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS warehouses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            location TEXT
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO warehouses(id, name) VALUES (1,'Principal')")
+
+    # Movimientos de inventario
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS stock_movements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            warehouse_id INTEGER NOT NULL,
+            qty REAL NOT NULL,
+            concept TEXT,
+            FOREIGN KEY(product_id) REFERENCES products(id),
+            FOREIGN KEY(warehouse_id) REFERENCES warehouses(id)
+        )
+    """)
+
+    # Proveedores
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS suppliers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            legal_id TEXT,
+            name TEXT NOT NULL,
+            phone TEXT,
+            email TEXT,
+            bank_info TEXT
+        )
+    """)
+
+    # Cuentas por pagar a proveedores
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS payables (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            supplier_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            concept TEXT NOT NULL,
+            amount REAL NOT NULL,
+            paid REAL DEFAULT 0,
+            FOREIGN KEY(supplier_id) REFERENCES suppliers(id)
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cash_shifts(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            opened  TEXT NOT NULL,
+            closed  TEXT,
+            opening_amount REAL NOT NULL
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO cash_shifts(id, opened, opening_amount) "
+                "VALUES (1, datetime('now','localtime'), 0)")
+
+    # Existencias materializadas por almacén (se mantienen desde InventoryDAO)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS stock_levels(
+            product_id   INTEGER NOT NULL,
+            warehouse_id INTEGER NOT NULL,
+            qty          REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY(product_id, warehouse_id),
+            FOREIGN KEY(product_id) REFERENCES products(id),
+            FOREIGN KEY(warehouse_id) REFERENCES warehouses(id)
+        ) WITHOUT ROWID
+    """)
+    # bases anteriores a la tabla: se calcula una sola vez desde el histórico
+    if (cur.execute("SELECT 1 FROM stock_levels LIMIT 1").fetchone() is None
+            and cur.execute("SELECT 1 FROM stock_movements LIMIT 1").fetchone()):
+        cur.execute("""
+            INSERT INTO stock_levels(product_id, warehouse_id, qty)
+            SELECT product_id, warehouse_id, SUM(qty)
+              FROM stock_movements
+          GROUP BY product_id, warehouse_id
+        """)
+
+
+def _m002_indexes(cur: sqlite3.Cursor) -> None:
+    """Índices secundarios para las consultas frecuentes de los DAOs."""
+    for sql in (
+        "CREATE INDEX IF NOT EXISTS idx_stock_movements_product_wh "
+        "ON stock_movements(product_id, warehouse_id)",
+        "CREATE INDEX IF NOT EXISTS idx_stock_movements_warehouse "
+        "ON stock_movements(warehouse_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items(sale_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sale_items_product ON sale_items(product_id)",
+        "CREATE INDEX IF NOT EXISTS idx_payables_supplier ON payables(supplier_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(date)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_client ON sales(client_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku)",
+        "CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)",
+        "CREATE INDEX IF NOT EXISTS idx_clients_name ON clients(name)",
+    ):
+        cur.execute(sql)
+
+
+def _m003_products_fts(cur: sqlite3.Cursor) -> None:
+    """Índice de texto completo sobre productos (si SQLite trae FTS5).
+
+    Se prefiere el tokenizador `trigram` (búsqueda por subcadena); si la
+    versión de SQLite no lo incluye se usa el tokenizador por omisión, que
+    admite búsqueda por prefijo.  Sin FTS5 la migración no crea nada y
+    `ProductDAO.search` sigue usando LIKE.
+    """
+    for tokenize in ("tokenize='trigram'", None):
+        opts = "content='products', content_rowid='id'"
+        if tokenize:
+            opts += ", " + tokenize
+        try:
+            cur.execute(
+                f"CREATE VIRTUAL TABLE products_fts USING fts5(barcode, name, sku, {opts})"
+            )
+            break
+        except sqlite3.OperationalError as exc:
+            if "no such module" in str(exc):
+                return                        # FTS5 no compilado
+            if "tokenize" not in str(exc) and "tokenizer" not in str(exc):
+                raise
+    else:
+        return
+
+    cur.execute("""
+        CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, barcode, name, sku)
+            VALUES (new.id, new.barcode, new.name, new.sku);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, barcode, name, sku)
+            VALUES ('delete', old.id, old.barcode, old.name, old.sku);
+        END
+    """)
+    # solo columnas indexadas: los cambios de stock/precio no tocan el índice
+    cur.execute("""
+        CREATE TRIGGER products_fts_au AFTER UPDATE OF barcode, name, sku
+        ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, barcode, name, sku)
+            VALUES ('delete', old.id, old.barcode, old.name, old.sku);
+            INSERT INTO products_fts(rowid, barcode, name, sku)
+            VALUES (new.id, new.barcode, new.name, new.sku);
+        END
+    """)
+    cur.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def _m004_cash_shift_ledger(cur: sqlite3.Cursor) -> None:
+    """Movimientos de caja ligados a su turno y total acumulado por turno."""
+    cur.execute("ALTER TABLE cash_movements ADD COLUMN shift_id INTEGER "
+                "REFERENCES cash_shifts(id)")
+    cur.execute("ALTER TABLE cash_shifts ADD COLUMN total REAL NOT NULL DEFAULT 0")
+
+    # cada movimiento existente va al último turno abierto antes de su fecha
+    cur.execute("""
+        UPDATE cash_movements SET shift_id = COALESCE(
+            (SELECT s.id FROM cash_shifts s
+              WHERE s.opened <= cash_movements.date
+           ORDER BY s.opened DESC, s.id DESC LIMIT 1),
+            (SELECT MIN(id) FROM cash_shifts))
+    """)
+    cur.execute("""
+        UPDATE cash_shifts SET total = (
+            SELECT COALESCE(SUM(amount), 0) FROM cash_movements
+             WHERE shift_id = cash_shifts.id)
+    """)
+    # a lo sumo un turno abierto (y siempre uno disponible)
+    cur.execute("""
+        UPDATE cash_shifts SET closed = datetime('now','localtime')
+         WHERE closed IS NULL
+           AND id <> (SELECT MAX(id) FROM cash_shifts WHERE closed IS NULL)
+    """)
+    if cur.execute("SELECT 1 FROM cash_shifts WHERE closed IS NULL").fetchone() is None:
+        cur.execute("INSERT INTO cash_shifts(opened, opening_amount) "
+                    "VALUES (datetime('now','localtime'), 0)")
+    cur.execute("CREATE UNIQUE INDEX idx_cash_shifts_open "
+                "ON cash_shifts((closed IS NULL)) WHERE closed IS NULL")
+    cur.execute("CREATE INDEX idx_cash_movements_shift "
+                "ON cash_movements(shift_id, id)")
+
+
+def _m005_sales_rollups(cur: sqlite3.Cursor) -> None:
+    """Agregados de ventas por día/hora (ver pos.models.rollup).
+
+    Se crean vacíos: las ventas previas se cargan con
+    `python -m pos.cli rollup-backfill`.
+    """
+    for period in ("daily", "hourly"):
+        cur.execute(f"""
+            CREATE TABLE rollup_sales_{period}(
+                bucket       TEXT NOT NULL,   -- 'AAAA-MM-DD' o 'AAAA-MM-DD HH'
+                payment_type TEXT NOT NULL,
+                tickets      INTEGER NOT NULL DEFAULT 0,
+                revenue      REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY(bucket, payment_type)
+            ) WITHOUT ROWID
+        """)
+        cur.execute(f"""
+            CREATE TABLE rollup_product_{period}(
+                bucket     TEXT NOT NULL,
+                product_id INTEGER NOT NULL,
+                units      REAL NOT NULL DEFAULT 0,
+                revenue    REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY(bucket, product_id)
+            ) WITHOUT ROWID
+        """)
+
+
+def _m006_ledger_date_indexes(cur: sqlite3.Cursor) -> None:
+    """Filtros por rango de fechas sobre el histórico de inventario."""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_date "
+                "ON stock_movements(date)")
+
+
+def _m007_code_sequences(cur: sqlite3.Cursor) -> None:
+    """Secuencias de códigos internos (ver pos.models.codes).
+
+    Cada secuencia arranca después del mayor código existente con el mismo
+    formato, así que los códigos asignados nunca chocan con los previos.
+    """
+    cur.execute("""
+        CREATE TABLE code_sequences(
+            name       TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    cur.execute("""
+        INSERT INTO code_sequences(name, next_value)
+        SELECT 'barcode', COALESCE(MAX(CAST(substr(barcode, 3, 10) AS INTEGER)), 0) + 1
+          FROM products
+         WHERE length(barcode) = 13 AND barcode GLOB '20[0-9]*'
+    """)
+    cur.execute("""
+        INSERT INTO code_sequences(name, next_value)
+        SELECT 'sku', COALESCE(MAX(CAST(substr(sku, 2) AS INTEGER)), 0) + 1
+          FROM products
+         WHERE sku GLOB 'P[0-9][0-9][0-9][0-9][0-9][0-9][0-9]'
+    """)
+
+
+def _m008_stock_snapshots(cur: sqlite3.Cursor) -> None:
+    """Fotografías periódicas de existencias para consultas «a fecha»."""
+    cur.execute("""
+        CREATE TABLE stock_snapshots(
+            id               INTEGER PRIMARY KEY AUTOINCREMENT,
+            taken            TEXT NOT NULL,
+            last_movement_id INTEGER NOT NULL   -- último movimiento incluido
+        )
+    """)
+    cur.execute("CREATE INDEX idx_stock_snapshots_taken ON stock_snapshots(taken)")
+    cur.execute("""
+        CREATE TABLE stock_snapshot_lines(
+            snapshot_id  INTEGER NOT NULL,
+            product_id   INTEGER NOT NULL,
+            warehouse_id INTEGER NOT NULL,
+            qty          REAL NOT NULL,
+            PRIMARY KEY(snapshot_id, product_id, warehouse_id),
+            FOREIGN KEY(snapshot_id) REFERENCES stock_snapshots(id)
+        ) WITHOUT ROWID
+    """)
+
+
+def _m009_clients_search(cur: sqlite3.Cursor) -> None:
+    """Búsqueda de clientes por nombre, teléfono o correo (selector de Ventas).
+
+    El índice NOCASE sobre el nombre resuelve los prefijos cortos como un
+    rango; `clients_fts` (trigram, igual que products_fts) las subcadenas de
+    3 o más caracteres.  Sin trigram la tabla FTS no se crea y
+    `ClientDAO.search` recurre a LIKE.
+    """
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_clients_name_nocase "
+                "ON clients(name COLLATE NOCASE, id)")
+    try:
+        cur.execute("""
+            CREATE VIRTUAL TABLE clients_fts USING fts5(
+                name, phone, email,
+                content='clients', content_rowid='id', tokenize='trigram')
+        """)
+    except sqlite3.OperationalError as exc:
+        if "no such" in str(exc) or "tokenize" in str(exc):
+            return                            # sin FTS5 o sin trigram
+        raise
+
+    cur.execute("""
+        CREATE TRIGGER clients_fts_ai AFTER INSERT ON clients BEGIN
+            INSERT INTO clients_fts(rowid, name, phone, email)
+            VALUES (new.id, new.name, new.phone, new.email);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER clients_fts_ad AFTER DELETE ON clients BEGIN
+            INSERT INTO clients_fts(clients_fts, rowid, name, phone, email)
+            VALUES ('delete', old.id, old.name, old.phone, old.email);
+        END
+    """)
+    # los cambios de saldo no tocan el índice
+    cur.execute("""
+        CREATE TRIGGER clients_fts_au AFTER UPDATE OF name, phone, email
+        ON clients BEGIN
+            INSERT INTO clients_fts(clients_fts, rowid, name, phone, email)
+            VALUES ('delete', old.id, old.name, old.phone, old.email);
+            INSERT INTO clients_fts(rowid, name, phone, email)
+            VALUES (new.id, new.name, new.phone, new.email);
+        END
+    """)
+    cur.execute("INSERT INTO clients_fts(clients_fts) VALUES ('rebuild')")
+
+def _m010_outbox(cur: sqlite3.Cursor) -> None:
+    """Diario de salida para sincronizar con la central (ver pos.sync).
+
+    Los DAOs escriben en `outbox`, en la misma transacción que la venta o el
+    movimiento, una fila con el registro en JSON; `seq` es el orden de envío.
+    `sync_state` (una sola fila) guarda la identidad de la terminal, la
+    central configurada y hasta qué `seq` confirmó la central.
+    """
+    cur.execute("""
+        CREATE TABLE outbox(
+            seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind    TEXT NOT NULL,          -- 'sale' | 'stock_movement' | 'cash_movement'
+            ref_id  INTEGER NOT NULL,       -- id del registro en su tabla
+            created TEXT NOT NULL,
+            payload TEXT NOT NULL           -- JSON
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE sync_state(
+            id         INTEGER PRIMARY KEY CHECK (id = 1),
+            terminal_id TEXT NOT NULL,
+            central    TEXT,                -- ruta de la central; NULL = sin sincronizar
+            acked_seq  INTEGER NOT NULL DEFAULT 0,
+            last_sync  TEXT,
+            last_error TEXT
+        )
+    """)
+    cur.execute("INSERT INTO sync_state(id, terminal_id) "
+                "VALUES (1, lower(hex(randomblob(6))))")
+
+def _m011_shift_reports(cur: sqlite3.Cursor) -> None:
+    """Resumen del corte Z de cada turno (ver pos.models.shift_report)."""
+    cur.execute("""
+        CREATE TABLE shift_reports(
+            shift_id       INTEGER PRIMARY KEY REFERENCES cash_shifts(id),
+            generated      TEXT NOT NULL,
+            opened         TEXT NOT NULL,
+            closed         TEXT,
+            opening_amount REAL NOT NULL,
+            total          REAL NOT NULL,
+            movements      INTEGER NOT NULL,
+            cash_in        REAL NOT NULL,
+            cash_out       REAL NOT NULL,
+            sales_count    INTEGER NOT NULL,
+            sales_total    REAL NOT NULL,
+            by_concept     TEXT NOT NULL,   -- JSON [[concepto, n, monto], ...]
+            by_payment     TEXT NOT NULL    -- JSON [[tipo, n, total, pagado], ...]
+        )
+    """)
+
+def _m012_archived_snapshots(cur: sqlite3.Cursor) -> None:
+    """Marca las fotografías que escribe el archivado al cierre de un periodo.
+
+    La más reciente es el horizonte de las consultas «a fecha»: antes de
+    ella los movimientos ya no están en la base viva (ver pos.archive).
+    """
+    cur.execute("ALTER TABLE stock_snapshots "
+                "ADD COLUMN archived INTEGER NOT NULL DEFAULT 0")
+
+def _m013_sales_shift(cur: sqlite3.Cursor) -> None:
+    """Cada venta ligada al turno de caja abierto cuando se registró.
+
+    El corte Z toma las ventas por turno y no por ventana de fechas: con
+    marcas de tiempo al segundo, una venta del mismo segundo que el cierre
+    quedaba fuera de ambos turnos.
+    """
+    cur.execute("ALTER TABLE sales ADD COLUMN shift_id INTEGER "
+                "REFERENCES cash_shifts(id)")
+    # mismo criterio que _m004: el último turno abierto antes de la venta
+    cur.execute("""
+        UPDATE sales SET shift_id = COALESCE(
+            (SELECT s.id FROM cash_shifts s
+              WHERE s.opened <= sales.date
+           ORDER BY s.opened DESC, s.id DESC LIMIT 1),
+            (SELECT MIN(id) FROM cash_shifts))
+    """)
+    cur.execute("CREATE INDEX idx_sales_shift ON sales(shift_id)")
+
+
+# Orden = versión: MIGRATIONS[0] deja la base en user_version 1, etc.
+MIGRATIONS: list[Callable[[sqlite3.Cursor], None]] = [
+    _m001_base_schema,
+    _m002_indexes,
+    _m003_products_fts,
+    _m004_cash_shift_ledger,
+    _m005_sales_rollups,
+    _m006_ledger_date_indexes,
+    _m007_code_sequences,
+    _m008_stock_snapshots,
+    _m009_clients_search,
+    _m010_outbox,
+    _m011_shift_reports,
+    _m012_archived_snapshots,
+    _m013_sales_shift,
+]
+
+LATEST_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Aplica las migraciones pendientes y devuelve la versión resultante."""
+    version = schema_version(conn)
+    if version >= LATEST_VERSION:
+        return version
+
+    for target in range(version + 1, LATEST_VERSION + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # otro proceso pudo migrar mientras esperábamos el bloqueo
+            if schema_version(conn) >= target:
+                conn.rollback()
+                continue
+            MIGRATIONS[target - 1](conn.cursor())
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return schema_version(conn)
@@ -0,0 +1,61 @@
+"""
+pos.models
+----------
+Capa de acceso a datos (DAOs).  `build_daos()` arma el juego completo
+sobre una conexión; cada hilo que toque la base usa el suyo, pero todos
+comparten el `ChangeBus` por el que avisan de sus escrituras.  Si la
+conexión viene medida (`pos.instrument`), los métodos de los DAOs también.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from types import SimpleNamespace
+
+from ..events import ChangeBus
+
+from .cash import CashDAO
+from .client import ClientDAO
+from .inventory import InventoryDAO
+from .outbox import OutboxDAO
+from .payable import PayableDAO
+from .product import BarcodeIndex, ProductCache, ProductDAO
+from .rollup import RollupDAO
+from .sale import SaleDAO
+from .supplier import SupplierDAO
+from .warehouse import WarehouseDAO
+
+
+def build_daos(
+    conn: sqlite3.Connection,
+    codes: BarcodeIndex | None = None,
+    cache: ProductCache | None = None,
+    events: ChangeBus | None = None,
+) -> SimpleNamespace:
+    """DAOs sobre `conn`; `codes`, `cache` y `events` se comparten entre hilos."""
+    codes = codes or BarcodeIndex()
+    cache = cache or ProductCache()
+    events = events or ChangeBus()
+    outbox = OutboxDAO(conn)
+    daos = SimpleNamespace(
+        product=ProductDAO(conn, codes=codes, cache=cache, events=events),
+        client=ClientDAO(conn, events=events),
+        sale=SaleDAO(conn, product_cache=cache, events=events, outbox=outbox),
+        cash=CashDAO(conn, events=events, outbox=outbox),
+        inventory=InventoryDAO(conn, product_cache=cache, events=events,
+                               outbox=outbox),
+        warehouse=WarehouseDAO(conn, events=events),
+        supplier=SupplierDAO(conn, events=events),
+        payable=PayableDAO(conn, events=events),
+        rollup=RollupDAO(conn),
+        outbox=outbox,
+        events=events,
+    )
+    profiler = getattr(conn, "profiler", None)
+    if profiler is not None:
+        for name, dao in vars(daos).items():
+            if name != "events":
+                profiler.wrap(dao)
+        profiler.wrap(daos.sale.rollups)
+        profiler.wrap(daos.cash.reports)
+    return daos
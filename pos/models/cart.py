@@ -0,0 +1,86 @@
+"""
+pos.models.cart
+---------------
+Carrito de una venta en curso, en memoria (no toca la base).
+
+Los renglones se guardan por id de producto (acceso O(1) al escanear) en
+orden de captura, y el total se actualiza con la diferencia de cada cambio
+en lugar de recorrer el carrito.  Cada renglón es un dict con las claves
+que espera `SaleDAO.create_sale` (product_id, qty, price) más el nombre.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+
+class Cart:
+    def __init__(self) -> None:
+        self._lines: dict[int, dict] = {}
+        self.total = 0.0
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._lines.values())
+
+    def __contains__(self, product_id: int) -> bool:
+        return product_id in self._lines
+
+    def get(self, product_id: int) -> dict | None:
+        return self._lines.get(product_id)
+
+    def add(self, product_id: int, name: str, price: float, qty: float = 1,
+            stock: float | None = None) -> dict:
+        """Suma `qty` al renglón del producto (lo crea si no existe).
+
+        Con `stock`, rechaza con ValueError si la cantidad total lo supera.
+        """
+        line = self._lines.get(product_id)
+        new_qty = qty + (line["qty"] if line else 0)
+        if stock is not None and new_qty > stock:
+            raise ValueError("Sin stock suficiente" if line else "Sin stock disponible")
+        if line is None:
+            line = self._lines[product_id] = {
+                "product_id": product_id, "name": name, "qty": 0, "price": price,
+            }
+        line["qty"] = new_qty
+        self.total += qty * line["price"]
+        return line
+
+    def remove(self, product_id: int) -> dict | None:
+        line = self._lines.pop(product_id, None)
+        if line is not None:
+            self.total -= line["qty"] * line["price"]
+            if not self._lines:
+                self.total = 0.0         # sin residuos de redondeo
+        return line
+
+    def subtract(self, lines: list[dict]) -> list[int]:
+        """Descuenta renglones ya cobrados (copias de `lines()`).
+
+        Lo agregado mientras se cobraba queda en el carrito.  Devuelve los
+        ids de producto cuyos renglones cambiaron o desaparecieron.
+        """
+        changed = []
+        for sold in lines:
+            pid = sold["product_id"]
+            line = self._lines.get(pid)
+            if line is None:
+                continue
+            changed.append(pid)
+            if line["qty"] - sold["qty"] <= 1e-9:
+                self.remove(pid)
+            else:
+                line["qty"] -= sold["qty"]
+                self.total -= sold["qty"] * line["price"]
+        return changed
+
+    def clear(self) -> None:
+        self._lines.clear()
+        self.total = 0.0
+
+    def lines(self) -> list[dict]:
+        """Copia de los renglones (para entregarla a otro hilo)."""
+        return [dict(line) for line in self._lines.values()]
@@ -1,45 +1,123 @@
 import sqlite3
-from typing import Sequence, Mapping
+from typing import Iterable, Sequence, Mapping
+
+from ..events import ChangeBus
+from .outbox import OutboxDAO
+from .shift_report import ShiftReportDAO
 
 class CashDAO:
-    def __init__(self, conn: sqlite3.Connection):
+    """Caja por turnos: cada movimiento pertenece a un turno y el turno
+    lleva su total acumulado, así que nada recorre el histórico completo."""
+
+    def __init__(self, conn: sqlite3.Connection, events: ChangeBus | None = None,
+                 outbox: OutboxDAO | None = None):
         self.conn = conn
+        self.events = events or ChangeBus()
+        self.outbox = outbox or OutboxDAO(conn)
+        self.reports = ShiftReportDAO(conn)
 
     def add(self, concept: str, amount: float) -> None:
-        self.conn.execute(
-            "INSERT INTO cash_movements(date, concept, amount) VALUES "
-            "(datetime('now','localtime'), ?, ?)",
-            (concept, amount))
-        self.conn.commit()
+        with self.conn:
+            sid, opened = self._shift_in_tx()
+            cur = self.conn.execute(
+                "INSERT INTO cash_movements(date, concept, amount, shift_id) VALUES "
+                "(datetime('now','localtime'), ?, ?, ?)",
+                (concept, amount, sid))
+            self.conn.execute(
+                "UPDATE cash_shifts SET total = total + ? WHERE id = ?",
+                (amount, sid))
+            self.outbox.record_cash(cur.lastrowid)
+        self.events.publish("cash_movements", [cur.lastrowid], "insert")
+        self.events.publish("cash_shifts", [sid], "insert" if opened else "update")
+
+    def _shift_in_tx(self) -> tuple[int, bool]:
+        """(turno abierto, ¿se abrió ahora?) dentro de la transacción en curso.
 
-    def list(self) -> Sequence[Mapping]:
+        A diferencia de `current_shift_id()` no confirma nada: si quien llama
+        revierte, el turno recién abierto se revierte con él.
+        """
+        row = self.conn.execute(
+            "SELECT id FROM cash_shifts WHERE closed IS NULL").fetchone()
+        if row:
+            return row["id"], False
+        cur = self.conn.execute("""
+            INSERT INTO cash_shifts(opened, opening_amount)
+            VALUES (datetime('now','localtime'), 0)
+        """)
+        return cur.lastrowid, True
+
+    def list(self, shift_id: int | None = None) -> Sequence[Mapping]:
+        """Movimientos del turno indicado (por defecto el actual)."""
+        sid = shift_id or self.current_shift_id()
         return self.conn.execute(
-            "SELECT id, date, concept, amount FROM cash_movements ORDER BY id DESC"
+            "SELECT id, date, concept, amount FROM cash_movements "
+            "WHERE shift_id = ? ORDER BY id DESC", (sid,)
         ).fetchall()
 
-    def total_shift(self) -> float:
-        row = self.conn.execute("SELECT COALESCE(SUM(amount),0) AS t FROM cash_movements").fetchone()
-        return row["t"]
+    def page(self, after: int | None = None, limit: int = 100,
+             shift_id: int | None = None) -> Sequence[Mapping]:
+        """Igual que `list()` pero por páginas; `after` = último id recibido."""
+        sid = shift_id or self.current_shift_id()
+        if after is None:
+            return self.conn.execute(
+                "SELECT id, date, concept, amount FROM cash_movements "
+                "WHERE shift_id = ? ORDER BY id DESC LIMIT ?", (sid, limit)
+            ).fetchall()
+        return self.conn.execute(
+            "SELECT id, date, concept, amount FROM cash_movements "
+            "WHERE shift_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (sid, after, limit)
+        ).fetchall()
+
+    def get_many(self, movement_ids: Iterable[int]) -> dict[int, Mapping]:
+        """Movimientos por id, con las mismas columnas que `page()`."""
+        ids = list(movement_ids)
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        cur = self.conn.execute(
+            "SELECT id, date, concept, amount FROM cash_movements "
+            f"WHERE id IN ({marks})", ids)
+        return {r["id"]: r for r in cur}
+
+    def total_shift(self, shift_id: int | None = None) -> float:
+        """Total acumulado del turno (sin el fondo inicial)."""
+        row = self.conn.execute(
+            "SELECT total FROM cash_shifts WHERE id = ?",
+            (shift_id or self.current_shift_id(),)).fetchone()
+        return row["total"] if row else 0.0
 
     def current_shift_id(self) -> int:
-        return self.conn.execute(
+        row = self.conn.execute(
             "SELECT id FROM cash_shifts WHERE closed IS NULL"
-        ).fetchone()["id"]
+        ).fetchone()
+        return row["id"] if row else self.open_shift()
 
     def open_shift(self, opening_amount: float = 0) -> int:
+        if self.conn.execute(
+                "SELECT 1 FROM cash_shifts WHERE closed IS NULL").fetchone():
+            raise ValueError("Ya hay un turno abierto")
         with self.conn:
-            self.conn.execute("""
+            cur = self.conn.execute("""
                 INSERT INTO cash_shifts(opened, opening_amount)
                 VALUES (datetime('now','localtime'), ?)
             """, (opening_amount,))
-        return self.current_shift_id()
+        self.events.publish("cash_shifts", [cur.lastrowid], "insert")
+        return cur.lastrowid
 
-    def close_shift(self) -> tuple[str, float]:
-        sid = self.current_shift_id()
-        total = self.total_shift()
+    def close_shift(self, next_opening: float = 0) -> int:
+        """Cierra el turno actual, guarda su corte Z y abre el siguiente,
+        todo en la misma transacción.  Devuelve el id del turno cerrado."""
         with self.conn:
+            sid, _ = self._shift_in_tx()
             self.conn.execute("""
                 UPDATE cash_shifts SET closed = datetime('now','localtime')
                 WHERE id = ?
             """, (sid,))
-        return (f"shift_{sid}_{int(total)}.txt", total)
+            self.reports.record(sid)
+            cur = self.conn.execute("""
+                INSERT INTO cash_shifts(opened, opening_amount)
+                VALUES (datetime('now','localtime'), ?)
+            """, (next_opening,))
+        self.events.publish("cash_shifts", [sid, cur.lastrowid])
+        return sid
@@ -1,34 +1,111 @@
 # POS/models/client.py
 import sqlite3
-from typing import Sequence, Mapping
+from typing import Iterable, Sequence, Mapping
+
+from ..events import ChangeBus
 
 class ClientDAO:
-    def __init__(self, conn: sqlite3.Connection):
+    def __init__(self, conn: sqlite3.Connection, events: ChangeBus | None = None):
         self.conn = conn
+        self.events = events or ChangeBus()
+        self._fts: bool | None = None          # None = aún no consultado
 
     # ---------- CRUD básico -------------
     def add(self, *, name: str, phone: str = "", email: str = "",
-            address: str = "", credit_limit: float = 0) -> None:
+            address: str = "", credit_limit: float = 0) -> int:
         cur = self.conn.cursor()
         cur.execute("""
             INSERT INTO clients(name, phone, email, address, credit_limit)
             VALUES (?,?,?,?,?)
         """, (name, phone, email, address, credit_limit))
         self.conn.commit()
+        self.events.publish("clients", [cur.lastrowid], "insert")
+        return cur.lastrowid
 
     def list(self) -> Sequence[Mapping]:
         cur = self.conn.cursor()
         cur.execute("SELECT id, name, phone, email, balance FROM clients ORDER BY name")
         return cur.fetchall()
 
+    def page(self, after: tuple[str, int] | None = None,
+             limit: int = 100) -> Sequence[Mapping]:
+        """Igual que `list()` pero por páginas; `after` = (nombre, id) previo."""
+        cur = self.conn.cursor()
+        if after is None:
+            cur.execute("""
+                SELECT id, name, phone, email, balance FROM clients
+              ORDER BY name, id LIMIT ?
+            """, (limit,))
+        else:
+            cur.execute("""
+                SELECT id, name, phone, email, balance FROM clients
+                 WHERE (name, id) > (?, ?)
+              ORDER BY name, id LIMIT ?
+            """, (*after, limit))
+        return cur.fetchall()
+
+    def search(self, text: str, limit: int = 20) -> Sequence[Mapping]:
+        """Clientes cuyo nombre, teléfono o correo contiene `text`.
+
+        Menos de 3 caracteres: prefijo del nombre (rango sobre el índice
+        NOCASE).  Desde 3: subcadena vía `clients_fts`, o LIKE si la base no
+        tiene el índice.  Mismas columnas que `page()`.
+        """
+        text = text.strip()
+        if not text:
+            return self.page(limit=limit)
+        if len(text) < 3:
+            # 'ab' ≤ name < 'ac' sin distinguir mayúsculas; NOCASE compara
+            # en minúsculas ASCII, así que los límites también ('Z'+1 = '['
+            # quedaría antes de 'a')
+            low = "".join(c.lower() if c.isascii() else c for c in text)
+            upper = low[:-1] + chr(ord(low[-1]) + 1)
+            return self.conn.execute("""
+                SELECT id, name, phone, email, balance FROM clients
+                 WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE
+              ORDER BY name COLLATE NOCASE, id LIMIT ?
+            """, (low, upper, limit)).fetchall()
+        if self._has_fts():
+            return self.conn.execute("""
+                SELECT c.id, c.name, c.phone, c.email, c.balance
+                  FROM clients_fts f JOIN clients c ON c.id = f.rowid
+                 WHERE clients_fts MATCH ?
+              ORDER BY (c.name LIKE ?) DESC, f.rank, c.name LIMIT ?
+            """, ('"' + text.replace('"', '""') + '"', text + "%", limit)).fetchall()
+        like = f"%{text}%"
+        return self.conn.execute("""
+            SELECT id, name, phone, email, balance FROM clients
+             WHERE name LIKE ? OR phone LIKE ? OR email LIKE ?
+          ORDER BY name, id LIMIT ?
+        """, (like, like, like, limit)).fetchall()
+
+    def _has_fts(self) -> bool:
+        if self._fts is None:
+            self._fts = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'clients_fts'"
+            ).fetchone() is not None
+        return self._fts
+
     def get(self, client_id: int) -> Mapping | None:
         cur = self.conn.cursor()
         cur.execute("SELECT * FROM clients WHERE id=?", (client_id,))
         return cur.fetchone()
 
+    def get_many(self, client_ids: Iterable[int]) -> dict[int, Mapping]:
+        """Clientes por id, con las mismas columnas que `page()`."""
+        ids = list(client_ids)
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        cur = self.conn.execute(
+            f"SELECT id, name, phone, email, balance FROM clients WHERE id IN ({marks})",
+            ids)
+        return {r["id"]: r for r in cur}
+
     def update_balance(self, client_id: int, delta: float) -> None:
         cur = self.conn.cursor()
         cur.execute("""
             UPDATE clients SET balance = balance + ? WHERE id=?
         """, (delta, client_id))
         self.conn.commit()
+        self.events.publish("clients", [client_id])
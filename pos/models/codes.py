@@ -0,0 +1,106 @@
+"""
+pos.models.codes
+----------------
+Asignación de códigos de barras EAN-13 y SKUs internos sin sondear la base.
+
+Cada tipo de código es un contador en la tabla `code_sequences`.  El
+asignador reserva bloques de `block_size` valores con un solo UPDATE y
+después los reparte desde memoria, así que pedir un código cuesta O(1) y
+nunca produce colisiones.  Los valores de un bloque que no se lleguen a
+usar (p. ej. al cerrar la aplicación) simplemente se saltan.
+
+Formatos:
+    EAN-13  '20' + secuencia de 10 dígitos + dígito verificador
+            (prefijo GS1 20-29 = circulación restringida / uso interno)
+    SKU     'P' + secuencia de 7 dígitos
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+BARCODE_PREFIX = "20"
+SKU_PREFIX = "P"
+
+
+def ean13_check_digit(payload: str) -> str:
+    """Dígito verificador EAN-13 para los primeros 12 dígitos."""
+    if len(payload) != 12 or not payload.isdigit():
+        raise ValueError("Se esperaban 12 dígitos")
+    # pesos 1,3,1,3… desde la izquierda
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(payload))
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_ean13(code: str) -> bool:
+    return (len(code) == 13 and code.isdigit()
+            and ean13_check_digit(code[:12]) == code[12])
+
+
+def in_barcode_range(code: str) -> bool:
+    """¿Tiene `code` el formato que reparte el asignador?"""
+    return len(code) == 13 and code.isdigit() and code.startswith(BARCODE_PREFIX)
+
+
+def in_sku_range(code: str) -> bool:
+    return (len(code) == 8 and code.startswith(SKU_PREFIX)
+            and code[1:].isdigit())
+
+
+class CodeAllocator:
+    """Reparte códigos de barras y SKUs a partir de bloques reservados."""
+
+    def __init__(self, conn: sqlite3.Connection, block_size: int = 100) -> None:
+        self.conn = conn
+        self.block_size = block_size
+        self._blocks: dict[str, range] = {}
+        self._lock = threading.Lock()
+
+    # ───────────────────────── API ─────────────────────────
+    def next_barcode(self) -> str:
+        return self.barcodes(1)[0]
+
+    def next_sku(self) -> str:
+        return self.skus(1)[0]
+
+    def barcodes(self, n: int) -> list[str]:
+        """`n` EAN-13 nuevos y válidos."""
+        out = []
+        for value in self._take("barcode", n):
+            payload = f"{BARCODE_PREFIX}{value:010d}"
+            out.append(payload + ean13_check_digit(payload))
+        return out
+
+    def skus(self, n: int) -> list[str]:
+        """`n` SKUs nuevos."""
+        return [f"{SKU_PREFIX}{value:07d}" for value in self._take("sku", n)]
+
+    # ─────────────────────── internals ─────────────────────
+    def _take(self, name: str, n: int) -> list[int]:
+        with self._lock:
+            block = self._blocks.get(name, range(0))
+            values = list(block[:n])
+            missing = n - len(values)
+            if missing:
+                # una sola reserva cubre lo que falta más un bloque de reserva
+                fresh = self._reserve(name, missing + self.block_size)
+                values += fresh[:missing]
+                self._blocks[name] = fresh[missing:]
+            else:
+                self._blocks[name] = block[n:]
+            return values
+
+    def _reserve(self, name: str, n: int) -> range:
+        """Avanza la secuencia `n` valores en la base y devuelve los reservados."""
+        with self.conn:
+            cur = self.conn.execute(
+                "UPDATE code_sequences SET next_value = next_value + ? WHERE name = ?",
+                (n, name),
+            )
+            if cur.rowcount == 0:
+                raise LookupError(f"No existe la secuencia de códigos {name!r}")
+            (end,) = self.conn.execute(
+                "SELECT next_value FROM code_sequences WHERE name = ?", (name,)
+            ).fetchone()
+        return range(end - n, end)
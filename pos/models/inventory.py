@@ -7,33 +7,165 @@ DAO de inventarios con soporte multi-almacén, movimientos y traspasos.
 from __future__ import annotations
 
 import sqlite3
-from typing import Sequence, Mapping, Optional
+from typing import Iterable, Iterator, Sequence, Mapping, Optional
+
+from ..archive import CARRY_CONCEPT, horizon as archive_horizon
+from ..events import ChangeBus
+from .outbox import OutboxDAO
+from .product import ProductCache
+
+# máximo de parámetros por cláusula IN (...) en consultas por lote
+_IN_CHUNK = 500
 
 
 class InventoryDAO:
     """Data Access Object para operaciones de inventario."""
 
-    def __init__(self, conn: sqlite3.Connection) -> None:
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        product_cache: ProductCache | None = None,
+        events: ChangeBus | None = None,
+        outbox: OutboxDAO | None = None,
+    ) -> None:
         self.conn = conn
+        self.product_cache = product_cache
+        self.events = events or ChangeBus()
+        self.outbox = outbox or OutboxDAO(conn)
 
     # ───────────── helpers ─────────────
     def stock(self, product_id: int, warehouse_id: Optional[int] = None) -> float:
-        """Devuelve existencias (por almacén o globales)."""
+        """Devuelve existencias (por almacén o globales) desde `stock_levels`."""
         cur = self.conn.cursor()
         if warehouse_id is None:
             cur.execute(
-                "SELECT COALESCE(SUM(qty),0) FROM stock_movements WHERE product_id=?",
+                "SELECT COALESCE(SUM(qty),0) FROM stock_levels WHERE product_id=?",
                 (product_id,),
             )
         else:
             cur.execute(
-                "SELECT COALESCE(SUM(qty),0) FROM stock_movements "
+                "SELECT COALESCE(SUM(qty),0) FROM stock_levels "
                 "WHERE product_id=? AND warehouse_id=?",
                 (product_id, warehouse_id),
             )
         (qty,) = cur.fetchone()
         return float(qty or 0)
 
+    def stock_many(
+        self, product_ids: Iterable[int], warehouse_id: Optional[int] = None
+    ) -> dict[int, float]:
+        """Existencias de varios productos con una consulta agrupada por lote.
+
+        Los productos sin registro en `stock_levels` devuelven 0.
+        """
+        ids = list(dict.fromkeys(product_ids))
+        result = dict.fromkeys(ids, 0.0)
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            sql = (
+                "SELECT product_id, SUM(qty) FROM stock_levels "
+                f"WHERE product_id IN ({marks})"
+            )
+            params: list = list(chunk)
+            if warehouse_id is not None:
+                sql += " AND warehouse_id = ?"
+                params.append(warehouse_id)
+            sql += " GROUP BY product_id"
+            for pid, qty in self.conn.execute(sql, params):
+                result[pid] = float(qty or 0)
+        return result
+
+    def warehouse_stock(
+        self, warehouse_id: int, text: str = "", only_in_stock: bool = False
+    ) -> list[tuple]:
+        """Productos con su existencia en un almacén: (id, nombre, stock).
+
+        Una sola consulta sobre `products` unida a `stock_levels`; el filtro
+        de texto y «solo con existencia» se resuelven en SQL.
+        """
+        join = "JOIN" if only_in_stock else "LEFT JOIN"
+        sql = f"""
+            SELECT p.id, p.name, COALESCE(l.qty, 0.0) AS qty
+              FROM products p
+              {join} stock_levels l
+                ON l.product_id = p.id AND l.warehouse_id = ?
+        """
+        where, params = [], [warehouse_id]
+        if only_in_stock:
+            where.append("l.qty <> 0")
+        if text:
+            like = f"%{text}%"
+            where.append("(p.barcode LIKE ? OR p.name LIKE ? OR p.sku LIKE ?)")
+            params += [like, like, like]
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY p.name"
+        return [tuple(r) for r in self.conn.execute(sql, params).fetchall()]
+
+    def _record(
+        self, product_id: int, warehouse_id: int, qty: float, concept: str
+    ) -> None:
+        """Asienta un movimiento, su efecto en `stock_levels` y `products` y
+        su fila en el diario de envío.
+
+        No abre transacción: quien llama debe envolverlo en `with self.conn`.
+        """
+        cur = self.conn.execute(
+            """
+            INSERT INTO stock_movements(date,product_id,warehouse_id,qty,concept)
+            VALUES (datetime('now','localtime'),?,?,?,?)
+            """,
+            (product_id, warehouse_id, qty, concept),
+        )
+        self.outbox.record_movements(cur.lastrowid)
+        self.conn.execute(
+            """
+            INSERT INTO stock_levels(product_id, warehouse_id, qty)
+            VALUES (?,?,?)
+            ON CONFLICT(product_id, warehouse_id) DO UPDATE
+               SET qty = qty + excluded.qty
+            """,
+            (product_id, warehouse_id, qty),
+        )
+        self.conn.execute(
+            "UPDATE products SET stock = stock + ? WHERE id = ?",
+            (qty, product_id),
+        )
+
+    def _record_many(self, moves: Sequence[tuple[int, int, float, str]]) -> None:
+        """Versión por lotes de `_record`: (product_id, warehouse_id, qty, concepto).
+
+        Tampoco abre transacción.
+        """
+        # executemany no da los ids: quedan entre el mayor de antes y el de después
+        (before,) = self.conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM stock_movements").fetchone()
+        self.conn.executemany(
+            """
+            INSERT INTO stock_movements(date,product_id,warehouse_id,qty,concept)
+            VALUES (datetime('now','localtime'),?,?,?,?)
+            """,
+            moves,
+        )
+        self.conn.executemany(
+            """
+            INSERT INTO stock_levels(product_id, warehouse_id, qty)
+            VALUES (?,?,?)
+            ON CONFLICT(product_id, warehouse_id) DO UPDATE
+               SET qty = qty + excluded.qty
+            """,
+            [(pid, wid, qty) for pid, wid, qty, _ in moves],
+        )
+        (after,) = self.conn.execute("SELECT MAX(id) FROM stock_movements").fetchone()
+        self.outbox.record_movements(before + 1, after)
+        self.conn.executemany(
+            "UPDATE products SET stock = stock + ? WHERE id = ?",
+            [(qty, pid) for pid, _, qty, _ in moves],
+        )
+        if self.product_cache:
+            self.product_cache.invalidate(*(m[0] for m in moves))
+
     # ───────────── movimientos ─────────────
     def move(self, product_id: int, warehouse_id: int, qty: float, concept: str = ""):
         """Inserta un movimiento simple (entrada + / salida –)."""
@@ -41,17 +173,10 @@ class InventoryDAO:
             raise ValueError("Stock insuficiente")
 
         with self.conn:
-            self.conn.execute(
-                """
-                INSERT INTO stock_movements(date,product_id,warehouse_id,qty,concept)
-                VALUES (datetime('now','localtime'),?,?,?,?)
-                """,
-                (product_id, warehouse_id, qty, concept),
-            )
-            self.conn.execute(
-                "UPDATE products SET stock = stock + ? WHERE id = ?",
-                (qty, product_id),
-            )
+            self._record(product_id, warehouse_id, qty, concept)
+        if self.product_cache:
+            self.product_cache.invalidate(product_id)
+        self._changed([product_id])
 
     def transfer(
         self,
@@ -68,8 +193,175 @@ class InventoryDAO:
             raise ValueError("Stock insuficiente en almacén origen")
 
         with self.conn:
-            self.move(product_id, src, -qty, f"{concept} salida")
-            self.move(product_id, dst, +qty, f"{concept} entrada")
+            self._record(product_id, src, -qty, f"{concept} salida")
+            self._record(product_id, dst, +qty, f"{concept} entrada")
+        if self.product_cache:
+            self.product_cache.invalidate(product_id)
+        self._changed([product_id])
+
+    def _changed(self, product_ids: list[int]) -> None:
+        """Avisa que cambió la existencia (y `products.stock`) de esos productos."""
+        self.events.publish("stock_levels", product_ids)
+        self.events.publish("products", product_ids)
+
+    # ───────────── mantenimiento ─────────────
+    def rebuild_levels(self) -> int:
+        """Recalcula `stock_levels` completo a partir de `stock_movements`.
+
+        Devuelve el número de pares producto/almacén escritos.
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM stock_levels")
+            cur = self.conn.execute(
+                """
+                INSERT INTO stock_levels(product_id, warehouse_id, qty)
+                SELECT product_id, warehouse_id, SUM(qty)
+                  FROM stock_movements
+              GROUP BY product_id, warehouse_id
+                """
+            )
+        self.events.publish("stock_levels")
+        return cur.rowcount
+
+    def verify_levels(self) -> list[tuple[int, int, float, float]]:
+        """Compara `stock_levels` con el histórico.
+
+        Devuelve las diferencias como (product_id, warehouse_id,
+        cantidad_materializada, cantidad_histórico); lista vacía = todo cuadra.
+        """
+        cur = self.conn.execute(
+            """
+            WITH ledger AS (
+                SELECT product_id, warehouse_id, SUM(qty) AS qty
+                  FROM stock_movements
+              GROUP BY product_id, warehouse_id
+            )
+            SELECT l.product_id, l.warehouse_id, l.qty, COALESCE(g.qty, 0)
+              FROM stock_levels l
+              LEFT JOIN ledger g
+                ON g.product_id = l.product_id AND g.warehouse_id = l.warehouse_id
+             WHERE abs(l.qty - COALESCE(g.qty, 0)) > 1e-9
+            UNION ALL
+            SELECT g.product_id, g.warehouse_id, 0, g.qty
+              FROM ledger g
+             WHERE g.qty <> 0
+               AND NOT EXISTS (SELECT 1 FROM stock_levels l
+                                WHERE l.product_id = g.product_id
+                                  AND l.warehouse_id = g.warehouse_id)
+            """
+        )
+        return [tuple(r) for r in cur.fetchall()]
+
+    # ───────────── fotografías ─────────────
+    def checkpoint(self, min_interval_hours: Optional[float] = None) -> Optional[int]:
+        """Guarda una fotografía de `stock_levels` y devuelve su id.
+
+        Con `min_interval_hours` no hace nada (devuelve None) si la última
+        fotografía es más reciente que ese intervalo; así el trabajo
+        periódico puede lanzarse con la frecuencia que sea.
+        """
+        if min_interval_hours is not None:
+            recent = self.conn.execute(
+                "SELECT 1 FROM stock_snapshots "
+                "WHERE taken > datetime('now','localtime', ?)",
+                (f"-{min_interval_hours} hours",),
+            ).fetchone()
+            if recent:
+                return None
+        with self.conn:
+            # stock_levels ya refleja todos los movimientos hasta este id
+            cur = self.conn.execute(
+                """
+                INSERT INTO stock_snapshots(taken, last_movement_id)
+                SELECT datetime('now','localtime'), COALESCE(MAX(id), 0)
+                  FROM stock_movements
+                """
+            )
+            sid = cur.lastrowid
+            self.conn.execute(
+                """
+                INSERT INTO stock_snapshot_lines(snapshot_id, product_id,
+                                                 warehouse_id, qty)
+                SELECT ?, product_id, warehouse_id, qty
+                  FROM stock_levels WHERE qty <> 0
+                """,
+                (sid,),
+            )
+        return sid
+
+    def _snapshot_before(self, when: str) -> tuple[Optional[int], int, str]:
+        """(id, último movimiento, fecha) de la fotografía más reciente hasta `when`.
+
+        Los movimientos a sumar después de ella son los de fecha posterior,
+        o de la misma fecha e id mayor.  Así la fotografía que deja el
+        archivado al cierre de un periodo excluye los saldos de arrastre
+        (misma fecha, ids menores) pero no los movimientos ya vivos del mes
+        siguiente.  Antes de esa fotografía la base viva no tiene el
+        detalle: la consulta lanza ValueError (usar `LedgerArchive.history`).
+        """
+        horizon = archive_horizon(self.conn)
+        if horizon is not None and _until(when) < horizon:
+            raise ValueError(
+                f"{when} es anterior al último periodo archivado ({horizon}); "
+                "consulte el histórico con LedgerArchive.history()")
+        row = self.conn.execute(
+            """
+            SELECT id, last_movement_id, taken FROM stock_snapshots
+             WHERE taken <= ? ORDER BY taken DESC, id DESC LIMIT 1
+            """,
+            (_until(when),),
+        ).fetchone()
+        return (row[0], row[1], row[2]) if row else (None, 0, "")
+
+    def stock_as_of(
+        self, product_id: int, when: str, warehouse_id: Optional[int] = None
+    ) -> float:
+        """Existencia de un producto al final de `when` ('AAAA-MM-DD' o fecha-hora).
+
+        Parte de la fotografía más cercana anterior y suma solo los
+        movimientos posteriores a ella.  Lanza ValueError si `when` es
+        anterior al último periodo archivado.
+        """
+        sid, last_id, taken = self._snapshot_before(when)
+        wh_sql = "" if warehouse_id is None else " AND warehouse_id = ?"
+        wh = () if warehouse_id is None else (warehouse_id,)
+        base = 0.0
+        if sid is not None:
+            (base,) = self.conn.execute(
+                "SELECT COALESCE(SUM(qty),0) FROM stock_snapshot_lines "
+                "WHERE snapshot_id = ? AND product_id = ?" + wh_sql,
+                (sid, product_id, *wh),
+            ).fetchone()
+        (delta,) = self.conn.execute(
+            "SELECT COALESCE(SUM(qty),0) FROM stock_movements "
+            "WHERE product_id = ?" + wh_sql + " AND date >= ? AND date <= ? "
+            "AND (date > ? OR id > ?)",
+            (product_id, *wh, taken, _until(when), taken, last_id),
+        ).fetchone()
+        return float(base or 0) + float(delta or 0)
+
+    def warehouse_stock_as_of(self, warehouse_id: int, when: str) -> dict[int, float]:
+        """Existencias de todo un almacén al final de `when`: {product_id: qty}.
+
+        Omite los productos que quedan en cero.
+        """
+        sid, last_id, taken = self._snapshot_before(when)
+        rows = self.conn.execute(
+            """
+            SELECT product_id, SUM(qty) FROM (
+                SELECT product_id, qty FROM stock_snapshot_lines
+                 WHERE snapshot_id = ? AND warehouse_id = ?
+                UNION ALL
+                SELECT product_id, qty FROM stock_movements
+                 WHERE warehouse_id = ? AND date >= ? AND date <= ?
+                   AND (date > ? OR id > ?)
+            )
+          GROUP BY product_id
+            HAVING SUM(qty) <> 0
+            """,
+            (sid, warehouse_id, warehouse_id, taken, _until(when), taken, last_id),
+        )
+        return {pid: float(qty) for pid, qty in rows}
 
     # ───────────── consultas ─────────────
     def movements(self, product_id: Optional[int] = None) -> Sequence[Mapping]:
@@ -96,3 +388,54 @@ class InventoryDAO:
                 """
             )
         return cur.fetchall()
+
+    def iter_movements(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        warehouse_id: Optional[int] = None,
+        product_id: Optional[int] = None,
+        chunk_size: int = 1000,
+        history: bool = False,
+    ) -> Iterator[sqlite3.Row]:
+        """Recorre el histórico en orden cronológico con memoria acotada.
+
+        `start`/`end` son fechas 'AAAA-MM-DD' (inclusive) o fecha-hora;
+        las filas se leen de a `chunk_size` con `fetchmany`.  Los saldos de
+        arrastre del archivado no son movimientos y no se incluyen.  Con
+        `history`, lee la vista `history_stock_movements` (dentro de
+        `LedgerArchive.history()`), que suma los meses archivados.
+        """
+        table = "history_stock_movements" if history else "stock_movements"
+        sql = f"""
+            SELECT m.id, m.date, m.product_id, p.name AS product,
+                   m.warehouse_id, m.qty, m.concept
+              FROM {table} m
+              LEFT JOIN products p ON p.id = m.product_id
+        """
+        where, params = ["m.concept IS NOT ?"], [CARRY_CONCEPT]
+        if start:
+            where.append("m.date >= ?")
+            params.append(start)
+        if end:
+            where.append("m.date <= ?")
+            params.append(_until(end))
+        if warehouse_id is not None:
+            where.append("m.warehouse_id = ?")
+            params.append(warehouse_id)
+        if product_id is not None:
+            where.append("m.product_id = ?")
+            params.append(product_id)
+        sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY m.id"
+        cur = self.conn.execute(sql, params)
+        try:
+            while rows := cur.fetchmany(chunk_size):
+                yield from rows
+        finally:
+            cur.close()
+
+
+def _until(end: str) -> str:
+    """Límite superior inclusivo: un día completo si `end` es solo fecha."""
+    return end + "~" if len(end) == 10 else end
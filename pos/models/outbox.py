@@ -0,0 +1,123 @@
+"""
+pos.models.outbox
+-----------------
+Diario de salida de la terminal: lo que hay que enviar a la central.
+
+`SaleDAO`, `InventoryDAO` y `CashDAO` llaman a `record_*()` dentro de su
+transacción, así que una venta o un movimiento confirmado siempre tiene
+su fila en `outbox` (y uno revertido nunca).  El registro se copia en
+JSON al escribirlo: el envío no depende de que la fila siga en la base
+viva (el archivado mensual puede moverla antes de sincronizar).
+
+`pending()` / `ack()` los usa `pos.sync`; la terminal solo borra del
+diario lo que la central confirmó.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Sequence, Mapping
+
+# JSON de cada registro, armado por SQLite a partir de la fila recién escrita
+_SALE_JSON = """
+    json_object(
+        'id', s.id, 'date', s.date, 'client_id', s.client_id,
+        'total', s.total, 'discount', s.discount, 'paid', s.paid,
+        'payment_type', s.payment_type,
+        'items', (SELECT json_group_array(json_object(
+                      'id', i.id, 'product_id', i.product_id,
+                      'quantity', i.quantity, 'price', i.price,
+                      'discount', i.discount, 'iva', i.iva))
+                    FROM sale_items i WHERE i.sale_id = s.id))
+"""
+_MOVEMENT_JSON = """
+    json_object(
+        'id', m.id, 'date', m.date, 'product_id', m.product_id,
+        'warehouse_id', m.warehouse_id, 'qty', m.qty, 'concept', m.concept)
+"""
+_CASH_JSON = """
+    json_object(
+        'id', c.id, 'date', c.date, 'concept', c.concept,
+        'amount', c.amount, 'shift_id', c.shift_id)
+"""
+
+
+class OutboxDAO:
+    """Escritura y consumo del diario `outbox` y estado de `sync_state`."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    # ───────────── escritura (dentro de la transacción de quien llama) ─────────────
+    def record_sale(self, sale_id: int) -> None:
+        """Venta con sus renglones; llamar después de insertar los renglones."""
+        self.conn.execute(f"""
+            INSERT INTO outbox(kind, ref_id, created, payload)
+            SELECT 'sale', s.id, datetime('now','localtime'), {_SALE_JSON}
+              FROM sales s WHERE s.id = ?
+        """, (sale_id,))
+
+    def record_movements(self, first_id: int, last_id: int | None = None) -> None:
+        """Movimientos de inventario con id entre `first_id` y `last_id`."""
+        self.conn.execute(f"""
+            INSERT INTO outbox(kind, ref_id, created, payload)
+            SELECT 'stock_movement', m.id, datetime('now','localtime'), {_MOVEMENT_JSON}
+              FROM stock_movements m
+             WHERE m.id BETWEEN ? AND ?
+          ORDER BY m.id
+        """, (first_id, first_id if last_id is None else last_id))
+
+    def record_cash(self, movement_id: int) -> None:
+        self.conn.execute(f"""
+            INSERT INTO outbox(kind, ref_id, created, payload)
+            SELECT 'cash_movement', c.id, datetime('now','localtime'), {_CASH_JSON}
+              FROM cash_movements c WHERE c.id = ?
+        """, (movement_id,))
+
+    # ───────────── consumo ─────────────
+    def pending(self, limit: int = 500) -> Sequence[Mapping]:
+        """Siguientes filas sin confirmar: (seq, kind, ref_id, created, payload)."""
+        return self.conn.execute(
+            "SELECT seq, kind, ref_id, created, payload FROM outbox "
+            "ORDER BY seq LIMIT ?", (limit,)
+        ).fetchall()
+
+    def pending_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def ack(self, last_seq: int) -> int:
+        """La central confirmó hasta `last_seq`: se borra del diario."""
+        with self.conn:
+            cur = self.conn.execute("DELETE FROM outbox WHERE seq <= ?", (last_seq,))
+            self.conn.execute("""
+                UPDATE sync_state
+                   SET acked_seq = max(acked_seq, ?), last_error = NULL,
+                       last_sync = datetime('now','localtime')
+            """, (last_seq,))
+        return cur.rowcount
+
+    def failed(self, error: str) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE sync_state SET last_error = ?", (error,))
+
+    # ───────────── configuración ─────────────
+    def state(self) -> Mapping:
+        """terminal_id, central, acked_seq, last_sync, last_error."""
+        return self.conn.execute(
+            "SELECT terminal_id, central, acked_seq, last_sync, last_error "
+            "FROM sync_state"
+        ).fetchone()
+
+    def terminal_id(self) -> str:
+        return self.state()["terminal_id"]
+
+    def configure(self, *, terminal_id: str | None = None,
+                  central: str | None = None) -> None:
+        """Cambia la identidad de la terminal y/o la central ('' = ninguna)."""
+        with self.conn:
+            if terminal_id:
+                self.conn.execute("UPDATE sync_state SET terminal_id = ?",
+                                  (terminal_id,))
+            if central is not None:
+                self.conn.execute("UPDATE sync_state SET central = ?",
+                                  (central or None,))
@@ -1,16 +1,21 @@
 import sqlite3
-from typing import Sequence, Mapping
+from typing import Iterable, Sequence, Mapping
+
+from ..events import ChangeBus
 
 class PayableDAO:
-    def __init__(self, conn: sqlite3.Connection):
+    def __init__(self, conn: sqlite3.Connection, events: ChangeBus | None = None):
         self.conn = conn
+        self.events = events or ChangeBus()
 
-    def add_invoice(self, supplier_id: int, concept: str, amount: float) -> None:
-        self.conn.execute("""
+    def add_invoice(self, supplier_id: int, concept: str, amount: float) -> int:
+        cur = self.conn.execute("""
             INSERT INTO payables(supplier_id, date, concept, amount)
             VALUES (?, datetime('now','localtime'), ?, ?)
         """, (supplier_id, concept, amount))
         self.conn.commit()
+        self.events.publish("payables", [cur.lastrowid], "insert")
+        return cur.lastrowid
 
     def pay(self, payable_id: int, amount: float) -> None:
         self.conn.execute("""
@@ -18,6 +23,21 @@ class PayableDAO:
             WHERE id = ? AND paid + ? <= amount
         """, (amount, payable_id, amount))
         self.conn.commit()
+        self.events.publish("payables", [payable_id])
+
+    def get_many(self, payable_ids: Iterable[int]) -> dict[int, Mapping]:
+        """Cuentas por id, con las mismas columnas que `page()`."""
+        ids = list(payable_ids)
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        cur = self.conn.execute(f"""
+            SELECT p.id, s.name AS supplier, p.date, p.concept,
+                   p.amount, p.paid, (p.amount - p.paid) AS balance
+              FROM payables p JOIN suppliers s ON s.id = p.supplier_id
+             WHERE p.id IN ({marks})
+        """, ids)
+        return {r["id"]: r for r in cur}
 
     def list(self, pending_only: bool = False) -> Sequence[Mapping]:
         sql = """
@@ -29,3 +49,23 @@ class PayableDAO:
             sql += " WHERE p.amount > p.paid"
         sql += " ORDER BY p.id DESC"
         return self.conn.execute(sql).fetchall()
+
+    def page(self, after: int | None = None, limit: int = 100,
+             pending_only: bool = False) -> Sequence[Mapping]:
+        """Igual que `list()` pero por páginas; `after` = último id recibido."""
+        sql = """
+            SELECT p.id, s.name AS supplier, p.date, p.concept,
+                   p.amount, p.paid, (p.amount - p.paid) AS balance
+              FROM payables p JOIN suppliers s ON s.id = p.supplier_id
+        """
+        where, params = [], []
+        if after is not None:
+            where.append("p.id < ?")
+            params.append(after)
+        if pending_only:
+            where.append("p.amount > p.paid")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY p.id DESC LIMIT ?"
+        params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
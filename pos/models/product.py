@@ -1,10 +1,148 @@
 #product.py
-from typing import Sequence, Mapping
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, Sequence, Mapping, TextIO
+import csv
 import sqlite3
+import threading
+import time
+
+from ..events import ChangeBus
+
+# columnas aceptadas en la importación CSV (la cabecera define el orden)
+IMPORT_FIELDS = ("barcode", "name", "description", "unit", "price",
+                 "discount", "iva", "sku", "stock")
+
+
+class BarcodeIndex:
+    """Índice en memoria código de barras/SKU → id de producto.
+
+    Se carga completo la primera vez que se consulta y después se mantiene
+    con `put()` al dar de alta productos; `invalidate()` obliga a recargarlo
+    (p. ej. tras cambios hechos fuera del DAO).  Puede compartirse entre
+    varios ProductDAO del mismo proceso.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._barcodes: dict[str, int] | None = None
+        self._skus: dict[str, int] = {}
+
+    def _load(self, conn: sqlite3.Connection) -> None:
+        barcodes, skus = {}, {}
+        for pid, barcode, sku in conn.execute(
+            "SELECT id, barcode, sku FROM products"
+        ):
+            if barcode:
+                barcodes[barcode] = pid
+            if sku:
+                skus.setdefault(sku, pid)
+        self._barcodes, self._skus = barcodes, skus
+
+    def lookup(self, conn: sqlite3.Connection, code: str) -> int | None:
+        """Id del producto con ese código de barras (o, si no, ese SKU)."""
+        with self._lock:
+            if self._barcodes is None:
+                self._load(conn)
+            pid = self._barcodes.get(code)
+            return pid if pid is not None else self._skus.get(code)
+
+    def put(self, product_id: int, barcode: str | None, sku: str | None) -> None:
+        with self._lock:
+            if self._barcodes is None:
+                return                    # se cargará completo al consultar
+            if barcode:
+                self._barcodes[barcode] = product_id
+            if sku:
+                self._skus.setdefault(sku, product_id)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._barcodes, self._skus = None, {}
+
+
+class ProductCache:
+    """Caché LRU acotada de filas de producto indexada por id.
+
+    La invalidan ProductDAO.add() y los caminos que cambian existencias
+    (SaleDAO.create_sale, InventoryDAO.move/transfer), que reciben la misma
+    instancia.  `stats()` expone aciertos y fallos.
+
+    Entre hilos, quien lee de la base toma antes `generation()` y lo pasa a
+    `put()`: si hubo una invalidación entretanto, la fila leída puede ser
+    anterior al COMMIT que la provocó y no se guarda.
+    """
+
+    def __init__(self, maxsize: int = 2048) -> None:
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._rows: OrderedDict[int, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0              # sube con cada invalidación
+
+    def get(self, product_id: int) -> tuple | None:
+        with self._lock:
+            row = self._rows.get(product_id)
+            if row is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end(product_id)
+            self.hits += 1
+            return row
+
+    def generation(self) -> int:
+        return self._generation
+
+    def put(self, product_id: int, row: tuple, generation: int | None = None) -> None:
+        """Guarda la fila; con `generation`, solo si nada se invalidó desde
+        que se tomó (antes de leerla de la base)."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._rows[product_id] = row
+            self._rows.move_to_end(product_id)
+            while len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+
+    def invalidate(self, *product_ids: int) -> None:
+        """Descarta los ids indicados (o toda la caché si no se indica ninguno)."""
+        with self._lock:
+            self._generation += 1
+            if not product_ids:
+                self._rows.clear()
+            for pid in product_ids:
+                self._rows.pop(pid, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._rows),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
 
 class ProductDAO:
-    def __init__(self, conn: sqlite3.Connection):
+    def __init__(self, conn: sqlite3.Connection,
+                 codes: BarcodeIndex | None = None,
+                 cache: ProductCache | None = None,
+                 events: ChangeBus | None = None):
         self.conn = conn
+        self.codes = codes or BarcodeIndex()
+        self.cache = cache or ProductCache()
+        self.events = events or ChangeBus()
+        self._allocator = None
+        self._fts: str | None | bool = False   # False = aún no consultado
+
+    @property
+    def allocator(self):
+        """CodeAllocator de esta conexión (EAN-13 y SKUs nuevos)."""
+        if self._allocator is None:
+            from .codes import CodeAllocator
+            self._allocator = CodeAllocator(self.conn)
+        return self._allocator
 
     # CRUD ----------------------------------------------------------------
     def add(self, *, barcode: str, name: str, description: str = "",
@@ -18,32 +156,294 @@ class ProductDAO:
         """, (barcode, name, description, unit, price,
               discount, iva, sku, stock))
         self.conn.commit()
+        self.codes.put(cur.lastrowid, barcode, sku)
+        self.cache.invalidate(cur.lastrowid)
+        self.events.publish("products", [cur.lastrowid], "insert")
         return cur.lastrowid  # ← ID del nuevo producto
 
+    # Importación masiva ----------------------------------------------------
+    @staticmethod
+    def _csv_rows(stream: TextIO) -> Iterator[tuple[int, dict]]:
+        """Genera (nº de línea, fila normalizada) sin cargar el archivo completo."""
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {
+                (k or "").strip().lower(): (v or "").strip() for k, v in row.items()
+            }
+
+    def import_csv(self, source: str | TextIO, *, batch_size: int = 1000,
+                   warehouse_id: int = 1,
+                   progress: Callable[[int, float], None] | None = None) -> dict:
+        """Importa un catálogo CSV (cabecera con columnas de IMPORT_FIELDS).
+
+        Lee el archivo en streaming, valida unicidad de código y SKU contra
+        conjuntos precargados, inserta con `executemany` en lotes de
+        `batch_size` filas (una transacción por lote) y registra la
+        existencia inicial como movimientos de inventario en `warehouse_id`.
+        Las filas sin código de barras o sin SKU reciben uno del asignador;
+        las que traen un código dentro del rango del asignador se rechazan.
+        `progress(filas, filas_por_segundo)` se llama tras cada lote.
+
+        Devuelve {"inserted", "rejected": [(línea, motivo)], "seconds",
+        "rows_per_sec"}.
+        """
+        if isinstance(source, str):
+            with open(source, newline="", encoding="utf-8-sig") as fh:
+                return self.import_csv(fh, batch_size=batch_size,
+                                       warehouse_id=warehouse_id,
+                                       progress=progress)
+
+        from .codes import in_barcode_range, in_sku_range
+        from .inventory import InventoryDAO
+        inventory = InventoryDAO(self.conn, product_cache=self.cache)
+
+        barcodes = {r[0] for r in self.conn.execute(
+            "SELECT barcode FROM products WHERE barcode IS NOT NULL")}
+        skus = {r[0] for r in self.conn.execute(
+            "SELECT sku FROM products WHERE sku IS NOT NULL AND sku <> ''")}
+        rejected: list[tuple[int, str]] = []
+        batch: list[tuple] = []
+        inserted = 0
+        started = time.perf_counter()
+
+        def flush() -> None:
+            nonlocal inserted
+            # códigos faltantes: una reserva por lote, fuera de la transacción
+            need_bc = [r for r in batch if not r[0]]
+            need_sku = [r for r in batch if not r[7]]
+            for r, code in zip(need_bc, self.allocator.barcodes(len(need_bc))):
+                r[0] = code
+                barcodes.add(code)
+            for r, code in zip(need_sku, self.allocator.skus(len(need_sku))):
+                r[7] = code
+                skus.add(code)
+            with self.conn:
+                self.conn.executemany("""
+                    INSERT INTO products(barcode,name,description,unit,price,
+                                         discount,iva,sku,stock)
+                    VALUES (?,?,?,?,?,?,?,?,0)
+                """, [r[:8] for r in batch])
+                # un solo escritor dentro de la transacción ⇒ ids consecutivos
+                last = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                first = last - len(batch) + 1
+                moves = [(first + i, warehouse_id, r[8], "Importación")
+                         for i, r in enumerate(batch) if r[8] > 0]
+                if moves:
+                    inventory._record_many(moves)
+            for i, r in enumerate(batch):
+                self.codes.put(first + i, r[0], r[7])
+            inserted += len(batch)
+            batch.clear()
+            if progress:
+                elapsed = time.perf_counter() - started
+                progress(inserted, inserted / elapsed if elapsed else 0.0)
+
+        for line, row in self._csv_rows(source):
+            barcode, sku = row.get("barcode") or None, row.get("sku") or ""
+            if not row.get("name"):
+                rejected.append((line, "sin nombre"))
+                continue
+            if barcode and barcode in barcodes:
+                rejected.append((line, f"código repetido {barcode}"))
+                continue
+            if sku and sku in skus:
+                rejected.append((line, f"SKU repetido {sku}"))
+                continue
+            # el rango del asignador es solo suyo: un código explícito ahí
+            # chocaría con uno que reparta después
+            if barcode and in_barcode_range(barcode):
+                rejected.append((line, f"código {barcode} en el rango interno"))
+                continue
+            if sku and in_sku_range(sku):
+                rejected.append((line, f"SKU {sku} en el rango interno"))
+                continue
+            try:
+                values = [
+                    barcode, row["name"], row.get("description", ""),
+                    row.get("unit") or "pz",
+                    float(row.get("price") or 0), float(row.get("discount") or 0),
+                    float(row.get("iva") or 0), sku,
+                    float(row.get("stock") or 0),
+                ]
+            except ValueError as exc:
+                rejected.append((line, f"valor numérico inválido ({exc})"))
+                continue
+            if barcode:
+                barcodes.add(barcode)
+            if sku:
+                skus.add(sku)
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        if inserted:
+            # carga masiva: se avisa que cambió toda la tabla
+            self.events.publish("products")
+            self.events.publish("stock_levels")
+
+        seconds = time.perf_counter() - started
+        return {
+            "inserted": inserted,
+            "rejected": rejected,
+            "seconds": seconds,
+            "rows_per_sec": inserted / seconds if seconds else 0.0,
+        }
+
     # comprobación de unicidad del SKU
     def sku_exists(self, sku: str) -> bool:
         cur = self.conn.cursor()
         cur.execute("SELECT 1 FROM products WHERE sku = ? LIMIT 1", (sku,))
         return cur.fetchone() is not None
 
-    def search(self, text: str = ""):
+    # Búsqueda ------------------------------------------------------------
+    _COLUMNS = "p.id, p.barcode, p.name, p.unit, p.price, p.stock"
+
+    def find_by_code(self, code: str):
+        """Producto cuyo código de barras o SKU es exactamente `code`.
+
+        Resuelve con el índice en memoria y una lectura por clave primaria;
+        devuelve la misma tupla que `search()` o None.
+        """
+        code = code.strip()
+        if not code:
+            return None
+        pid = self.codes.lookup(self.conn, code)
+        if pid is None:
+            return None
+        row = self.get(pid)
+        if row is None:                   # borrado por fuera del DAO
+            self.codes.invalidate()
+        return row
+
+    def get(self, product_id: int):
+        """Producto por id (misma tupla que `search()`), pasando por la caché."""
+        row = self.cache.get(product_id)
+        if row is None:
+            generation = self.cache.generation()
+            found = self.conn.execute(
+                f"SELECT {self._COLUMNS} FROM products p WHERE p.id = ?",
+                (product_id,),
+            ).fetchone()
+            if found is None:
+                return None
+            row = tuple(found)
+            self.cache.put(product_id, row, generation)
+        return row
+
+    def get_many(self, product_ids: Iterable[int]) -> dict[int, tuple]:
+        """Varios productos por id; los que faltan en caché se leen en lote."""
+        result: dict[int, tuple] = {}
+        missing = []
+        for pid in dict.fromkeys(product_ids):
+            row = self.cache.get(pid)
+            if row is None:
+                missing.append(pid)
+            else:
+                result[pid] = row
+        generation = self.cache.generation()
+        for i in range(0, len(missing), 500):
+            chunk = missing[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for found in self.conn.execute(
+                f"SELECT {self._COLUMNS} FROM products p WHERE p.id IN ({marks})",
+                chunk,
+            ):
+                row = tuple(found)
+                result[row[0]] = row
+                self.cache.put(row[0], row, generation)
+        return result
+
+    def page(self, text: str = "", after: tuple[str, int] | None = None,
+             limit: int = 100):
+        """Página de productos en orden alfabético (paginación por clave).
+
+        `after` es (nombre, id) de la última fila de la página anterior.
+        """
+        where, params = [], []
+        text = text.strip()
+        if after is not None:
+            where.append("(p.name, p.id) > (?, ?)")
+            params += list(after)
+        match = self._fts_query(text) if text else None
+        if match:
+            where.append("p.id IN (SELECT rowid FROM products_fts "
+                         "WHERE products_fts MATCH ?)")
+            params.append(match)
+        elif text:
+            like = f"%{text}%"
+            where.append("(p.barcode LIKE ? OR p.name LIKE ? OR p.sku LIKE ?)")
+            params += [like, like, like]
+        sql = f"SELECT {self._COLUMNS} FROM products p"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY p.name, p.id LIMIT ?"
+        params.append(limit)
+        return [tuple(row) for row in self.conn.execute(sql, params)]
+
+    def _fts_tokenizer(self) -> str | None:
+        """'trigram', 'unicode61' o None si la base no tiene products_fts."""
+        if self._fts is False:
+            row = self.conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'products_fts'"
+            ).fetchone()
+            if row is None:
+                self._fts = None
+            else:
+                self._fts = "trigram" if "trigram" in row[0] else "unicode61"
+        return self._fts
+
+    def _fts_query(self, text: str) -> str | None:
+        """Traduce el texto a una expresión MATCH, o None si no aplica."""
+        tokenizer = self._fts_tokenizer()
+        if tokenizer == "trigram":
+            # trigram necesita al menos 3 caracteres; la frase = subcadena
+            if len(text) < 3:
+                return None
+            return '"' + text.replace('"', '""') + '"'
+        if tokenizer == "unicode61":
+            words = text.split()
+            return " ".join('"' + w.replace('"', '""') + '"*' for w in words) or None
+        return None
+
+    def search(self, text: str = "", limit: int | None = None):
+        """Busca por código de barras, nombre o SKU.
+
+        Con FTS5 los resultados van por relevancia (coincidencia exacta de
+        código primero); sin FTS5, o con textos muy cortos, se usa LIKE y
+        orden alfabético.  `limit` acota el número de filas.
+        """
         cur = self.conn.cursor()
-        if text:
+        text = text.strip()
+        lim = -1 if limit is None else limit
+        match = self._fts_query(text) if text else None
+        if match:
+            cur.execute(f"""
+                SELECT {self._COLUMNS}
+                  FROM products_fts f
+                  JOIN products p ON p.id = f.rowid
+                 WHERE products_fts MATCH ?
+              ORDER BY (p.barcode = ? OR p.sku = ?) DESC, f.rank, p.name
+                 LIMIT ?
+            """, (match, text, text, lim))
+        elif text:
             like = f"%{text}%"
-            cur.execute("""
-                SELECT id, barcode, name, unit, price, stock
-                  FROM products
+            cur.execute(f"""
+                SELECT {self._COLUMNS}
+                  FROM products p
                  WHERE barcode LIKE ? OR name LIKE ? OR sku LIKE ?
               ORDER BY name
-            """, (like, like, like))
+                 LIMIT ?
+            """, (like, like, like, lim))
         else:
-            cur.execute("""
-                SELECT id, barcode, name, unit, price, stock
-                  FROM products
+            cur.execute(f"""
+                SELECT {self._COLUMNS}
+                  FROM products p
               ORDER BY name
-            """)
+                 LIMIT ?
+            """, (lim,))
         return [tuple(row) for row in cur.fetchall()]
-    
+
     def barcode_exists(self, barcode: str) -> bool:
         cur = self.conn.cursor()
         cur.execute("SELECT 1 FROM products WHERE barcode = ? LIMIT 1", (barcode,))
@@ -0,0 +1,180 @@
+"""
+pos.models.rollup
+-----------------
+Agregados de ventas por día y por hora, mantenidos de forma incremental.
+
+`SaleDAO.create_sale` llama a `record_sale()` dentro de su transacción,
+así que los reportes leen unas pocas filas por periodo en lugar de
+recorrer `sales` y `sale_items`.  `backfill()` reconstruye todo a partir
+de las ventas, por bloques de ids.
+
+Tablas (bucket = 'AAAA-MM-DD' en las diarias, 'AAAA-MM-DD HH' en las horarias):
+    rollup_sales_{daily,hourly}    tickets e ingreso por tipo de pago
+    rollup_product_{daily,hourly}  unidades e ingreso por producto
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Callable, Optional, Sequence
+
+from ..archive import horizon as archive_horizon
+
+# largo del prefijo de `sales.date` que identifica cada periodo
+_PERIODS = {"daily": 10, "hourly": 13}
+
+
+class RollupDAO:
+    """Mantenimiento y consulta de los agregados de ventas."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    # ───────────── mantenimiento ─────────────
+    def _apply(self, where: str, params: Sequence) -> None:
+        """Suma a los agregados las ventas que cumplan `where` (sobre `s`)."""
+        for period, width in _PERIODS.items():
+            self.conn.execute(
+                f"""
+                INSERT INTO rollup_sales_{period}(bucket, payment_type, tickets, revenue)
+                SELECT substr(s.date, 1, {width}), COALESCE(s.payment_type, ''),
+                       COUNT(*), SUM(s.total)
+                  FROM sales s
+                 WHERE {where}
+              GROUP BY 1, 2
+                ON CONFLICT(bucket, payment_type) DO UPDATE
+                   SET tickets = tickets + excluded.tickets,
+                       revenue = revenue + excluded.revenue
+                """,
+                params,
+            )
+            self.conn.execute(
+                f"""
+                INSERT INTO rollup_product_{period}(bucket, product_id, units, revenue)
+                SELECT substr(s.date, 1, {width}), i.product_id, SUM(i.quantity),
+                       SUM(i.price * i.quantity * (1 - COALESCE(s.discount, 0) / 100.0))
+                  FROM sales s
+                  JOIN sale_items i ON i.sale_id = s.id
+                 WHERE {where}
+              GROUP BY 1, 2
+                ON CONFLICT(bucket, product_id) DO UPDATE
+                   SET units = units + excluded.units,
+                       revenue = revenue + excluded.revenue
+                """,
+                params,
+            )
+
+    def record_sale(self, sale_id: int) -> None:
+        """Agrega una venta recién insertada.
+
+        No abre transacción: se llama dentro de la de `create_sale`.
+        """
+        self._apply("s.id = ?", (sale_id,))
+
+    def backfill(
+        self,
+        chunk_size: int = 5000,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
+        """Reconstruye los agregados desde cero, un bloque de ventas por
+        transacción.  Devuelve el número de ventas procesadas.
+
+        Las ventas registradas mientras corre (id mayor al máximo inicial)
+        ya las agrega `create_sale`, así que no se cuentan dos veces.  Los
+        periodos ya archivados (hasta `pos.archive.horizon`) no tienen sus
+        ventas en la base viva: sus agregados se conservan tal cual.
+        """
+        horizon = archive_horizon(self.conn) or ""
+        with self.conn:
+            for period, width in _PERIODS.items():
+                for table in (f"rollup_sales_{period}", f"rollup_product_{period}"):
+                    self.conn.execute(f"DELETE FROM {table} WHERE bucket > ?",
+                                      (horizon[:width],))
+            lo, hi = self.conn.execute(
+                "SELECT MIN(id), MAX(id) FROM sales WHERE date > ?", (horizon,)
+            ).fetchone()
+        if lo is None:
+            return 0
+
+        done = 0
+        for start in range(lo, hi + 1, chunk_size):
+            end = min(start + chunk_size - 1, hi)
+            with self.conn:
+                self._apply("s.id BETWEEN ? AND ? AND s.date > ?",
+                            (start, end, horizon))
+            done = end - lo + 1
+            if progress:
+                progress(done, hi - lo + 1)
+        return done
+
+    # ───────────── consultas ─────────────
+    def sales(
+        self,
+        start: str,
+        end: str,
+        period: str = "daily",
+        by_payment: bool = False,
+    ) -> list[tuple]:
+        """Tickets e ingreso por periodo entre `start` y `end` (inclusive).
+
+        Filas (bucket, tickets, revenue) o, con `by_payment`,
+        (bucket, payment_type, tickets, revenue).
+        """
+        table = f"rollup_sales_{_check(period)}"
+        if by_payment:
+            sql = f"""
+                SELECT bucket, payment_type, tickets, revenue FROM {table}
+                 WHERE bucket BETWEEN ? AND ?
+              ORDER BY bucket, payment_type
+            """
+        else:
+            sql = f"""
+                SELECT bucket, SUM(tickets), SUM(revenue) FROM {table}
+                 WHERE bucket BETWEEN ? AND ?
+              GROUP BY bucket ORDER BY bucket
+            """
+        return [tuple(r) for r in self.conn.execute(sql, (start, _upper(end)))]
+
+    def products(
+        self,
+        start: str,
+        end: str,
+        period: str = "daily",
+        product_id: int | None = None,
+    ) -> list[tuple]:
+        """Unidades e ingreso por periodo: (bucket, product_id, units, revenue)."""
+        table = f"rollup_product_{_check(period)}"
+        sql = f"SELECT bucket, product_id, units, revenue FROM {table} " \
+              "WHERE bucket BETWEEN ? AND ?"
+        params: list = [start, _upper(end)]
+        if product_id is not None:
+            sql += " AND product_id = ?"
+            params.append(product_id)
+        sql += " ORDER BY bucket, product_id"
+        return [tuple(r) for r in self.conn.execute(sql, params)]
+
+    def top_products(self, start: str, end: str, limit: int = 10) -> list[tuple]:
+        """Productos más vendidos entre dos días: (id, nombre, unidades, ingreso)."""
+        return [tuple(r) for r in self.conn.execute(
+            """
+            SELECT r.product_id, p.name, SUM(r.units) AS units, SUM(r.revenue)
+              FROM rollup_product_daily r
+              LEFT JOIN products p ON p.id = r.product_id
+             WHERE r.bucket BETWEEN ? AND ?
+          GROUP BY r.product_id
+          ORDER BY units DESC
+             LIMIT ?
+            """,
+            (start, _upper(end), limit),
+        )]
+
+
+def _check(period: str) -> str:
+    if period not in _PERIODS:
+        raise ValueError(f"Periodo desconocido: {period}")
+    return period
+
+
+def _upper(end: str) -> str:
+    # '2025-03-31' debe incluir también los buckets horarios '2025-03-31 HH'
+    return end + "~" if len(end) < 13 else end
@@ -1,10 +1,22 @@
 # POS/models/sale.py
 import sqlite3
-from typing import Sequence, Mapping
+from typing import Iterator, Sequence, Mapping
+
+from ..events import ChangeBus
+from .outbox import OutboxDAO
+from .product import ProductCache
+from .rollup import RollupDAO
 
 class SaleDAO:
-    def __init__(self, conn: sqlite3.Connection):
+    def __init__(self, conn: sqlite3.Connection,
+                 product_cache: ProductCache | None = None,
+                 events: ChangeBus | None = None,
+                 outbox: OutboxDAO | None = None):
         self.conn, self.cur = conn, conn.cursor()
+        self.product_cache = product_cache
+        self.events = events or ChangeBus()
+        self.rollups = RollupDAO(conn)
+        self.outbox = outbox or OutboxDAO(conn)
 
     # carrito = list[dict(product_id, qty, price, discount, iva)]
     def create_sale(self, *, client_id: int | None, cart: Sequence[Mapping],
@@ -13,9 +25,18 @@ class SaleDAO:
         total *= (1 - discount_global / 100)
 
         with self.conn:          # ⇒ COMMIT o ROLLBACK automático
+            # la venta pertenece al turno abierto al confirmarse; si no hay
+            # ninguno (base nueva) se abre aquí, en la misma transacción
+            opened = self.cur.execute("""
+                INSERT INTO cash_shifts(opened, opening_amount)
+                SELECT datetime('now','localtime'), 0
+                 WHERE NOT EXISTS (SELECT 1 FROM cash_shifts WHERE closed IS NULL)
+            """).rowcount
             self.cur.execute("""
-                INSERT INTO sales(date, client_id, total, discount, paid, payment_type)
-                VALUES (datetime('now','localtime'), ?, ?, ?, ?, ?)
+                INSERT INTO sales(date, client_id, total, discount, paid, payment_type,
+                                  shift_id)
+                VALUES (datetime('now','localtime'), ?, ?, ?, ?, ?,
+                        (SELECT id FROM cash_shifts WHERE closed IS NULL))
             """, (client_id, total, discount_global, paid,
                   "contado" if paid >= total else "credito"))
             sale_id = self.cur.lastrowid
@@ -36,4 +57,53 @@ class SaleDAO:
                     UPDATE clients SET balance = balance + ? WHERE id=?
                 """, (total - paid, client_id))
 
+            # agregados para reportes (misma transacción)
+            self.rollups.record_sale(sale_id)
+            # y al diario de envío a la central
+            self.outbox.record_sale(sale_id)
+
+        pids = [it["product_id"] for it in cart]
+        if self.product_cache:
+            self.product_cache.invalidate(*pids)
+        if opened:
+            self.events.publish("cash_shifts")
+        self.events.publish("sales", [sale_id], "insert")
+        self.events.publish("products", pids)
+        if client_id and paid < total:
+            self.events.publish("clients", [client_id])
         return sale_id
+
+    def iter_items(self, start: str | None = None, end: str | None = None,
+                   chunk_size: int = 1000,
+                   history: bool = False) -> Iterator[sqlite3.Row]:
+        """Renglones de venta con su encabezado, por fecha y con `fetchmany`.
+
+        `start`/`end` son fechas 'AAAA-MM-DD' (inclusive) o fecha-hora.  Con
+        `history`, lee las vistas `history_*` de `LedgerArchive.history()`.
+        """
+        prefix = "history_" if history else ""
+        sql = f"""
+            SELECT s.id AS sale_id, s.date, s.client_id, s.payment_type,
+                   s.total, s.discount AS sale_discount, s.paid,
+                   i.product_id, p.name AS product, i.quantity, i.price,
+                   i.discount, i.iva
+              FROM {prefix}sales s
+              JOIN {prefix}sale_items i ON i.sale_id = s.id
+              LEFT JOIN products p ON p.id = i.product_id
+        """
+        where, params = [], []
+        if start:
+            where.append("s.date >= ?")
+            params.append(start)
+        if end:
+            where.append("s.date <= ?")
+            params.append(end + "~" if len(end) == 10 else end)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY s.id, i.id"
+        cur = self.conn.execute(sql, params)
+        try:
+            while rows := cur.fetchmany(chunk_size):
+                yield from rows
+        finally:
+            cur.close()
@@ -0,0 +1,112 @@
+"""
+pos.models.shift_report
+-----------------------
+Resumen del corte de caja (reporte Z) de cada turno.
+
+`CashDAO.close_shift` llama a `record()` dentro de su transacción: los
+totales por concepto y por tipo de pago salen de consultas agregadas y
+quedan guardados en `shift_reports`, así que reimprimir un corte es leer
+una fila.  Las ventas del turno son las que llevan su `shift_id` (el turno
+abierto cuando se confirmaron), así que el cierre no depende de la hora.
+El detalle de movimientos se lee aparte, por bloques (`iter_movements`);
+el texto imprimible lo arma `pos.zreport`.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any, Iterator
+
+# «Venta #123» y «Venta #124» cuentan como el mismo concepto
+_CONCEPT = """
+    CASE WHEN instr(concept, ' #') > 0
+         THEN substr(concept, 1, instr(concept, ' #') - 1)
+         ELSE concept END
+"""
+
+
+class ShiftReportDAO:
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def record(self, shift_id: int) -> dict[str, Any]:
+        """Calcula y guarda el resumen del turno (sin abrir transacción)."""
+        shift = self.conn.execute(
+            "SELECT id, opened, closed, opening_amount, total FROM cash_shifts "
+            "WHERE id = ?", (shift_id,)
+        ).fetchone()
+        if shift is None:
+            raise ValueError(f"No existe el turno {shift_id}")
+        moves = self.conn.execute("""
+            SELECT COUNT(*),
+                   COALESCE(SUM(CASE WHEN amount > 0 THEN amount END), 0),
+                   COALESCE(SUM(CASE WHEN amount < 0 THEN amount END), 0)
+              FROM cash_movements WHERE shift_id = ?
+        """, (shift_id,)).fetchone()
+        by_concept = self.conn.execute(f"""
+            SELECT {_CONCEPT} AS concept, COUNT(*), SUM(amount)
+              FROM cash_movements WHERE shift_id = ?
+          GROUP BY 1 ORDER BY 1
+        """, (shift_id,)).fetchall()
+        by_payment = self.conn.execute("""
+            SELECT COALESCE(payment_type, ''), COUNT(*), SUM(total), SUM(paid)
+              FROM sales WHERE shift_id = ?
+          GROUP BY 1 ORDER BY 1
+        """, (shift_id,)).fetchall()
+
+        summary = {
+            "shift_id": shift["id"],
+            "opened": shift["opened"],
+            "closed": shift["closed"],
+            "opening_amount": shift["opening_amount"],
+            "total": shift["total"],
+            "movements": moves[0],
+            "cash_in": moves[1],
+            "cash_out": moves[2],
+            "sales_count": sum(r[1] for r in by_payment),
+            "sales_total": sum(r[2] for r in by_payment),
+            "by_concept": [list(r) for r in by_concept],
+            "by_payment": [list(r) for r in by_payment],
+        }
+        self.conn.execute("""
+            INSERT OR REPLACE INTO shift_reports(
+                shift_id, generated, opened, closed, opening_amount, total,
+                movements, cash_in, cash_out, sales_count, sales_total,
+                by_concept, by_payment)
+            VALUES (:shift_id, datetime('now','localtime'), :opened, :closed,
+                    :opening_amount, :total, :movements, :cash_in, :cash_out,
+                    :sales_count, :sales_total, :by_concept_json, :by_payment_json)
+        """, {**summary,
+              "by_concept_json": json.dumps(summary["by_concept"], ensure_ascii=False),
+              "by_payment_json": json.dumps(summary["by_payment"], ensure_ascii=False)})
+        return self.get(shift_id)
+
+    def get(self, shift_id: int) -> dict[str, Any] | None:
+        """Resumen guardado, o None si el turno no tiene corte."""
+        row = self.conn.execute(
+            "SELECT * FROM shift_reports WHERE shift_id = ?", (shift_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        summary = dict(row)
+        summary["by_concept"] = json.loads(summary["by_concept"])
+        summary["by_payment"] = json.loads(summary["by_payment"])
+        return summary
+
+    def last_shift_id(self) -> int | None:
+        """Último turno con corte (para reimprimir)."""
+        row = self.conn.execute("SELECT MAX(shift_id) FROM shift_reports").fetchone()
+        return row[0]
+
+    def iter_movements(self, shift_id: int,
+                       chunk_size: int = 1000) -> Iterator[sqlite3.Row]:
+        """Movimientos del turno en orden, leídos con `fetchmany`."""
+        cur = self.conn.execute(
+            "SELECT id, date, concept, amount FROM cash_movements "
+            "WHERE shift_id = ? ORDER BY id", (shift_id,))
+        try:
+            while rows := cur.fetchmany(chunk_size):
+                yield from rows
+        finally:
+            cur.close()
@@ -1,17 +1,21 @@
 import sqlite3
 from typing import Sequence, Mapping
 
+from ..events import ChangeBus
+
 class SupplierDAO:
-    def __init__(self, conn: sqlite3.Connection):
+    def __init__(self, conn: sqlite3.Connection, events: ChangeBus | None = None):
         self.conn = conn
+        self.events = events or ChangeBus()
 
     def add(self, *, legal_id: str, name: str,
             phone: str = "", email: str = "", bank_info: str = ""):
-        self.conn.execute("""
+        cur = self.conn.execute("""
             INSERT INTO suppliers(legal_id, name, phone, email, bank_info)
             VALUES (?,?,?,?,?)
         """, (legal_id, name, phone, email, bank_info))
         self.conn.commit()
+        self.events.publish("suppliers", [cur.lastrowid], "insert")
 
     def list(self) -> Sequence[Mapping]:
         return self.conn.execute("""
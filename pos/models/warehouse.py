@@ -1,14 +1,18 @@
 import sqlite3
 from typing import Sequence, Mapping
 
+from ..events import ChangeBus
+
 class WarehouseDAO:
-    def __init__(self, conn: sqlite3.Connection):
+    def __init__(self, conn: sqlite3.Connection, events: ChangeBus | None = None):
         self.conn = conn
+        self.events = events or ChangeBus()
 
     def add(self, name: str, location: str = "") -> None:
-        self.conn.execute("INSERT INTO warehouses(name, location) VALUES (?,?)",
-                          (name, location))
+        cur = self.conn.execute("INSERT INTO warehouses(name, location) VALUES (?,?)",
+                                (name, location))
         self.conn.commit()
+        self.events.publish("warehouses", [cur.lastrowid], "insert")
 
     def list(self) -> Sequence[Mapping]:
         return self.conn.execute("SELECT id, name, location FROM warehouses").fetchall()
@@ -0,0 +1,316 @@
+"""
+pos.sync
+--------
+Sincronización de terminales con una base central.
+
+Cada terminal cobra contra su propio `pos.db`; lo que confirma (ventas,
+movimientos de inventario y de caja) queda además en su diario `outbox`
+(ver `pos.models.outbox`).  `SyncWorker` lo envía en segundo plano, en
+lotes JSON comprimidos con zlib, y borra del diario lo que la central
+confirma.  Sin red la terminal sigue vendiendo: el diario crece y se vacía
+al reconectar.
+
+La central de este módulo es un archivo SQLite (`CentralStore`); el envío
+es cualquier función `send(lote: bytes) -> acuse`, así que cambiarla por
+un servicio remoto no toca a la terminal.  Aplicar un lote es idempotente:
+cada evento tiene clave (terminal, seq) y se inserta con INSERT OR IGNORE,
+de modo que reenviar un lote cuyo acuse se perdió no duplica nada.
+
+    python -m pos.cli sync-config --terminal caja1 --central /srv/central.db
+    python -m pos.cli sync            # un envío ahora
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+import threading
+import zlib
+from typing import Any, Callable, Mapping, Sequence
+
+from .db import ConnectionFactory
+from .models.outbox import OutboxDAO
+
+BATCH_SIZE = 500
+PROTOCOL = 1
+
+Send = Callable[[bytes], Mapping[str, Any]]
+
+
+# ───────────────────────── formato del lote ─────────────────────────
+def encode_batch(terminal_id: str, rows: Sequence[Mapping]) -> bytes:
+    """Filas de `OutboxDAO.pending()` → lote comprimido.
+
+    Los payload ya son JSON: se insertan tal cual en lugar de leerlos y
+    volver a serializarlos.
+    """
+    events = ",".join(
+        f"[{r['seq']},{json.dumps(r['kind'])},{r['ref_id']},"
+        f"{json.dumps(r['created'])},{r['payload']}]"
+        for r in rows
+    )
+    body = f'{{"v": {PROTOCOL}, "terminal": {json.dumps(terminal_id)}, "events": [{events}]}}'
+    return zlib.compress(body.encode("utf-8"))
+
+
+def decode_batch(blob: bytes) -> dict[str, Any]:
+    batch = json.loads(zlib.decompress(blob))
+    if batch.get("v") != PROTOCOL:
+        raise ValueError(f"Versión de lote no soportada: {batch.get('v')!r}")
+    return batch
+
+
+# ───────────────────────── central ─────────────────────────
+_CENTRAL_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS terminals(
+           terminal_id TEXT PRIMARY KEY,
+           last_seq    INTEGER NOT NULL DEFAULT 0,
+           last_seen   TEXT
+       )""",
+    """CREATE TABLE IF NOT EXISTS journal(
+           terminal_id TEXT NOT NULL,
+           seq         INTEGER NOT NULL,
+           kind        TEXT NOT NULL,
+           ref_id      INTEGER NOT NULL,
+           created     TEXT,
+           received    TEXT NOT NULL,
+           PRIMARY KEY(terminal_id, seq)
+       ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS sales(
+           terminal_id TEXT NOT NULL, id INTEGER NOT NULL,
+           date TEXT, client_id INTEGER, total REAL, discount REAL,
+           paid REAL, payment_type TEXT,
+           PRIMARY KEY(terminal_id, id)
+       ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS sale_items(
+           terminal_id TEXT NOT NULL, id INTEGER NOT NULL,
+           sale_id INTEGER, product_id INTEGER, quantity REAL, price REAL,
+           discount REAL, iva REAL,
+           PRIMARY KEY(terminal_id, id)
+       ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS stock_movements(
+           terminal_id TEXT NOT NULL, id INTEGER NOT NULL,
+           date TEXT, product_id INTEGER, warehouse_id INTEGER, qty REAL,
+           concept TEXT,
+           PRIMARY KEY(terminal_id, id)
+       ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS cash_movements(
+           terminal_id TEXT NOT NULL, id INTEGER NOT NULL,
+           date TEXT, concept TEXT, amount REAL, shift_id INTEGER,
+           PRIMARY KEY(terminal_id, id)
+       ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_central_items_product ON sale_items(product_id)",
+    "CREATE INDEX IF NOT EXISTS idx_central_moves_product "
+    "ON stock_movements(product_id)",
+)
+
+# tipo de evento → (tabla, columnas del payload)
+_TABLES = {
+    "sale": ("sales", ("id", "date", "client_id", "total", "discount",
+                       "paid", "payment_type")),
+    "stock_movement": ("stock_movements", ("id", "date", "product_id",
+                                           "warehouse_id", "qty", "concept")),
+    "cash_movement": ("cash_movements", ("id", "date", "concept", "amount",
+                                         "shift_id")),
+}
+_ITEM_COLUMNS = ("id", "sale_id", "product_id", "quantity", "price", "discount", "iva")
+
+
+def _insert_sql(table: str, columns: Sequence[str]) -> str:
+    marks = ",".join("?" * (len(columns) + 1))
+    return (f"INSERT OR IGNORE INTO {table}(terminal_id, {', '.join(columns)}) "
+            f"VALUES ({marks})")
+
+
+class CentralStore:
+    """Base central que recibe los lotes de todas las terminales.
+
+    Es segura entre hilos (una conexión protegida por un candado), así que
+    `receive` puede pasarse directamente como `send` de un `SyncWorker`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = wal")
+        self.conn.execute("PRAGMA synchronous = normal")
+        self.conn.execute("PRAGMA busy_timeout = 5000")
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            for sql in _CENTRAL_SCHEMA:
+                self.conn.execute(sql)
+
+    def receive(self, blob: bytes) -> dict[str, Any]:
+        """Aplica un lote comprimido y devuelve el acuse."""
+        return self.apply(decode_batch(blob))
+
+    def apply(self, batch: Mapping[str, Any]) -> dict[str, Any]:
+        terminal, events = batch["terminal"], batch["events"]
+        applied = 0
+        with self._lock, self.conn:
+            for seq, kind, ref_id, created, payload in events:
+                cur = self.conn.execute("""
+                    INSERT OR IGNORE INTO journal(terminal_id, seq, kind, ref_id,
+                                                  created, received)
+                    VALUES (?,?,?,?,?, datetime('now','localtime'))
+                """, (terminal, seq, kind, ref_id, created))
+                if cur.rowcount == 0:
+                    continue                  # ya aplicado (reenvío)
+                self._apply_event(terminal, kind, payload)
+                applied += 1
+            last_seq = max((e[0] for e in events), default=0)
+            self.conn.execute("""
+                INSERT INTO terminals(terminal_id, last_seq, last_seen)
+                VALUES (?, ?, datetime('now','localtime'))
+                ON CONFLICT(terminal_id) DO UPDATE
+                   SET last_seq = max(last_seq, excluded.last_seq),
+                       last_seen = excluded.last_seen
+            """, (terminal, last_seq))
+        return {"terminal": terminal, "last_seq": last_seq,
+                "applied": applied, "duplicates": len(events) - applied}
+
+    def _apply_event(self, terminal: str, kind: str, payload: Mapping) -> None:
+        if kind not in _TABLES:
+            raise ValueError(f"Tipo de evento desconocido: {kind!r}")
+        table, columns = _TABLES[kind]
+        self.conn.execute(_insert_sql(table, columns),
+                          (terminal, *(payload.get(c) for c in columns)))
+        if kind == "sale":
+            # los renglones viajan dentro de la venta, sin su sale_id
+            items = [{**it, "sale_id": payload["id"]} for it in payload.get("items") or ()]
+            self.conn.executemany(
+                _insert_sql("sale_items", _ITEM_COLUMNS),
+                [(terminal, *(it.get(c) for c in _ITEM_COLUMNS)) for it in items],
+            )
+
+    # ───────────── consultas ─────────────
+    def terminals(self) -> list[sqlite3.Row]:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT terminal_id, last_seq, last_seen FROM terminals "
+                "ORDER BY terminal_id").fetchall()
+
+    def stock(self, product_ids: Sequence[int] | None = None) -> dict[int, float]:
+        """Existencia consolidada: movimientos de todas las terminales menos
+        lo vendido (las ventas descuentan sin movimiento de inventario)."""
+        where, params = "", list(product_ids or ())
+        if product_ids:
+            where = f"WHERE product_id IN ({','.join('?' * len(params))})"
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT product_id, SUM(qty) FROM (
+                    SELECT product_id, qty FROM stock_movements
+                    UNION ALL
+                    SELECT product_id, -quantity FROM sale_items
+                ) {where}
+              GROUP BY product_id
+            """, params).fetchall()
+        return {pid: float(qty or 0) for pid, qty in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+# ───────────────────────── terminal ─────────────────────────
+def sync_once(outbox: OutboxDAO, send: Send, batch_size: int = BATCH_SIZE) -> int:
+    """Envía todo lo pendiente, lote por lote; devuelve cuántos eventos.
+
+    Un fallo de envío queda anotado en `sync_state.last_error` y se propaga;
+    lo ya confirmado no se vuelve a enviar.
+    """
+    terminal_id = outbox.terminal_id()
+    sent = 0
+    while rows := outbox.pending(batch_size):
+        try:
+            ack = send(encode_batch(terminal_id, rows))
+        except Exception as exc:
+            outbox.failed(f"{type(exc).__name__}: {exc}")
+            raise
+        last_seq = rows[-1]["seq"]
+        if ack.get("terminal") != terminal_id or ack.get("last_seq") != last_seq:
+            outbox.failed(f"Acuse inesperado: {dict(ack)!r}")
+            raise RuntimeError(f"Acuse inesperado de la central: {dict(ack)!r}")
+        outbox.ack(last_seq)
+        sent += len(rows)
+    return sent
+
+
+class SyncWorker:
+    """Hilo que vacía el diario hacia la central cada `interval` segundos.
+
+    `wake()` adelanta el siguiente envío (la aplicación lo llama al cobrar);
+    tras un error espera el doble, hasta `max_backoff`.  `stop()` hace un
+    último envío antes de terminar.
+
+    Con `connect` en lugar de `send`, el envío se obtiene dentro del hilo
+    y se reintenta con la misma espera si falla: una central inaccesible
+    nunca impide arrancar la terminal, que sigue vendiendo contra su diario.
+    """
+
+    def __init__(self, factory: ConnectionFactory, send: Send | None = None,
+                 interval: float = 5.0, batch_size: int = BATCH_SIZE,
+                 max_backoff: float = 300.0, *,
+                 connect: Callable[[], Send] | None = None) -> None:
+        if send is None and connect is None:
+            raise ValueError("Se necesita send o connect")
+        self.factory, self.send, self._connect = factory, send, connect
+        self.interval, self.batch_size = interval, batch_size
+        self.max_backoff = max_backoff
+        self.sent = 0                      # eventos enviados desde que arrancó
+        self.last_error: str | None = None
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="pos-sync", daemon=True)
+
+    @classmethod
+    def from_config(cls, factory: ConnectionFactory,
+                    **options: Any) -> SyncWorker | None:
+        """Worker hacia la central de `sync_state`, o None si no hay una.
+
+        La central se abre en el hilo del worker, no aquí.
+        """
+        with factory.connection() as conn:
+            central = OutboxDAO(conn).state()["central"]
+        if not central:
+            return None
+        return cls(factory, connect=lambda: CentralStore(central).receive, **options)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        outbox = OutboxDAO(self.factory.get())
+        delay = self.interval
+        try:
+            while True:
+                try:
+                    if self.send is None:
+                        try:
+                            self.send = self._connect()
+                        except Exception as exc:
+                            outbox.failed(f"{type(exc).__name__}: {exc}")
+                            raise
+                    self.sent += sync_once(outbox, self.send, self.batch_size)
+                    self.last_error, delay = None, self.interval
+                except Exception as exc:
+                    if self.last_error is None:
+                        print(f"sync: {exc}", file=sys.stderr)
+                    self.last_error = str(exc)
+                    delay = min(delay * 2, self.max_backoff)
+                if self._stopping:
+                    break
+                self._wake.wait(delay)
+                self._wake.clear()
+        finally:
+            self.factory.release()
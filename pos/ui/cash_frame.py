@@ -1,12 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
+from types import SimpleNamespace
+from .. import zreport
 from ..models.cash import CashDAO
+from .change_feed import TkChangeFeed
+from .db_executor import DBExecutor, InlineExecutor
+from .paged_tree import PagedTree
 
 class CashFrame(ttk.Frame):
-    def __init__(self, parent, dao: CashDAO):
+    def __init__(self, parent, dao: CashDAO, feed: TkChangeFeed | None = None,
+                 executor: DBExecutor | None = None):
         super().__init__(parent)
-        self.dao = dao
+        self.dao, self.feed = dao, feed
+        self.executor = executor or InlineExecutor(SimpleNamespace(cash=dao))
         self._build(); self._load()
+        if feed:
+            feed.subscribe(self._on_movements, "cash_movements")
+            feed.subscribe(self._on_shifts, "cash_shifts")
 
     def _build(self):
         bar=ttk.Frame(self); bar.pack(fill="x",pady=4)
@@ -14,20 +24,40 @@ class CashFrame(ttk.Frame):
         ttk.Button(bar,text="- Salida", command=lambda:self._add(-1)).pack(side="left")
         ttk.Button(bar,text="Arqueo", command=self._arqueo).pack(side="left")
         ttk.Button(bar,text="Cerrar turno", command=self._close_shift).pack(side="left")
+        ttk.Button(bar,text="Reimprimir corte", command=self._reprint).pack(side="left")
         self.lbl_total=ttk.Label(bar,text="Total turno: 0.00")
         self.lbl_total.pack(side="right")
 
         cols=("ID","Fecha","Concepto","Monto")
-        self.tree=ttk.Treeview(self,columns=cols,show="headings")
+        self.table=PagedTree(self,cols,fetch=self.dao.page,key=lambda r:r["id"],
+            values=lambda r:(r["id"], r["date"], r["concept"], f"{r['amount']:.2f}"),
+            iid=lambda r:r["id"], descending=True)
+        self.tree=self.table.tree
         for c in cols: self.tree.heading(c,text=c)
-        self.tree.pack(fill="both",expand=True,padx=6,pady=6)
+        self.table.pack(fill="both",expand=True,padx=6,pady=6)
 
     def _load(self):
-        self.tree.delete(*self.tree.get_children())
-        for r in self.dao.list():
-            self.tree.insert("", "end",
-                values=(r["id"], r["date"], r["concept"], f"{r['amount']:.2f}"))
-        self.lbl_total["text"]=f"Total turno: {self.dao.total_shift():.2f}"
+        self.shift_id=self.dao.current_shift_id()
+        self.table.reload()
+        self._show_total()
+
+    def _show_total(self):
+        self.lbl_total["text"]=f"Total turno: {self.dao.total_shift(self.shift_id):.2f}"
+
+    # -------- avisos de cambios (solo filas nuevas y total) ----------
+    def _on_movements(self, _table, ids):
+        if ids is None:
+            self.feed.refresh_when_visible(self,self._load); return
+        self.table.upsert(self.dao.get_many(ids).values())
+
+    def _on_shifts(self, _table, ids):
+        if ids is None or self.dao.current_shift_id()!=self.shift_id:
+            self.feed.refresh_when_visible(self,self._load)   # turno nuevo
+        elif self.shift_id in ids:
+            self._show_total()
+
+    def _after_write(self):
+        if self.feed is None: self._load()
 
     def _add(self, sign: int):
         concept=simpledialog.askstring("Concepto","Descripción:",parent=self)
@@ -35,7 +65,7 @@ class CashFrame(ttk.Frame):
         try:
             amount=float(simpledialog.askstring("Monto","Monto:",parent=self))
             self.dao.add(concept, sign*amount)
-            self._load()
+            self._after_write()
         except Exception as e:
             messagebox.showerror("Error",str(e))
 
@@ -48,14 +78,27 @@ class CashFrame(ttk.Frame):
             f"Contado físico: {contado:.2f}\n"
             f"Diferencia: {diferencia:+.2f}")
 
+    # -------- corte Z (en el hilo de BD: el detalle puede ser largo) ----------
     def _close_shift(self):
-        fname, total = self.dao.close_shift()
-        # genera imprimible muy simple
-        with open(fname, "w", encoding="utf8") as f:
-            f.write("CORTE DE CAJA\n")
-            for mov in self.dao.list():
-                f.write(f"{mov['date']}  {mov['concept']:<20} {mov['amount']:>8.2f}\n")
-            f.write(f"\nTOTAL: {total:.2f}\n")
-        messagebox.showinfo("Corte generado", f"Archivo {fname} listo para imprimir")
-        self._load()
-        
+        if not messagebox.askyesno("Cerrar turno","¿Cerrar el turno actual?",parent=self):
+            return
+        def run(d):
+            sid = d.cash.close_shift()
+            return zreport.save_report(d.cash.reports, sid)
+        self.executor.submit(run, on_done=self._report_ready,
+                             on_error=lambda e: messagebox.showerror("Error",str(e)))
+
+    def _reprint(self):
+        last = self.dao.reports.last_shift_id()
+        sid = simpledialog.askinteger("Reimprimir corte","Turno:",parent=self,
+                                      initialvalue=last, minvalue=1)
+        if not sid: return
+        self.executor.submit(
+            lambda d: zreport.save_report(d.cash.reports, sid, details=False, reprint=True),
+            on_done=self._report_ready,
+            on_error=lambda e: messagebox.showerror("Error",str(e)))
+
+    def _report_ready(self, path):
+        messagebox.showinfo("Corte generado", f"Archivo {path} listo para imprimir")
+        self._after_write()
+
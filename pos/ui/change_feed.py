@@ -0,0 +1,81 @@
+"""
+pos.ui.change_feed
+------------------
+Lleva al hilo de Tk los avisos del `ChangeBus` (que pueden publicarse desde
+el hilo de base de datos) y los reparte a los frames.
+
+Los avisos se acumulan en una cola y se entregan cada `poll_ms` agrupados
+por tabla: varias escrituras seguidas a la misma tabla llegan como un solo
+aviso `callback(table, ids)` con la unión de ids, o `ids=None` si alguna
+afectó a toda la tabla.
+
+`refresh_when_visible(widget, fn)` sirve para lo que no se puede parchar
+fila a fila: ejecuta `fn` ya si el widget está a la vista, o la primera vez
+que se muestre (pestaña sin abrir, o abierta pero oculta).
+"""
+
+from __future__ import annotations
+
+import queue
+import tkinter as tk
+from typing import Callable, Optional
+
+from ..events import Change, ChangeBus
+
+Callback = Callable[[str, Optional[frozenset]], None]
+
+
+class TkChangeFeed:
+    def __init__(self, widget: tk.Misc, bus: ChangeBus, poll_ms: int = 50) -> None:
+        self.widget, self.bus, self.poll_ms = widget, bus, poll_ms
+        self._queue: queue.SimpleQueue[Change] = queue.SimpleQueue()
+        self._subs: list[tuple[frozenset[str], Callback]] = []
+        self._on_show: dict[tk.Misc, list[Callable[[], None]]] = {}
+        self.bus.subscribe(self._queue.put)
+        self.widget.after(self.poll_ms, self._poll)
+
+    def subscribe(self, callback: Callback, *tables: str) -> None:
+        """`callback(table, ids)` en el hilo de Tk; ids=None = toda la tabla."""
+        self._subs.append((frozenset(tables), callback))
+
+    def refresh_when_visible(self, widget: tk.Misc, fn: Callable[[], None]) -> None:
+        if widget.winfo_ismapped():
+            fn()
+            return
+        pending = self._on_show.get(widget)
+        if pending is None:
+            pending = self._on_show[widget] = []
+            widget.bind("<Map>", lambda _e, w=widget: self._shown(w), add="+")
+        if fn not in pending:
+            pending.append(fn)
+
+    # ─────────────────────── internals ─────────────────────
+    def _shown(self, widget: tk.Misc) -> None:
+        pending = self._on_show.get(widget)
+        while pending:
+            pending.pop(0)()
+
+    def _poll(self) -> None:
+        merged: dict[str, Optional[set]] = {}
+        while True:
+            try:
+                change = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            ids = merged.setdefault(change.table, set())
+            if ids is None:
+                continue
+            if change.ids:
+                ids.update(change.ids)
+            else:
+                merged[change.table] = None
+        for table, ids in merged.items():
+            frozen = None if ids is None else frozenset(ids)
+            for tables, callback in self._subs:
+                if table in tables:
+                    try:
+                        callback(table, frozen)
+                    except Exception as exc:
+                        self.widget.report_callback_exception(
+                            type(exc), exc, exc.__traceback__)
+        self.widget.after(self.poll_ms, self._poll)
@@ -2,31 +2,47 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from ..models.client import ClientDAO
+from .change_feed import TkChangeFeed
+from .paged_tree import PagedTree
 
 class ClientFrame(ttk.Frame):
-    def __init__(self, parent: tk.Misc, dao: ClientDAO):
+    def __init__(self, parent: tk.Misc, dao: ClientDAO,
+                 feed: TkChangeFeed | None = None):
         super().__init__(parent)
-        self.dao = dao
+        self.dao, self.feed = dao, feed
         self._build()
         self._load()
+        if feed: feed.subscribe(self._on_change, "clients")
 
     def _build(self):
         bar = ttk.Frame(self); bar.pack(fill="x", pady=4)
         ttk.Button(bar, text="Nuevo cliente", command=self._open_add).pack(side="right")
 
         cols = ("ID", "Nombre", "Teléfono", "Email", "Saldo")
-        self.tree = ttk.Treeview(self, columns=cols, show="headings")
+        self.table = PagedTree(self, cols, fetch=self.dao.page,
+                               key=lambda r: (r["name"], r["id"]),
+                               iid=lambda r: r["id"])
+        self.tree = self.table.tree
         for c in cols: self.tree.heading(c, text=c); self.tree.column(c, anchor="center")
-        self.tree.pack(fill="both", expand=True, padx=6, pady=6)
+        self.table.pack(fill="both", expand=True, padx=6, pady=6)
 
     def _load(self):
-        self.tree.delete(*self.tree.get_children())
-        for row in self.dao.list():
-            self.tree.insert("", "end", values=tuple(row))
+        self.table.reload()
+
+    def _on_change(self, _table, ids):
+        """Parcha solo las filas avisadas (alta de cliente, saldo por venta)."""
+        if ids is None:
+            self.feed.refresh_when_visible(self, self._load); return
+        rows = self.dao.get_many(ids)
+        self.table.remove(ids - rows.keys())
+        self.table.upsert(rows.values())
+
+    def _after_write(self):
+        if self.feed is None: self._load()
 
     # -------- ventana emergente ----------
     def _open_add(self):
-        AddClientWindow(self, self.dao, on_save=self._load)
+        AddClientWindow(self, self.dao, on_save=self._after_write)
 
 class AddClientWindow(tk.Toplevel):
     def __init__(self, master, dao: ClientDAO, on_save):
@@ -58,9 +74,7 @@ class AddClientWindow(tk.Toplevel):
                 credit_limit=float(d["credit_limit"] or 0),
             )
 
-            self.on_save()             
-            # --- avisa a toda la app que hay un cliente nuevo ---
-            self.winfo_toplevel().event_generate("<<ClientAdded>>", when="tail")
+            self.on_save()             # el DAO ya avisó del alta al resto de la app
             self.destroy()
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -0,0 +1,172 @@
+"""
+pos.ui.db_executor
+------------------
+Ejecuta llamadas a los DAOs en un hilo de trabajo para que el bucle de Tk
+no se congele durante cargas grandes o cobros.
+
+El hilo abre su propia conexión (vía `ConnectionFactory`) y su propio
+juego de DAOs, construido con la función `build_daos(conn)` que entrega la
+aplicación.  Los resultados vuelven al hilo de Tk por una cola que se
+revisa con `after()`; ahí se llaman `on_done` / `on_error`.  Si el hilo no
+logra abrir la conexión o construir los DAOs, cada petición termina con
+ese error (queda también en `startup_error`) en lugar de quedar colgada.
+
+    executor.submit(
+        lambda d: d.inventory.warehouse_stock(wid),
+        on_done=self._fill,
+        key="inventory.load",      # una petición nueva reemplaza a la anterior
+    )
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from ..db import ConnectionFactory
+
+
+class _Job:
+    __slots__ = ("future", "fn", "on_done", "on_error", "key")
+
+    def __init__(self, fn, on_done, on_error, key) -> None:
+        self.future: Future = Future()
+        self.fn, self.on_done, self.on_error, self.key = fn, on_done, on_error, key
+
+
+class DBExecutor:
+    """Hilo único de base de datos con entrega de resultados en el hilo de Tk."""
+
+    def __init__(
+        self,
+        widget: tk.Misc,
+        factory: ConnectionFactory,
+        build_daos: Callable[[Any], Any],
+        poll_ms: int = 10,
+    ) -> None:
+        self.widget, self.factory, self.build_daos = widget, factory, build_daos
+        self.poll_ms = poll_ms
+        self._jobs: queue.SimpleQueue[Optional[_Job]] = queue.SimpleQueue()
+        self._done: queue.SimpleQueue[_Job] = queue.SimpleQueue()
+        self._latest: dict[str, Future] = {}   # última petición por clave
+        self._pending = 0
+        self._polling = False
+        self.startup_error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, name="pos-db", daemon=True)
+        self._thread.start()
+
+    # ───────────────────────── API ─────────────────────────
+    def submit(
+        self,
+        fn: Callable[[Any], Any],
+        *,
+        on_done: Callable[[Any], None] | None = None,
+        on_error: Callable[[BaseException], None] | None = None,
+        key: str | None = None,
+    ) -> Future:
+        """Encola `fn(daos)`; debe llamarse desde el hilo de Tk.
+
+        Con `key`, la petición previa con la misma clave se cancela si aún
+        no empezó, y si ya empezó su resultado se descarta.
+        """
+        job = _Job(fn, on_done, on_error, key)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self._latest[key] = job.future
+        self._pending += 1
+        self._jobs.put(job)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+        return job.future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Detiene el hilo después de terminar lo ya encolado."""
+        self._jobs.put(None)
+        if wait:
+            self._thread.join()
+
+    # ─────────────────────── internals ─────────────────────
+    def _run(self) -> None:
+        daos = None
+        try:
+            daos = self.build_daos(self.factory.get())
+        except BaseException as exc:
+            self.startup_error = exc
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                if job.future.set_running_or_notify_cancel():
+                    if self.startup_error is not None:
+                        job.future.set_exception(self.startup_error)
+                    else:
+                        try:
+                            job.future.set_result(job.fn(daos))
+                        except BaseException as exc:
+                            job.future.set_exception(exc)
+                self._done.put(job)
+        finally:
+            self.factory.release()
+
+    def _poll(self) -> None:
+        while True:
+            try:
+                job = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            self._deliver(job)
+        if self._pending:
+            self.widget.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _deliver(self, job: _Job) -> None:
+        if job.key is not None:
+            if self._latest.get(job.key) is not job.future:
+                return                       # reemplazada por otra más nueva
+            del self._latest[job.key]
+        if job.future.cancelled():
+            return
+        exc = job.future.exception()
+        if exc is None:
+            if job.on_done:
+                job.on_done(job.future.result())
+        elif job.on_error:
+            job.on_error(exc)
+        else:
+            self.widget.report_callback_exception(type(exc), exc, exc.__traceback__)
+
+
+class InlineExecutor:
+    """Misma interfaz que DBExecutor pero ejecutando en el hilo actual.
+
+    Sirve para frames construidos sin ejecutor (pruebas, scripts).
+    """
+
+    def __init__(self, daos: Any) -> None:
+        self.daos = daos
+
+    def submit(self, fn, *, on_done=None, on_error=None, key=None) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(self.daos))
+        except Exception as exc:
+            future.set_exception(exc)
+            if on_error is None:
+                raise
+            on_error(exc)
+        else:
+            if on_done:
+                on_done(future.result())
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        pass
@@ -0,0 +1,110 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from ..instrument import Profiler
+
+class DiagnosticsFrame(ttk.Frame):
+    """Pestaña Diagnóstico: métodos DAO, sentencias SQL, consultas lentas
+    y tiempos de arranque."""
+
+    def __init__(self, parent, profiler: Profiler | None, startup: dict | None = None):
+        super().__init__(parent); self.profiler=profiler
+        self.startup=startup or {}      # fase → ms (lo mantiene la aplicación)
+        self._rows={}                   # iid → fila del informe (para el detalle)
+        if profiler is None:
+            # sin medición de SQL, los tiempos de arranque se ven igual
+            ttk.Label(self,text="Medición desactivada en esta sesión "
+                      "(iniciar con --profile para activarla)").pack(pady=10)
+            tabs=ttk.Notebook(self); tabs.pack(fill="both",expand=True,padx=6)
+            self.tree_start=self._table(tabs,"Arranque",("Fase","ms"))
+            self.bind("<Map>", lambda e: self._load_startup())
+            return
+        self._build(); self._load()
+        self.bind("<Map>", lambda e: self._load())
+
+    def _build(self):
+        bar=ttk.Frame(self); bar.pack(fill="x",pady=4)
+        ttk.Button(bar,text="Actualizar",command=self._load).pack(side="left")
+        ttk.Button(bar,text="Reiniciar",command=self._reset).pack(side="left")
+        ttk.Button(bar,text="Guardar informe…",command=self._dump).pack(side="left")
+        self.var_on=tk.BooleanVar(value=self.profiler.enabled)
+        ttk.Checkbutton(bar,text="Medir",variable=self.var_on,
+                        command=self._toggle).pack(side="left",padx=8)
+        ttk.Label(bar,text="Lenta desde (ms):").pack(side="left")
+        self.var_slow=tk.StringVar(value=f"{self.profiler.slow_ms:g}")
+        ent=ttk.Entry(bar,textvariable=self.var_slow,width=6); ent.pack(side="left")
+        ent.bind("<Return>",lambda e:self._set_slow())
+        self.lbl_since=ttk.Label(bar); self.lbl_since.pack(side="right")
+
+        tabs=ttk.Notebook(self); tabs.pack(fill="both",expand=True,padx=6)
+        self.tree_methods=self._table(tabs,"Métodos DAO",
+            ("Método","Llamadas","SQL/llamada","Total ms","Media ms","Máx ms"))
+        self.tree_sql=self._table(tabs,"Sentencias",
+            ("SQL","Ejecuciones","Total ms","Media ms","Máx ms"))
+        self.tree_slow=self._table(tabs,"Lentas",("Hora","ms","Método","SQL"))
+        self.tree_start=self._table(tabs,"Arranque",("Fase","ms"))
+
+        self.txt=tk.Text(self,height=9,wrap="word"); self.txt.pack(fill="x",padx=6,pady=6)
+
+    def _table(self, tabs, title, cols):
+        tree=ttk.Treeview(tabs,columns=cols,show="headings")
+        for c in cols: tree.heading(c,text=c); tree.column(c,width=90,anchor="e")
+        tree.column(cols[0] if title!="Lentas" else "SQL",width=420,anchor="w")
+        tree.bind("<<TreeviewSelect>>",lambda e,t=tree:self._detail(t))
+        tabs.add(tree,text=title)
+        return tree
+
+    def _load(self):
+        rep=self.profiler.report(); self._rows.clear()
+        self.lbl_since["text"]=f"Desde {rep['started']}"
+        for tree in (self.tree_methods,self.tree_sql,self.tree_slow,self.tree_start):
+            tree.delete(*tree.get_children())
+        for r in rep["methods"]:
+            iid=self.tree_methods.insert("", "end", values=(r["method"], r["count"],
+                f"{r['statements']/r['count']:.1f}", f"{r['total_ms']:.1f}",
+                f"{r['mean_ms']:.3f}", f"{r['max_ms']:.1f}"))
+            self._rows[iid]=r
+        for r in rep["statements"]:
+            iid=self.tree_sql.insert("", "end", values=(r["sql"], r["count"],
+                f"{r['total_ms']:.1f}", f"{r['mean_ms']:.3f}", f"{r['max_ms']:.1f}"))
+            self._rows[iid]=r
+        for r in reversed(rep["slow"]):
+            iid=self.tree_slow.insert("", "end", values=(r["when"], f"{r['ms']:.1f}",
+                r["method"] or "", r["sql"]))
+            self._rows[iid]=r
+        self._load_startup()
+
+    def _load_startup(self):
+        self.tree_start.delete(*self.tree_start.get_children())
+        for phase,ms in self.startup.items():
+            self.tree_start.insert("", "end", values=(phase, f"{ms:.1f}"))
+
+    def _detail(self, tree):
+        sel=tree.selection()
+        if not sel: return
+        r=self._rows.get(sel[0],{})
+        lines=[r.get("method") or r.get("sql","")]
+        if "histogram" in r:
+            lines.append("Histograma: "+"  ".join(f"{k}: {n}" for k,n in r["histogram"].items()))
+        if "plan" in r:
+            lines += [f"Parámetros: {r['params']}", f"Hilo: {r['thread']}",
+                      "Plan:"] + (r["plan"] or ["(sin plan)"])
+        self.txt.delete("1.0","end"); self.txt.insert("1.0","\n".join(lines))
+
+    def _toggle(self):
+        self.profiler.enabled=self.var_on.get()
+
+    def _set_slow(self):
+        try:
+            self.profiler.slow_ms=float(self.var_slow.get())
+        except ValueError:
+            messagebox.showerror("Error","Umbral inválido",parent=self)
+
+    def _reset(self):
+        self.profiler.reset(); self._load()
+
+    def _dump(self):
+        path=filedialog.asksaveasfilename(parent=self,defaultextension=".json",
+            initialfile="diagnostico.json",filetypes=[("JSON","*.json")])
+        if path:
+            self.profiler.dump(path, startup=self.startup)
+            messagebox.showinfo("Diagnóstico",f"Informe guardado en {path}",parent=self)
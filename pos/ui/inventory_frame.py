@@ -3,16 +3,20 @@ inventory_frame.py
 ------------------
 Inventario multi-almacén: entradas, salidas, traspasos y filtro
 «Solo con existencia» para ver rápidamente qué hay en cada almacén.
+Con `feed`, los cambios de existencias actualizan solo sus filas.
 """
 
 from __future__ import annotations
 
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
+from types import SimpleNamespace
 
 from ..models.product import ProductDAO
 from ..models.inventory import InventoryDAO
 from ..models.warehouse import WarehouseDAO
+from .change_feed import TkChangeFeed
+from .db_executor import DBExecutor, InlineExecutor
 
 
 class InventoryFrame(ttk.Frame):
@@ -24,12 +28,21 @@ class InventoryFrame(ttk.Frame):
         prod_dao: ProductDAO,
         inv_dao: InventoryDAO,
         wh_dao: WarehouseDAO,
+        executor: DBExecutor | None = None,
+        feed: TkChangeFeed | None = None,
     ) -> None:
         super().__init__(parent)
         self.prod_dao, self.inv_dao, self.wh_dao = prod_dao, inv_dao, wh_dao
+        self.feed = feed
+        self.executor = executor or InlineExecutor(
+            SimpleNamespace(product=prod_dao, inventory=inv_dao, warehouse=wh_dao)
+        )
 
         self._build()
         self._load()
+        if feed:
+            feed.subscribe(self._on_stock_changed, "stock_levels", "products")
+            feed.subscribe(lambda _t, _ids: self._load_warehouses(), "warehouses")
 
     # ────────────────────────── UI ──────────────────────────
     def _build(self) -> None:
@@ -44,12 +57,8 @@ class InventoryFrame(ttk.Frame):
 
         # almacén
         ttk.Label(bar, text="Almacén").pack(side="left", padx=(8, 2))
-        self.cb_wh = ttk.Combobox(
-            bar,
-            state="readonly",
-            values=[f"{w['id']} - {w['name']}" for w in self.wh_dao.list()],
-            width=18,
-        )
+        self.cb_wh = ttk.Combobox(bar, state="readonly", width=18)
+        self._load_warehouses()
         self.cb_wh.current(0)
         self.cb_wh.pack(side="left")
         self.cb_wh.bind("<<ComboboxSelected>>", lambda _e: self._load())
@@ -86,18 +95,53 @@ class InventoryFrame(ttk.Frame):
     def _selected_wh(self) -> int:
         return int(self.cb_wh.get().split(" - ")[0])
 
+    def _load_warehouses(self) -> None:
+        self.cb_wh["values"] = [f"{w['id']} - {w['name']}" for w in self.wh_dao.list()]
+
     # ───────────────────────── datos ────────────────────────
     def _load(self) -> None:
-        """Rellena la tabla aplicando filtros."""
+        """Pide la tabla filtrada en segundo plano; una carga nueva
+        reemplaza a la que siga en curso."""
+        wid, text, only = self._selected_wh(), self.q.get(), self.only_stock.get()
+        self.executor.submit(
+            lambda d: d.inventory.warehouse_stock(
+                wid, text=text, only_in_stock=only
+            ),
+            on_done=self._fill,
+            key="inventory.load",
+        )
+
+    def _fill(self, rows) -> None:
         self.tree.delete(*self.tree.get_children())
-        wid = self._selected_wh()
-        query = self.q.get()
-        for r in self.prod_dao.search(query):
-            pid, name = r[0], r[2]
-            stock = self.inv_dao.stock(pid, warehouse_id=wid)
-            if self.only_stock.get() and stock == 0:
-                continue
-            self.tree.insert("", "end", values=(pid, name, stock))
+        for pid, name, stock in rows:
+            self.tree.insert("", "end", iid=str(pid), values=(pid, name, stock))
+
+    def _on_stock_changed(self, _table: str, ids: frozenset | None) -> None:
+        """Actualiza existencia y nombre de las filas avisadas; si un producto
+        que no está en la tabla pasa a tener existencia en este almacén se
+        recarga cuando la pestaña esté a la vista."""
+        if ids is None:
+            self.feed.refresh_when_visible(self, self._load)
+            return
+        wid, only = self._selected_wh(), self.only_stock.get()
+        stock = self.inv_dao.stock_many(ids, wid)
+        names = self.prod_dao.get_many(ids)
+        reload = False
+        for pid in ids:
+            iid = str(pid)
+            if not self.tree.exists(iid):
+                reload = reload or bool(stock[pid])
+            elif pid not in names or (only and not stock[pid]):
+                self.tree.delete(iid)
+            else:
+                self.tree.item(iid, values=(pid, names[pid][2], stock[pid]))
+        if reload:
+            self.feed.refresh_when_visible(self, self._load)
+
+    def _after_write(self) -> None:
+        """Sin feed no llegan avisos: se recarga la tabla."""
+        if self.feed is None:
+            self._load()
 
     # ────────────────── movimientos simples ─────────────────
     def _move(self, sign: int) -> None:
@@ -127,7 +171,7 @@ class InventoryFrame(ttk.Frame):
 
         try:
             self.inv_dao.move(pid, wid, sign * qty, concept)
-            self._load()
+            self._after_write()
         except Exception as exc:
             messagebox.showerror("Error", str(exc))
 
@@ -178,7 +222,7 @@ class InventoryFrame(ttk.Frame):
 
         try:
             self.inv_dao.transfer(pid, origen, destino, qty)
-            self._load()
+            self._after_write()
             messagebox.showinfo(
                 "Éxito", f"Trasladadas {qty} u. al almacén {destino}"
             )
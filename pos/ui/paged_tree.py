@@ -0,0 +1,123 @@
+"""
+pos.ui.paged_tree
+-----------------
+Treeview que carga sus filas por páginas a medida que el usuario se
+desplaza.  Los datos salen de un método `page()` de un DAO con paginación
+por clave (keyset): cada página se pide a partir de la clave de la última
+fila recibida, así que mostrar la primera pantalla cuesta lo mismo con
+cien filas que con un millón.
+
+Con `iid` cada fila usa como identificador de Treeview el id de la base;
+así `upsert()` / `remove()` pueden parchar filas sueltas cuando llega un
+aviso de cambios, sin recargar la tabla.
+"""
+
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Iterable, Sequence
+
+PAGE_SIZE = 100
+
+
+class PagedTree(ttk.Frame):
+    """Treeview + scrollbar con carga incremental.
+
+    fetch(after, limit) -> filas   consulta paginada del DAO
+    key(fila)           -> clave   valor `after` para pedir la siguiente página
+    values(fila)        -> tupla   valores a mostrar (por defecto `tuple(fila)`)
+    iid(fila)           -> id      identificador de la fila (opcional)
+    descending                     True si `fetch` ordena por clave descendente
+    """
+
+    def __init__(
+        self,
+        parent: tk.Misc,
+        columns: Sequence[str],
+        fetch: Callable[[Any, int], Sequence],
+        key: Callable[[Any], Any],
+        values: Callable[[Any], tuple] = tuple,
+        page_size: int = PAGE_SIZE,
+        iid: Callable[[Any], Any] | None = None,
+        descending: bool = False,
+        **tree_kw,
+    ) -> None:
+        super().__init__(parent)
+        self.fetch, self.key, self.values = fetch, key, values
+        self.iid, self.descending = iid, descending
+        self.page_size = page_size
+        self._keys: dict[str, Any] = {}        # iid → clave de orden
+        self._after: Any = None
+        self._done = False
+        self._pending = False
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", **tree_kw)
+        self.scroll = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+    # ───────────────────────── API ─────────────────────────
+    def reload(self) -> None:
+        """Vacía la tabla y vuelve a pedir la primera página."""
+        self.tree.delete(*self.tree.get_children())
+        self._keys.clear()
+        self._after, self._done = None, False
+        self.load_more()
+
+    def load_more(self) -> None:
+        """Agrega la siguiente página, si quedan filas."""
+        self._pending = False
+        if self._done:
+            return
+        rows = self.fetch(self._after, self.page_size)
+        for row in rows:
+            if self.iid is None:
+                self.tree.insert("", "end", values=self.values(row))
+                continue
+            iid = str(self.iid(row))
+            if self.tree.exists(iid):          # ya insertada por upsert()
+                self.tree.item(iid, values=self.values(row))
+            else:
+                self.tree.insert("", "end", iid=iid, values=self.values(row))
+            self._keys[iid] = self.key(row)
+        if rows:
+            self._after = self.key(rows[-1])
+        if len(rows) < self.page_size:
+            self._done = True
+
+    def upsert(self, rows: Iterable) -> None:
+        """Actualiza filas ya mostradas e inserta en su lugar las nuevas que
+        caen dentro de lo cargado (las demás llegarán con su página)."""
+        for row in rows:
+            iid = str(self.iid(row))
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=self.values(row))
+                continue
+            k = self.key(row)
+            if not self._done and (self._after is None or (
+                    k < self._after if self.descending else k > self._after)):
+                continue
+            index = next(
+                (i for i, child in enumerate(self.tree.get_children())
+                 if (self._keys[child] < k if self.descending
+                     else self._keys[child] > k)),
+                "end",
+            )
+            self.tree.insert("", index, iid=iid, values=self.values(row))
+            self._keys[iid] = k
+
+    def remove(self, iids: Iterable) -> None:
+        for iid in map(str, iids):
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+                self._keys.pop(iid, None)
+
+    # ─────────────────────── internals ─────────────────────
+    def _on_scroll(self, first: str, last: str) -> None:
+        self.scroll.set(first, last)
+        # cerca del final: se programa la siguiente página una sola vez
+        if float(last) >= 0.9 and not self._done and not self._pending:
+            self._pending = True
+            self.after_idle(self.load_more)
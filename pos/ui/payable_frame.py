@@ -2,11 +2,15 @@ import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
 from ..models.payable import PayableDAO
 from ..models.supplier import SupplierDAO
+from .change_feed import TkChangeFeed
+from .paged_tree import PagedTree
 
 class PayableFrame(ttk.Frame):
-    def __init__(self, parent, dao: PayableDAO, sup_dao: SupplierDAO):
-        super().__init__(parent); self.dao, self.sup_dao = dao, sup_dao
+    def __init__(self, parent, dao: PayableDAO, sup_dao: SupplierDAO,
+                 feed: TkChangeFeed | None = None):
+        super().__init__(parent); self.dao, self.sup_dao, self.feed = dao, sup_dao, feed
         self._build(); self._load()
+        if feed: feed.subscribe(self._on_change, "payables")
 
     def _build(self):
         bar=ttk.Frame(self); bar.pack(fill="x",pady=4)
@@ -14,17 +18,27 @@ class PayableFrame(ttk.Frame):
         ttk.Button(bar,text="Registrar pago",command=self._pay).pack(side="left")
 
         cols=("ID","Proveedor","Fecha","Concepto","Monto","Pagado","Saldo")
-        self.tree=ttk.Treeview(self,columns=cols,show="headings")
+        self.table=PagedTree(self,cols,fetch=self.dao.page,key=lambda r:r["id"],
+            values=lambda r:(r["id"], r["supplier"], r["date"], r["concept"],
+                             f"{r['amount']:.2f}", f"{r['paid']:.2f}",
+                             f"{r['balance']:.2f}"),
+            iid=lambda r:r["id"], descending=True)
+        self.tree=self.table.tree
         for c in cols: self.tree.heading(c,text=c)
-        self.tree.pack(fill="both",expand=True,padx=6,pady=6)
+        self.table.pack(fill="both",expand=True,padx=6,pady=6)
 
     def _load(self):
-        self.tree.delete(*self.tree.get_children())
-        for r in self.dao.list():
-            self.tree.insert("","end",
-                values=(r["id"], r["supplier"], r["date"], r["concept"],
-                        f"{r['amount']:.2f}", f"{r['paid']:.2f}",
-                        f"{r['balance']:.2f}"))
+        self.table.reload()
+
+    def _on_change(self, _table, ids):
+        if ids is None:
+            self.feed.refresh_when_visible(self,self._load); return
+        rows=self.dao.get_many(ids)
+        self.table.remove(ids-rows.keys())
+        self.table.upsert(rows.values())
+
+    def _after_write(self):
+        if self.feed is None: self._load()
 
     def _new(self):
         sups=self.sup_dao.list()
@@ -35,11 +49,11 @@ class PayableFrame(ttk.Frame):
                     parent=self)
         concept=simpledialog.askstring("Concepto","Descripción:",parent=self)
         amount=float(simpledialog.askstring("Monto","Monto:",parent=self) or 0)
-        self.dao.add_invoice(sup_sel, concept, amount); self._load()
+        self.dao.add_invoice(sup_sel, concept, amount); self._after_write()
 
     def _pay(self):
         sel=self.tree.focus()
         if not sel: return
         pid=int(self.tree.item(sel)["values"][0])
         amt=float(simpledialog.askstring("Pago","Monto a pagar:",parent=self) or 0)
-        self.dao.pay(pid, amt); self._load()
+        self.dao.pay(pid, amt); self._after_write()
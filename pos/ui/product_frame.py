@@ -2,26 +2,37 @@
 product_frame.py
 ----------------
 Gestión de productos: búsqueda, alta y envío de un producto seleccionado
-al carrito de la pestaña Ventas mediante el evento virtual <<AddToCart>>.
+al carrito de la pestaña Ventas (callback `on_add_to_cart` de la aplicación).
+Con `feed`, los cambios de productos se aplican fila por fila.
 """
 
 from __future__ import annotations
 
-import random
 import tkinter as tk
 from tkinter import ttk, messagebox
+from typing import Callable
 
 from ..models.product import ProductDAO
+from .change_feed import TkChangeFeed
+from .paged_tree import PagedTree
 
 
 class ProductFrame(ttk.Frame):
     """Pestaña «Productos» con lista, búsqueda y alta de artículos."""
 
-    def __init__(self, parent: tk.Misc, dao: ProductDAO) -> None:
+    def __init__(
+        self,
+        parent: tk.Misc,
+        dao: ProductDAO,
+        feed: TkChangeFeed | None = None,
+        on_add_to_cart: Callable[[int], None] | None = None,
+    ) -> None:
         super().__init__(parent)
-        self.dao = dao
+        self.dao, self.feed, self.on_add_to_cart = dao, feed, on_add_to_cart
         self._build_widgets()
         self._load()
+        if feed:
+            feed.subscribe(self._on_change, "products")
 
     # ────────────────────────── UI ──────────────────────────
     def _build_widgets(self) -> None:
@@ -43,13 +54,22 @@ class ProductFrame(ttk.Frame):
             bar, text="Agregar Producto", command=self._open_add
         ).pack(side="right")
 
-        # tabla
+        # tabla (carga por páginas al desplazarse)
         cols = ("ID", "Código", "Nombre", "Unidad", "Precio", "Stock")
-        self.tree = ttk.Treeview(self, columns=cols, show="headings")
+        self.table = PagedTree(
+            self,
+            cols,
+            fetch=lambda after, limit: self.dao.page(
+                self.search_var.get(), after, limit
+            ),
+            key=lambda row: (row[2], row[0]),
+            iid=lambda row: row[0],
+        )
+        self.tree = self.table.tree
         for c in cols:
             self.tree.heading(c, text=c)
             self.tree.column(c, anchor="center")
-        self.tree.pack(fill="both", expand=True, padx=6, pady=6)
+        self.table.pack(fill="both", expand=True, padx=6, pady=6)
 
         # anchuras de columna
         for col, w in zip(cols, (60, 120, 220, 70, 90, 70)):
@@ -58,26 +78,39 @@ class ProductFrame(ttk.Frame):
     # ────────────────────── datos / helpers ─────────────────
     def _load(self) -> None:
         """Recarga la tabla aplicando el filtro de búsqueda."""
-        self.tree.delete(*self.tree.get_children())
-        for row in self.dao.search(self.search_var.get()):
-            self.tree.insert("", "end", values=row)
+        self.table.reload()
+
+    def _on_change(self, _table: str, ids: frozenset | None) -> None:
+        """Aplica un aviso de cambios: solo se releen las filas afectadas."""
+        if ids is None:
+            self.feed.refresh_when_visible(self, self._load)
+            return
+        rows = self.dao.get_many(ids)
+        self.table.remove(ids - rows.keys())        # ya no existen
+        if self.search_var.get().strip():
+            # con filtro activo no se sabe si una fila nueva coincide
+            rows = {pid: r for pid, r in rows.items()
+                    if self.tree.exists(str(pid))}
+        self.table.upsert(rows.values())
+
+    def _after_write(self) -> None:
+        """Sin feed no llegan avisos: se recarga la tabla."""
+        if self.feed is None:
+            self._load()
 
     def _send_to_cart(self) -> None:
-        """Envía el producto seleccionado al carrito (evento global)."""
+        """Envía el producto seleccionado al carrito de la pestaña Ventas."""
         sel = self.tree.focus()
         if not sel:
             messagebox.showinfo("Selecciona", "Elige un producto primero")
             return
 
-        product_id = int(self.tree.item(sel)["values"][0])
-
-        root = self.winfo_toplevel()           # ventana raíz (Tk)
-        root._product_to_add = product_id      # ← atributo temporal
-        root.event_generate("<<AddToCart>>", when="tail")
+        if self.on_add_to_cart:
+            self.on_add_to_cart(int(self.tree.item(sel)["values"][0]))
 
     def _open_add(self) -> None:
         """Abre la ventana emergente para crear un nuevo producto."""
-        AddProductWindow(self, self.dao, on_save=self._load)
+        AddProductWindow(self, self.dao, on_save=self._after_write)
 
 
 # ════════════════════════════════════════════════════════════
@@ -156,19 +189,12 @@ class AddProductWindow(tk.Toplevel):
         self.inputs["sku"]["state"] = "readonly"
 
     def _new_barcode(self) -> str:
-        """Devuelve un EAN-13 único en la BD."""
-        while True:
-            code = "".join(random.choices("0123456789", k=13))
-            if not self.dao.barcode_exists(code):
-                return code
+        """Devuelve un EAN-13 nuevo (con dígito verificador)."""
+        return self.dao.allocator.next_barcode()
 
     def _new_sku(self) -> str:
-        """Devuelve un SKU alfanumérico (8 car.) único en la BD."""
-        chars = "ABCDEFGHJKLMNPQRTUVWXYZ23456789"
-        while True:
-            code = "".join(random.choices(chars, k=8))
-            if not self.dao.sku_exists(code):
-                return code
+        """Devuelve un SKU nuevo."""
+        return self.dao.allocator.next_sku()
 
     # ───────────────────────── guardar ─────────────────────────
     def _save(self) -> None:
@@ -194,7 +220,8 @@ class AddProductWindow(tk.Toplevel):
             if stock_qty > 0:
                 from ..models.inventory import InventoryDAO
 
-                InventoryDAO(self.dao.conn).move(
+                InventoryDAO(self.dao.conn, product_cache=self.dao.cache,
+                             events=self.dao.events).move(
                     product_id=pid,
                     warehouse_id=1,
                     qty=stock_qty,
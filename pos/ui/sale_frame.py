@@ -2,18 +2,23 @@
 sale_frame.py
 -------------
 Módulo de ventas: permite buscar/añadir productos, recibir artículos
-desde la pestaña Productos (evento <<AddToCart>>), seleccionar cliente,
-cobrar y registrar la venta.
+desde la pestaña Productos (`add_product`, llamado por la aplicación),
+seleccionar cliente, cobrar y registrar la venta.
 """
 
 from __future__ import annotations
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
+from types import SimpleNamespace
 
+from ..models.cart import Cart
 from ..models.product import ProductDAO
 from ..models.client import ClientDAO
 from ..models.sale import SaleDAO
+from .change_feed import TkChangeFeed
+from .db_executor import DBExecutor, InlineExecutor
+from .typeahead import Typeahead
 
 
 class SaleFrame(ttk.Frame):
@@ -25,6 +30,8 @@ class SaleFrame(ttk.Frame):
         prod_dao: ProductDAO,
         client_dao: ClientDAO,
         sale_dao: SaleDAO,
+        executor: DBExecutor | None = None,
+        feed: TkChangeFeed | None = None,
     ) -> None:
         super().__init__(parent)
         self.prod_dao, self.client_dao, self.sale_dao = (
@@ -32,17 +39,28 @@ class SaleFrame(ttk.Frame):
             client_dao,
             sale_dao,
         )
-        self.cart: list[dict] = []  # lista de ítems del carrito
+        self.executor = executor or InlineExecutor(
+            SimpleNamespace(product=prod_dao, client=client_dao, sale=sale_dao)
+        )
+        self.cart = Cart()          # renglones por id de producto
+        self._charging = False      # evita cobrar dos veces el mismo carrito
+        self.feed = feed
         self._build_widgets()
+        if feed:
+            feed.subscribe(self._on_clients_changed, "clients")
 
     # ───────────────────── datos auxiliares ─────────────────────
-    def _load_clients(self) -> None:
-        """Consulta la BD y actualiza el combobox de clientes."""
-        self.cb_client["values"] = [
-            f"{c['id']} - {c['name']}" for c in self.client_dao.list()
-        ]
-        if self.cb_client["values"]:
-            self.cb_client.current(0)
+    @staticmethod
+    def _client_label(row) -> str:
+        return " · ".join(str(v) for v in (row["name"], row["phone"]) if v)
+
+    def _on_clients_changed(self, _table: str, ids: frozenset | None) -> None:
+        """Si cambió el cliente elegido (nombre, saldo) se relee solo ese."""
+        current = self.client_select.selected
+        if current is None or (ids is not None and current["id"] not in ids):
+            return
+        row = self.client_dao.get_many([current["id"]]).get(current["id"])
+        self.client_select.set(row)
 
     # ────────────────────────── UI ──────────────────────────────
     def _build_widgets(self) -> None:
@@ -55,24 +73,16 @@ class SaleFrame(ttk.Frame):
         ent.pack(side="left", padx=4)
         ent.bind("<Return>", self._add_by_search)
 
-        # selector de cliente
+        # selector de cliente: busca por nombre, teléfono o correo al
+        # hacer una pausa; sin cliente elegido la venta es de mostrador
         ttk.Label(top, text="Cliente").pack(side="left", padx=6)
-        self.cb_client = ttk.Combobox(top, state="readonly")
-        self.cb_client.pack(side="left")
-        self._load_clients()
-
-        # botón manual de refresco de clientes
-        ttk.Button(top, text="Refrescar", command=self._load_clients).pack(
-            side="left", padx=4
-        )
-
-        # escucha eventos globales
-        self.winfo_toplevel().bind(
-            "<<ClientAdded>>", lambda e: self._load_clients(), add="+"
-        )
-        self.winfo_toplevel().bind(
-            "<<AddToCart>>", self._on_add_product, add="+"
+        self.client_select = Typeahead(
+            top,
+            self.executor,
+            search=lambda d, text: d.client.search(text, limit=20),
+            label=self._client_label,
         )
+        self.client_select.pack(side="left")
 
         # botón COBRAR
         ttk.Button(top, text="Cobrar", command=self._checkout).pack(
@@ -86,6 +96,7 @@ class SaleFrame(ttk.Frame):
             self.tree.heading(c, text=c)
             self.tree.column(c, anchor="center")
         self.tree.pack(fill="both", expand=True, padx=6, pady=6)
+        self.tree.bind("<Delete>", self._remove_selected)
 
         # total
         bottom = ttk.Frame(self)
@@ -101,83 +112,73 @@ class SaleFrame(ttk.Frame):
         text = self.q_search.get().strip()
         if not text:
             return
-        prod = next(iter(self.prod_dao.search(text)), None)
+        # lector de código: coincidencia exacta primero, luego texto libre
+        prod = self.prod_dao.find_by_code(text) or next(
+            iter(self.prod_dao.search(text, limit=1)), None
+        )
         if not prod:
             messagebox.showwarning("Sin resultados", "Producto no encontrado")
             return
         self._add_to_cart(prod)
         self.q_search.set("")
 
-    def _on_add_product(self, _event=None) -> None:
+    def add_product(self, pid: int) -> None:
         """
-        Manejador del evento global <<AddToCart>>.
-        El ID del producto está en root._product_to_add.
+        Añade un producto por id; la aplicación lo llama cuando se envía un
+        artículo desde Productos (aunque esta pestaña no se haya abierto).
         """
-        pid = getattr(self.winfo_toplevel(), "_product_to_add", None)
-        if pid is None:
-            return
-
-        prod = next(
-            (r for r in self.prod_dao.search(str(pid)) if r[0] == pid), None
-        )
+        prod = self.prod_dao.get(pid)
         if prod:
             self._add_to_cart(prod)
 
 
     def _add_to_cart(self, prod_row) -> None:
         """Añade el producto (tupla) al carrito, respetando el stock."""
-        pid = prod_row[0]  # id
-        # si ya existe en carrito, incrementa qty
-        for item in self.cart:
-            if item["product_id"] == pid:
-                if item["qty"] + 1 > prod_row[5]:
-                    messagebox.showwarning("Stock", "Sin stock suficiente")
-                    return
-                item["qty"] += 1
-                break
+        try:
+            line = self.cart.add(prod_row[0], prod_row[2], prod_row[4],
+                                 stock=prod_row[5])
+        except ValueError as exc:
+            messagebox.showwarning("Stock", str(exc))
+            return
+        self._render_line(line)
+
+    def _remove_selected(self, _event=None) -> None:
+        """Quita del carrito los renglones seleccionados (tecla Supr)."""
+        for iid in self.tree.selection():
+            self.cart.remove(int(iid))
+            self.tree.delete(iid)
+        self._show_total()
+
+    def _render_line(self, it: dict) -> None:
+        """Actualiza (o crea) solo la fila del producto, iid = id de producto."""
+        iid = str(it["product_id"])
+        values = (
+            it["product_id"],
+            it["name"],
+            it["qty"],
+            f"{it['price']:.2f}",
+            f"{it['price'] * it['qty']:.2f}",
+        )
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=values)
         else:
-            # nuevo item
-            if prod_row[5] < 1:
-                messagebox.showwarning("Stock", "Sin stock disponible")
-                return
-            self.cart.append(
-                {
-                    "product_id": pid,
-                    "name": prod_row[2],
-                    "qty": 1,
-                    "price": prod_row[4],
-                }
-            )
-        self._refresh_table()
-
-    def _refresh_table(self) -> None:
-        """Redibuja la tabla del carrito y su total."""
-        self.tree.delete(*self.tree.get_children())
-        total = 0.0
-        for it in self.cart:
-            subtotal = it["price"] * it["qty"]
-            total += subtotal
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    it["product_id"],
-                    it["name"],
-                    it["qty"],
-                    f"{it['price']:.2f}",
-                    f"{subtotal:.2f}",
-                ),
-            )
-        self.lbl_total["text"] = f"Total: {total:.2f}"
+            self.tree.insert("", "end", iid=iid, values=values)
+        self.tree.see(iid)
+        self._show_total()
+
+    def _show_total(self) -> None:
+        self.lbl_total["text"] = f"Total: {self.cart.total:.2f}"
 
     # ───────────────────── proceso de cobro ────────────────────
     def _checkout(self) -> None:
         """Registra la venta si el carrito no está vacío."""
+        if self._charging:
+            return
         if not self.cart:
             messagebox.showinfo("Carrito vacío", "Agrega productos primero")
             return
 
-        total = float(self.lbl_total["text"].split(":")[1])
+        total = self.cart.total
         paid = float(
             simpledialog.askstring(
                 "Pago",
@@ -187,19 +188,35 @@ class SaleFrame(ttk.Frame):
             or 0
         )
 
-        client_id = (
-            int(self.cb_client.get().split(" - ")[0]) if self.cb_client.get() else None
-        )
+        client = self.client_select.selected
+        client_id = client["id"] if client is not None else None
+        cart = self.cart.lines()   # el hilo de BD trabaja con una copia
 
-        try:
-            self.sale_dao.create_sale(
+        def done(_sale_id) -> None:
+            self._charging = False
+            messagebox.showinfo("Éxito", "Venta registrada")
+            # solo lo cobrado: lo escaneado durante el cobro sigue en el carrito
+            for pid in self.cart.subtract(cart):
+                line = self.cart.get(pid)
+                if line is None:
+                    self.tree.delete(str(pid))
+                else:
+                    self._render_line(line)
+            self._show_total()
+            self.client_select.clear()
+
+        def failed(exc: BaseException) -> None:
+            self._charging = False
+            messagebox.showerror("Error", str(exc))
+
+        self._charging = True
+        self.executor.submit(
+            lambda d: d.sale.create_sale(
                 client_id=client_id,
-                cart=self.cart,
+                cart=cart,
                 discount_global=0,
                 paid=paid,
-            )
-            messagebox.showinfo("Éxito", "Venta registrada")
-            self.cart.clear()
-            self._refresh_table()
-        except Exception as exc:
-            messagebox.showerror("Error", str(exc))
+            ),
+            on_done=done,
+            on_error=failed,
+        )
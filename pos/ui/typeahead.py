@@ -0,0 +1,153 @@
+"""
+pos.ui.typeahead
+----------------
+Entrada con sugerencias para elegir un registro entre muchos (clientes).
+
+Mientras se escribe no se consulta nada: la búsqueda sale cuando el usuario
+hace una pausa de `delay_ms`, por el ejecutor de BD y con clave propia, de
+modo que una consulta que llega tarde se descarta si ya hay otra más nueva.
+Los resultados se muestran en una lista desplegable bajo la entrada.
+
+    ta = Typeahead(
+        parent, executor,
+        search=lambda d, text: d.client.search(text, limit=20),
+        label=lambda r: f"{r['name']} · {r['phone'] or ''}",
+    )
+    ta.selected      # fila elegida, o None
+
+Teclas: ↓/↑ recorren la lista, Enter elige, Esc la cierra.  Al editar el
+texto se pierde la selección.
+"""
+
+from __future__ import annotations
+
+import itertools
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Sequence
+
+_ids = itertools.count(1)
+_NAV_KEYS = {"Up", "Down", "Return", "KP_Enter", "Escape", "Tab",
+             "Left", "Right", "Home", "End", "Shift_L", "Shift_R",
+             "Control_L", "Control_R", "Alt_L", "Alt_R"}
+
+
+class Typeahead(ttk.Frame):
+    """Entrada + lista de sugerencias con búsqueda diferida.
+
+    search(daos, texto) -> filas   consulta (corre en el hilo del ejecutor)
+    label(fila)         -> str     texto a mostrar por fila
+    on_select(fila)                aviso al elegir (fila o None al borrar)
+    """
+
+    def __init__(
+        self,
+        parent: tk.Misc,
+        executor: Any,
+        search: Callable[[Any, str], Sequence[Any]],
+        label: Callable[[Any], str] = str,
+        on_select: Callable[[Any], None] | None = None,
+        delay_ms: int = 250,
+        min_chars: int = 1,
+        width: int = 30,
+    ) -> None:
+        super().__init__(parent)
+        self.executor, self.search, self.label = executor, search, label
+        self.on_select = on_select
+        self.delay_ms, self.min_chars = delay_ms, min_chars
+        self.selected: Any = None
+        self._rows: list = []
+        self._after: str | None = None
+        self._key = f"typeahead.{next(_ids)}"
+
+        self.var = tk.StringVar()
+        self.entry = ttk.Entry(self, textvariable=self.var, width=width)
+        self.entry.pack(fill="x")
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Down>", lambda e: self._move(1))
+        self.entry.bind("<Up>", lambda e: self._move(-1))
+        self.entry.bind("<Return>", lambda e: self._choose())
+        self.entry.bind("<KP_Enter>", lambda e: self._choose())
+        self.entry.bind("<Escape>", lambda e: self._hide())
+        self.entry.bind("<FocusOut>", lambda e: self.after(150, self._hide))
+
+        # lista flotante bajo la entrada
+        self._popup = tk.Toplevel(self)
+        self._popup.wm_overrideredirect(True)
+        self._popup.withdraw()
+        self._list = tk.Listbox(self._popup, height=8, activestyle="dotbox",
+                                exportselection=False)
+        self._list.pack(fill="both", expand=True)
+        self._list.bind("<ButtonRelease-1>", lambda e: self._choose())
+
+    # ───────────────────────── API ─────────────────────────
+    def set(self, row: Any) -> None:
+        """Fija la selección (o la borra con None) sin buscar."""
+        self.selected = row
+        self.var.set("" if row is None else self.label(row))
+        self._hide()
+
+    def clear(self) -> None:
+        self.set(None)
+
+    # ─────────────────────── internals ─────────────────────
+    def _on_key(self, event: tk.Event) -> None:
+        if event.keysym in _NAV_KEYS:
+            return
+        if self.selected is not None:
+            self.selected = None
+            if self.on_select:
+                self.on_select(None)
+        if self._after is not None:
+            self.after_cancel(self._after)
+        self._after = self.after(self.delay_ms, self._query)
+
+    def _query(self) -> None:
+        self._after = None
+        text = self.var.get().strip()
+        if len(text) < self.min_chars:
+            self._hide()
+            return
+        self.executor.submit(
+            lambda d: self.search(d, text), on_done=self._show, key=self._key
+        )
+
+    def _show(self, rows: Sequence[Any]) -> None:
+        self._rows = list(rows)
+        self._list.delete(0, "end")
+        if not self._rows or self.focus_get() is not self.entry:
+            self._hide()
+            return
+        for row in self._rows:
+            self._list.insert("end", self.label(row))
+        self._list.configure(height=min(len(self._rows), 8))
+        self._popup.geometry(
+            f"{self.entry.winfo_width()}x{self._list.winfo_reqheight()}"
+            f"+{self.entry.winfo_rootx()}"
+            f"+{self.entry.winfo_rooty() + self.entry.winfo_height()}"
+        )
+        self._popup.deiconify()
+        self._popup.lift()
+
+    def _hide(self) -> None:
+        self._popup.withdraw()
+
+    def _move(self, step: int) -> str:
+        if not self._rows:
+            return "break"
+        current = self._list.curselection()
+        index = (current[0] + step) if current else (0 if step > 0 else len(self._rows) - 1)
+        index = max(0, min(index, len(self._rows) - 1))
+        self._list.selection_clear(0, "end")
+        self._list.selection_set(index)
+        self._list.see(index)
+        return "break"
+
+    def _choose(self) -> str:
+        if not self._popup.winfo_viewable() or not self._rows:
+            return "break"
+        current = self._list.curselection()
+        self.set(self._rows[current[0] if current else 0])
+        if self.on_select:
+            self.on_select(self.selected)
+        return "break"
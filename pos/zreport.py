@@ -0,0 +1,90 @@
+"""
+pos.zreport
+-----------
+Texto imprimible del corte de caja (reporte Z).
+
+Los totales salen del resumen guardado al cerrar el turno
+(`ShiftReportDAO`); el detalle de movimientos se lee por bloques y se
+escribe en un archivo con búfer amplio, así que ni la memoria ni el tiempo
+dependen de cargar el turno completo.  Una reimpresión sin detalle solo lee
+la fila del resumen.
+
+    path = save_report(daos.cash.reports, shift_id)          # al cerrar
+    save_report(daos.cash.reports, shift_id, details=False,  # reimpresión
+                reprint=True)
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Iterable, Iterator, TextIO
+
+from .models.shift_report import ShiftReportDAO
+
+WIDTH = 48
+
+
+def _money(value: float) -> str:
+    return f"{value:>14,.2f}"
+
+
+def summary_for(reports: ShiftReportDAO, shift_id: int) -> dict[str, Any]:
+    """Resumen guardado del turno; lo calcula si el turno se cerró antes de
+    que existiera `shift_reports`."""
+    summary = reports.get(shift_id)
+    if summary is None:
+        with reports.conn:
+            summary = reports.record(shift_id)
+    return summary
+
+
+def summary_lines(s: dict[str, Any], reprint: bool = False) -> Iterator[str]:
+    yield "CORTE DE CAJA (Z)" + ("  — REIMPRESIÓN" if reprint else "") + "\n"
+    yield f"Turno {s['shift_id']}\n"
+    yield f"Apertura: {s['opened']}\n"
+    yield f"Cierre:   {s['closed'] or '(abierto)'}\n"
+    yield "=" * WIDTH + "\n"
+    yield f"{'Fondo inicial':<20}{'':>14}{_money(s['opening_amount'])}\n"
+    yield f"{'Entradas':<20}{'':>14}{_money(s['cash_in'])}\n"
+    yield f"{'Salidas':<20}{'':>14}{_money(s['cash_out'])}\n"
+    yield f"{'Total turno':<20}{s['movements']:>14}{_money(s['total'])}\n"
+    yield f"{'Efectivo esperado':<20}{'':>14}{_money(s['opening_amount'] + s['total'])}\n"
+    yield "\nPOR CONCEPTO\n"
+    for concept, n, amount in s["by_concept"]:
+        yield f"{(concept or '')[:20]:<20}{n:>14}{_money(amount)}\n"
+    yield "\nVENTAS POR TIPO DE PAGO\n"
+    for payment, n, total, paid in s["by_payment"]:
+        yield f"{(payment or '-')[:20]:<20}{n:>14}{_money(total)}\n"
+        if paid != total:
+            yield f"{'  cobrado':<20}{'':>14}{_money(paid)}\n"
+    yield f"{'Total ventas':<20}{s['sales_count']:>14}{_money(s['sales_total'])}\n"
+
+
+def detail_lines(rows: Iterable) -> Iterator[str]:
+    yield "\nDETALLE\n"
+    for r in rows:
+        yield f"{r['date']}  {(r['concept'] or '')[:14]:<14}{_money(r['amount'])}\n"
+
+
+def write_report(reports: ShiftReportDAO, shift_id: int, out: TextIO,
+                 details: bool = True, reprint: bool = False,
+                 chunk_size: int = 1000) -> dict[str, Any]:
+    """Escribe el corte en `out` y devuelve su resumen."""
+    summary = summary_for(reports, shift_id)
+    out.writelines(summary_lines(summary, reprint))
+    if details:
+        out.writelines(detail_lines(reports.iter_movements(shift_id, chunk_size)))
+    out.write("=" * WIDTH + "\n")
+    out.write(f"{'TOTAL':<20}{'':>14}{_money(summary['total'])}\n")
+    return summary
+
+
+def save_report(reports: ShiftReportDAO, shift_id: int, directory: str = ".",
+                details: bool = True, reprint: bool = False) -> str:
+    """Guarda el corte en `directory` y devuelve la ruta del archivo."""
+    suffix = "_reimpresion" if reprint else ""
+    path = os.path.join(directory, f"corte_{shift_id:06d}{suffix}.txt")
+    # búfer amplio: el detalle se escribe en bloques, no línea por línea
+    with open(path, "w", encoding="utf-8", buffering=1 << 16) as out:
+        write_report(reports, shift_id, out, details, reprint)
+    return path
@@ -0,0 +1,2 @@
+from runpy import run_module
+run_module('pos.api', run_name='__main__')
\ No newline at end of file